@@ -0,0 +1,193 @@
+"""Compare the read amplification of tiling grids.
+
+Tiles a synthetic land cover raster with every grid, then reads random areas
+of interest from the tile COGs, as a client would with range requests, and
+reports the number of reads and bytes per query. The amplification is the
+ratio of the bytes read to the compressed size of the pixels of the query,
+1 meaning that nothing else was read::
+
+    python -m benchmarks.grid --size 8192 --grid 2500 --grid 2560:256
+
+Grids are given as `<tile size>[:<overlap>]` in pixels. A client reads a
+query from the single tile containing it when there is one, which overlap
+makes more likely, and otherwise from every tile it intersects. Reads are
+counted with the `opener` argument of `rasterio.open`, which needs rasterio
+1.4 or later.
+"""
+import argparse
+import json
+import os
+from tempfile import TemporaryDirectory
+from typing import IO, Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window, from_bounds
+
+from benchmarks.synthetic import write_landcover_raster
+from stactools.usgs_nlcd import cog
+from stactools.usgs_nlcd.constants import NLCD_GRID_ORIGIN, SPATIAL_RES
+from stactools.usgs_nlcd.grid import TileGrid
+
+DEFAULT_GRIDS = ["2500", "2560", "2560:256"]
+# Query sizes in pixels: about a small county and a city at 30 m.
+DEFAULT_AOI_SIZES = [1024, 256]
+
+
+class _CountingFile:
+    """A file that counts the reads made through it."""
+    def __init__(self, f: IO[bytes], counts: Dict[str, int]) -> None:
+        self._file = f
+        self._counts = counts
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self._counts["requests"] += 1
+        self._counts["bytes"] += len(data)
+        return data
+
+    def __enter__(self) -> "_CountingFile":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._file.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+
+class _CountingOpener:
+    """A rasterio opener counting the reads of all the files it opens."""
+    def __init__(self) -> None:
+        self.counts = {"requests": 0, "bytes": 0}
+
+    def __call__(self, path: str, mode: str = "rb") -> _CountingFile:
+        return _CountingFile(open(path, mode), self.counts)
+
+
+def benchmark_grids(size: int = 8192,
+                    grids: Sequence[str] = DEFAULT_GRIDS,
+                    aoi_sizes: Sequence[int] = DEFAULT_AOI_SIZES,
+                    queries: int = 50,
+                    seed: int = 0) -> List[Dict[str, Any]]:
+    """Measure the reads of random queries of each size, on each grid.
+
+    Requests and bytes are averaged over `queries` queries, the same ones for
+    every grid.
+    """
+    transform = from_origin(NLCD_GRID_ORIGIN[0], NLCD_GRID_ORIGIN[1],
+                            SPATIAL_RES, SPATIAL_RES)
+    rng = np.random.default_rng(seed)
+    windows = {
+        aoi_size: [
+            Window(int(rng.integers(0, size - aoi_size)),
+                   int(rng.integers(0, size - aoi_size)), aoi_size, aoi_size)
+            for _ in range(queries)
+        ]
+        for aoi_size in aoi_sizes
+    }
+    results = []
+    with TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, "nlcd_2019_land_cover.tif")
+        write_landcover_raster(source_path, size, size, seed=seed)
+
+        for spec in grids:
+            tile_size, overlap = _parse_grid(spec)
+            output_directory = os.path.join(tmp_dir, spec.replace(":", "_"))
+            os.mkdir(output_directory)
+            cog.create_retiled_cogs(source_path,
+                                    output_directory,
+                                    tile_size=tile_size,
+                                    overlap=overlap,
+                                    resume=False)
+            grid = TileGrid(size, size, tile_size, transform, overlap)
+            prefix = os.path.join(output_directory, "nlcd_2019_land_cover_")
+            paths = {
+                tile: f"{prefix}{grid.tile_name(*tile)}.tif"
+                for tile in grid.tiles()
+            }
+            stored_bytes = sum(
+                os.path.getsize(path) for path in paths.values())
+            # Overlapping pixels are stored more than once; compare with the
+            # compressed size of a pixel.
+            stored_pixels = sum(
+                grid.window(*tile).width * grid.window(*tile).height
+                for tile in paths)
+            for aoi_size in aoi_sizes:
+                opener = _CountingOpener()
+                for window in windows[aoi_size]:
+                    _query(grid, paths, window, opener)
+                aoi_bytes = stored_bytes * aoi_size**2 / stored_pixels
+                read_bytes = opener.counts["bytes"] / queries
+                results.append({
+                    "grid": spec,
+                    "tile_size": tile_size[0],
+                    "overlap": overlap,
+                    "aoi_size": aoi_size,
+                    "stored_bytes": stored_bytes,
+                    "requests": opener.counts["requests"] / queries,
+                    "bytes": read_bytes,
+                    "amplification": read_bytes / aoi_bytes,
+                })
+    return results
+
+
+def _query(grid: TileGrid, paths: Dict[Tuple[int, int], str], window: Window,
+           opener: _CountingOpener) -> None:
+    # The tiles without their overlap partition the raster; an overlapping
+    # tile containing the whole query saves reading from its neighbours.
+    bounds = rasterio.windows.bounds(window, grid.transform)
+    core = TileGrid(grid.width, grid.height, grid.tile_size, grid.transform)
+    tiles = core.tiles_for_bounds(bounds)
+    containing = [
+        tile for tile in tiles if _contains(grid.window(*tile), window)
+    ]
+    for tile in containing[:1] or tiles:
+        with rasterio.open(paths[tile], opener=opener) as dataset:
+            tile_window = from_bounds(
+                *bounds, transform=dataset.transform).intersection(
+                    Window(0, 0, dataset.width, dataset.height))
+            dataset.read(1, window=tile_window.round_offsets().round_lengths())
+
+
+def _contains(outer: Window, inner: Window) -> bool:
+    return (outer.col_off <= inner.col_off and outer.row_off <= inner.row_off
+            and inner.col_off + inner.width <= outer.col_off + outer.width
+            and inner.row_off + inner.height <= outer.row_off + outer.height)
+
+
+def _parse_grid(spec: str) -> Tuple[Tuple[int, int], int]:
+    size, _, overlap = spec.partition(":")
+    return (int(size), int(size)), int(overlap or 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=8192)
+    parser.add_argument("--grid", action="append", dest="grids")
+    parser.add_argument("--aoi-size",
+                        type=int,
+                        action="append",
+                        dest="aoi_sizes")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Print JSON")
+    args = parser.parse_args()
+
+    results = benchmark_grids(args.size, args.grids or DEFAULT_GRIDS,
+                              args.aoi_sizes or DEFAULT_AOI_SIZES,
+                              args.queries)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'grid':<12}{'aoi':>6}{'requests':>10}{'KB':>10}"
+          f"{'amplif.':>9}{'stored MB':>11}")
+    for result in results:
+        print(f"{result['grid']:<12}{result['aoi_size']:>6}"
+              f"{result['requests']:>10.1f}{result['bytes'] / 1e3:>10.1f}"
+              f"{result['amplification']:>9.2f}"
+              f"{result['stored_bytes'] / 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""asv benchmarks of the hot paths of COG and STAC item creation.
+
+Tracks the time and peak memory of `cog.create_cog`,
+`cog.create_retiled_cogs`, `stac.create_item` and `stac.create_items` over
+commits, on synthetic NLCD-like rasters (see `benchmarks.synthetic`) written
+once per run::
+
+    asv run
+    asv continuous main HEAD
+
+See `asv.conf.json` for the environment the benchmarks run in.
+"""
+import glob
+import os
+from tempfile import TemporaryDirectory
+from typing import Dict
+
+from benchmarks.synthetic import write_landcover_raster
+from stactools.usgs_nlcd import cog, stac
+
+# Width and height of the source rasters, in pixels. The NLCD CONUS rasters
+# are about 160000 by 100000 pixels.
+SIZES = [4096, 16384]
+# Width and height of the tiles, in pixels. Rasters of more than 9 tiles a
+# side get the two digit tile names the items expect.
+TILE_SIZE = 1024
+# A fifth of the width of the rasters is no data, like outside CONUS.
+NODATA_EDGE = 0.2
+
+
+def _write_sources() -> Dict[int, str]:
+    # Written to the working directory of `setup_cache`, kept for the run.
+    sources = {}
+    for size in SIZES:
+        directory = os.path.abspath(f"source_{size}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "nlcd_2019_land_cover_l48_20210604.tif")
+        sources[size] = write_landcover_raster(path,
+                                               size,
+                                               size,
+                                               nodata_edge=NODATA_EDGE)
+    return sources
+
+
+class CreateCog:
+    """Converts a whole source raster to a COG."""
+    params = SIZES
+    param_names = ["size"]
+    timeout = 600
+
+    def setup_cache(self) -> Dict[int, str]:
+        return _write_sources()
+
+    def setup(self, sources: Dict[int, str], size: int) -> None:
+        self.tmp_dir = TemporaryDirectory()
+
+    def teardown(self, sources: Dict[int, str], size: int) -> None:
+        self.tmp_dir.cleanup()
+
+    def time_create_cog(self, sources: Dict[int, str], size: int) -> None:
+        output = os.path.join(self.tmp_dir.name, "cog.tif")
+        cog.create_cog(sources[size], output)
+
+    def peakmem_create_cog(self, sources: Dict[int, str], size: int) -> None:
+        output = os.path.join(self.tmp_dir.name, "cog.tif")
+        cog.create_cog(sources[size], output)
+
+
+class CreateRetiledCogs:
+    """Tiles a source raster into COGs, on one process."""
+    params = SIZES
+    param_names = ["size"]
+    timeout = 900
+
+    def setup_cache(self) -> Dict[int, str]:
+        return _write_sources()
+
+    def setup(self, sources: Dict[int, str], size: int) -> None:
+        self.tmp_dir = TemporaryDirectory()
+
+    def teardown(self, sources: Dict[int, str], size: int) -> None:
+        self.tmp_dir.cleanup()
+
+    def _retile(self, source: str) -> None:
+        cog.create_retiled_cogs(source,
+                                self.tmp_dir.name,
+                                tile_size=(TILE_SIZE, TILE_SIZE),
+                                resume=False)
+
+    def time_create_retiled_cogs(self, sources: Dict[int, str],
+                                 size: int) -> None:
+        self._retile(sources[size])
+
+    def peakmem_create_retiled_cogs(self, sources: Dict[int, str],
+                                    size: int) -> None:
+        self._retile(sources[size])
+
+
+class CreateItems:
+    """Creates STAC items for the tile COGs of the largest source raster."""
+    timeout = 900
+
+    def setup_cache(self) -> str:
+        directory = os.path.abspath("tiles")
+        os.makedirs(directory, exist_ok=True)
+        source = _write_sources()[max(SIZES)]
+        cog.create_retiled_cogs(source,
+                                directory,
+                                tile_size=(TILE_SIZE, TILE_SIZE),
+                                resume=False)
+        return directory
+
+    def setup(self, directory: str) -> None:
+        self.hrefs = sorted(glob.glob(os.path.join(directory, "*.tif")))
+
+    def time_create_item(self, directory: str) -> None:
+        stac.create_item(self.hrefs[0])
+
+    def time_create_items(self, directory: str) -> None:
+        for _ in stac.create_items(self.hrefs):
+            pass
+
+    def time_create_items_with_footprint(self, directory: str) -> None:
+        for _ in stac.create_items(self.hrefs, footprint=True):
+            pass
+
+    def time_create_items_with_class_histogram(self, directory: str) -> None:
+        for _ in stac.create_items(self.hrefs, class_histogram=True):
+            pass
+
+    def peakmem_create_items_with_class_histogram(self,
+                                                  directory: str) -> None:
+        for _ in stac.create_items(self.hrefs, class_histogram=True):
+            pass
@@ -0,0 +1,107 @@
+"""Compare the COG encoding profiles of `cog.COG_PROFILES`.
+
+Encodes a synthetic land cover raster with every profile and reports the time
+to encode it, the time to decode it at full resolution and the size of the
+resulting file::
+
+    python -m benchmarks.profiles --size 4096 --repeat 3
+"""
+import argparse
+import json
+import os
+import time
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import rasterio
+from rasterio.io import MemoryFile
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from benchmarks.synthetic import landcover_array
+from stactools.usgs_nlcd import cog
+from stactools.usgs_nlcd.constants import NLCD_EPSG, NO_DATA
+
+
+def benchmark_profiles(size: int = 4096,
+                       repeat: int = 3,
+                       profiles: Optional[Sequence[str]] = None,
+                       seed: int = 0) -> List[Dict[str, Any]]:
+    """Time encoding and decoding of a `size` x `size` raster per profile.
+
+    Times are the best of `repeat` runs, in seconds.
+    """
+    data = landcover_array(size, size, seed=seed)[None]
+    results = []
+    with MemoryFile() as memfile, TemporaryDirectory() as tmp_dir:
+        with memfile.open(driver="GTiff",
+                          width=size,
+                          height=size,
+                          count=1,
+                          dtype=data.dtype,
+                          crs=f"EPSG:{NLCD_EPSG}",
+                          transform=from_origin(-2000000, 3000000, 30, 30),
+                          nodata=NO_DATA) as source:
+            source.write(data)
+        with memfile.open() as source:
+            window = Window(0, 0, size, size)
+            for profile in profiles or cog.COG_PROFILES:
+                path = os.path.join(tmp_dir, f"{profile}.tif")
+                result: Dict[str, Any] = {"profile": profile}
+                try:
+                    result["encode_seconds"] = _best_of(
+                        repeat, lambda: cog.write_window_cog(
+                            source, window, data, path,
+                            cog.cog_creation_options(profile)))
+                except rasterio.errors.RasterioError as e:
+                    result["error"] = str(e)
+                    results.append(result)
+                    continue
+                result["decode_seconds"] = _best_of(repeat,
+                                                    lambda: _decode(path))
+                result["bytes"] = os.path.getsize(path)
+                result["compression_ratio"] = data.nbytes / result["bytes"]
+                results.append(result)
+    return results
+
+
+def _decode(path: str) -> None:
+    with rasterio.open(path) as dataset:
+        dataset.read()
+
+
+def _best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--profile", action="append", dest="profiles")
+    parser.add_argument("--json", action="store_true", help="Print JSON")
+    args = parser.parse_args()
+
+    results = benchmark_profiles(args.size, args.repeat, args.profiles)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'profile':<12}{'encode s':>10}{'decode s':>10}"
+          f"{'MB':>10}{'ratio':>8}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['profile']:<12} failed: {result['error']}")
+            continue
+        print(f"{result['profile']:<12}{result['encode_seconds']:>10.3f}"
+              f"{result['decode_seconds']:>10.3f}"
+              f"{result['bytes'] / 1e6:>10.2f}"
+              f"{result['compression_ratio']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
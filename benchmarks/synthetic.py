@@ -0,0 +1,130 @@
+"""Synthetic NLCD-like land cover rasters for benchmarks."""
+import math
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import rasterio
+import rasterio.windows
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from stactools.usgs_nlcd.constants import (
+    COG_BLOCKSIZE,
+    NLCD_EPSG,
+    NLCD_GRID_ORIGIN,
+    NO_DATA,
+    SPATIAL_RES,
+)
+
+# Approximate share of each class across CONUS.
+CLASS_WEIGHTS = {
+    11: 0.053,
+    12: 0.001,
+    21: 0.032,
+    22: 0.018,
+    23: 0.008,
+    24: 0.003,
+    31: 0.010,
+    41: 0.095,
+    42: 0.120,
+    43: 0.020,
+    52: 0.215,
+    71: 0.150,
+    81: 0.070,
+    82: 0.160,
+    90: 0.055,
+    95: 0.014,
+}
+
+
+def landcover_array(width: int,
+                    height: int,
+                    seed: int = 0,
+                    patch_size: int = 16,
+                    noise: float = 0.05,
+                    classes: Optional[Sequence[int]] = None) -> np.ndarray:
+    """A uint8 array of land cover classes with NLCD-like structure.
+
+    Classes come in square patches of `patch_size` pixels, drawn with CONUS
+    class frequencies, and a fraction `noise` of the pixels is replaced by
+    random classes, so that the data compresses roughly like real NLCD.
+    """
+    rng = np.random.default_rng(seed)
+    if classes is None:
+        values = np.array(list(CLASS_WEIGHTS), dtype=np.uint8)
+        weights = np.array(list(CLASS_WEIGHTS.values()))
+    else:
+        values = np.array(classes, dtype=np.uint8)
+        weights = np.ones(len(values))
+    weights = weights / weights.sum()
+
+    patches = rng.choice(values,
+                         size=(-(-height // patch_size),
+                               -(-width // patch_size)),
+                         p=weights)
+    data = np.repeat(np.repeat(patches, patch_size, axis=0),
+                     patch_size,
+                     axis=1)[:height, :width]
+    noisy = rng.random((height, width)) < noise
+    data[noisy] = rng.choice(values, size=int(noisy.sum()), p=weights)
+    return data
+
+
+def write_landcover_raster(path: str,
+                           width: int,
+                           height: int,
+                           seed: int = 0,
+                           nodata_edge: float = 0.0,
+                           nodata_windows: Sequence[Window] = (),
+                           patch_size: int = 16,
+                           noise: float = 0.05,
+                           origin: Tuple[float, float] = NLCD_GRID_ORIGIN,
+                           blocksize: int = COG_BLOCKSIZE,
+                           strip_height: int = 2048) -> str:
+    """Write a GeoTIFF of NLCD-like land cover, like the NLCD source rasters.
+
+    The raster is uint8 in EPSG:6350 at 30 m, tiled, with the classes of
+    `landcover_array`. It is written in strips of about `strip_height` rows,
+    so rasters of any size can be written in bounded memory.
+
+    No data fills a fraction `nodata_edge` of the width on the west side,
+    with a wavy boundary like the edge of CONUS, and the windows
+    `nodata_windows`.
+    """
+    strip_height = max(blocksize, strip_height - strip_height % blocksize)
+    with rasterio.open(path,
+                       "w",
+                       driver="GTiff",
+                       width=width,
+                       height=height,
+                       count=1,
+                       dtype="uint8",
+                       crs=f"EPSG:{NLCD_EPSG}",
+                       transform=from_origin(origin[0], origin[1], SPATIAL_RES,
+                                             SPATIAL_RES),
+                       nodata=NO_DATA,
+                       tiled=True,
+                       blockxsize=blocksize,
+                       blockysize=blocksize,
+                       compress="deflate") as dataset:
+        for row_off in range(0, height, strip_height):
+            strip = Window(0, row_off, width,
+                           min(strip_height, height - row_off))
+            data = landcover_array(width,
+                                   strip.height,
+                                   seed=seed + row_off,
+                                   patch_size=patch_size,
+                                   noise=noise)
+            if nodata_edge > 0:
+                rows = np.arange(row_off, row_off + strip.height)
+                edge = nodata_edge * width * (
+                    1 + 0.1 * np.sin(rows / height * 6 * math.pi))
+                data[np.arange(width)[None, :] < edge[:, None]] = NO_DATA
+            for window in nodata_windows:
+                if rasterio.windows.intersect([strip, window]):
+                    overlap = strip.intersection(window)
+                    data[Window(overlap.col_off, overlap.row_off - row_off,
+                                overlap.width,
+                                overlap.height).toslices()] = NO_DATA
+            dataset.write(data, 1, window=strip)
+    return path
@@ -1,10 +1,23 @@
-import stactools.core
+import importlib
+from typing import Any
 
-from stactools.usgs_nlcd.stac import create_collection, create_item
+# Names of the package API, and the modules defining them. These modules are
+# only imported on first use of the names, so that importing the package, as
+# the stactools command line interface does for every command, stays fast.
+_LAZY_ATTRIBUTES = {
+    "create_collection": "stac",
+    "create_item": "stac",
+}
 
 __all__ = ['create_collection', 'create_item']
 
-stactools.core.use_fsspec()
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(
+            f"{__name__}.{_LAZY_ATTRIBUTES[name]}")
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def register_plugin(registry):
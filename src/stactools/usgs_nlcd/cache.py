@@ -0,0 +1,131 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import fsspec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 100000
+
+# File info fields, in order of preference, that change whenever the file
+# does. Which ones are available depends on the fsspec file system.
+_VERSION_FIELDS = ("ETag", "etag", "mtime", "LastModified", "updated")
+
+
+class MetadataCache:
+    """On-disk cache of the facts `stac.read_cog_facts` reads from COGs.
+
+    Entries are stored in a SQLite database, keyed by the COG href and
+    validated by a string identifying the version of the file (see
+    `file_version`), so a changed COG is read again. The least recently used
+    entries are evicted once there are more than `max_entries`. The cache can
+    be shared by the threads of one process.
+    """
+    def __init__(self,
+                 path: str,
+                 max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # Lookups update the last use time of entries; don't sync every one
+        # of these writes to disk.
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS facts ("
+                "href TEXT PRIMARY KEY, version TEXT NOT NULL, "
+                "facts TEXT NOT NULL, last_used REAL NOT NULL)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS facts_last_used "
+                "ON facts (last_used)")
+            self._count = self._connection.execute(
+                "SELECT COUNT(*) FROM facts").fetchone()[0]
+
+    def __enter__(self) -> "MetadataCache":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get(self, href: str, version: str) -> Optional[Dict[str, Any]]:
+        """The facts cached for `href`, if they were read from `version`."""
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT facts FROM facts WHERE href = ? AND version = ?",
+                (href, version)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE facts SET last_used = ? WHERE href = ?",
+                (time.time(), href))
+        return json.loads(row[0])
+
+    def put(self, href: str, version: str, facts: Dict[str, Any]) -> None:
+        """Cache the facts read from `version` of `href`, evicting the least
+        recently used entries if the cache is full."""
+        with self._lock, self._connection:
+            if self._connection.execute("SELECT 1 FROM facts WHERE href = ?",
+                                        (href, )).fetchone() is None:
+                self._count += 1
+            self._connection.execute(
+                "INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?)",
+                (href, version, json.dumps(facts), time.time()))
+            if self._count > self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM facts WHERE href IN (SELECT href FROM facts "
+                    "ORDER BY last_used LIMIT ?)",
+                    (self._count - self.max_entries, ))
+                self._count = self.max_entries
+
+    def invalidate(self, prefix: Optional[str] = None) -> int:
+        """Remove the entries of hrefs starting with `prefix`, or all of them.
+
+        Args:
+            prefix (str, optional): Prefix of the hrefs to invalidate.
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._lock, self._connection:
+            if prefix is None:
+                cursor = self._connection.execute("DELETE FROM facts")
+            else:
+                cursor = self._connection.execute(
+                    "DELETE FROM facts WHERE substr(href, 1, ?) = ?",
+                    (len(prefix), prefix))
+            self._count -= cursor.rowcount
+        logger.info(f"Invalidated {cursor.rowcount} cached COGs")
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def file_version(href: str) -> str:
+    """A string that changes whenever the file at `href` does.
+
+    It is made of the size of the file and its ETag or modification time,
+    from the file info of its fsspec file system: a stat for local files, a
+    HEAD request for HTTP(S) URLs.
+
+    Args:
+        href (str): Path or URL of the file.
+    Returns:
+        str: The version of the file.
+    """
+    fs, path = fsspec.core.url_to_fs(href)
+    info = fs.info(path)
+    version = [str(info.get("size"))]
+    for field in _VERSION_FIELDS:
+        if info.get(field) is not None:
+            version.append(str(info[field]))
+            break
+    return ":".join(version)
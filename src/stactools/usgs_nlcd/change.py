@@ -0,0 +1,247 @@
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import rasterio
+import rasterio.shutil
+from rasterio.windows import Window
+
+from stactools.usgs_nlcd.cog import DEFAULT_COG_PROFILE, cog_creation_options
+from stactools.usgs_nlcd.constants import COG_BLOCKSIZE, DELTA_DICT, NO_DATA
+from stactools.usgs_nlcd.histogram import ordered_classes
+from stactools.usgs_nlcd.utils import (
+    ThreadDatasets,
+    block_aligned_chunks,
+    bounded_map,
+    is_local,
+    upload,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pixels are compared in chunks of at least this many rows and columns.
+# Each chunk in flight holds two uint8 and two uint16 arrays of its size.
+CHUNK_SIZE = 2048
+
+# Value of the change raster where the class did not change, or either year
+# has no data.
+NO_CHANGE = 0
+
+
+def transition_matrix(
+    from_href: str,
+    to_href: str,
+    workers: int = 4,
+    chunk_size: int = CHUNK_SIZE,
+    change_path: Optional[str] = None,
+    profile: str = DEFAULT_COG_PROFILE,
+) -> np.ndarray:
+    """Count the pixels going from each class to each other class between two
+    NLCD rasters of the same grid.
+
+    The rasters are read in aligned chunks on a pool of threads. The classes
+    of each pair of pixels are encoded into a single integer,
+    `from * 256 + to`, so that a chunk is counted with one
+    `numpy.bincount`. At most two chunks per thread are in memory at a time,
+    so memory use depends on `workers` and `chunk_size` only.
+
+    Args:
+        from_href (str): Path to the earlier raster, as readable by rasterio.
+        to_href (str): Path to the later raster.
+        workers (int, optional): Number of threads reading and counting
+            chunks. Defaults to 4.
+        chunk_size (int, optional): Minimum height and width of the chunks.
+            Defaults to `CHUNK_SIZE`.
+        change_path (str, optional): Also write a change raster COG here,
+            local path or fsspec URL, with the value `from * 100 + to` where
+            the class changed and `NO_CHANGE` elsewhere.
+        profile (str, optional): Encoding profile of the change COG.
+    Returns:
+        np.ndarray: A 256 x 256 matrix of pixel counts, indexed by the class
+            in the earlier and in the later raster.
+    """
+    with rasterio.open(from_href) as from_dataset, rasterio.open(
+            to_href) as to_dataset:
+        _check_aligned(from_dataset, to_dataset)
+        chunks = list(
+            block_aligned_chunks(from_dataset,
+                                 Window(0, 0, from_dataset.width,
+                                        from_dataset.height),
+                                 min_size=chunk_size))
+        output_profile = {
+            "driver": "GTiff",
+            "width": from_dataset.width,
+            "height": from_dataset.height,
+            "count": 1,
+            "dtype": "uint16",
+            "crs": from_dataset.crs,
+            "transform": from_dataset.transform,
+            "nodata": NO_CHANGE,
+            "tiled": True,
+            "blockxsize": COG_BLOCKSIZE,
+            "blockysize": COG_BLOCKSIZE,
+            "compress": "zstd",
+            "zstd_level": 1,
+            "bigtiff": "if_safer",
+        }
+
+    counts = np.zeros(256 * 256, dtype=np.int64)
+    with ThreadDatasets(from_href) as from_datasets, ThreadDatasets(
+            to_href) as to_datasets, TemporaryDirectory() as tmp_dir:
+
+        def compare(window: Window) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+            from_data = from_datasets.get().read(1, window=window)
+            to_data = to_datasets.get().read(1, window=window)
+            pairs = from_data.astype(np.uint16) << 8 | to_data
+            chunk_counts = np.bincount(pairs.ravel(), minlength=256 * 256)
+            if change_path is None:
+                return chunk_counts, None
+            return chunk_counts, change_codes(from_data, to_data)
+
+        output = None
+        if change_path is not None:
+            output = rasterio.open(os.path.join(tmp_dir, "change.tif"), "w",
+                                   **output_profile)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for window, future in bounded_map(executor, compare, chunks,
+                                                  2 * workers):
+                    chunk_counts, codes = future.result()
+                    counts += chunk_counts
+                    if output is not None:
+                        output.write(codes, 1, window=window)
+        finally:
+            if output is not None:
+                output.close()
+        if change_path is not None:
+            _write_change_cog(os.path.join(tmp_dir, "change.tif"), change_path,
+                              profile, tmp_dir)
+
+    return counts.reshape(256, 256)
+
+
+def transition_matrices(
+    year_hrefs: Mapping[int, str],
+    workers: int = 4,
+    chunk_size: int = CHUNK_SIZE,
+    change_directory: Optional[str] = None,
+    profile: str = DEFAULT_COG_PROFILE,
+) -> Dict[Tuple[int, int], np.ndarray]:
+    """Transition matrices between NLCD rasters of several years.
+
+    Matrices are computed between each year and the next, and between the
+    first and last years if there are more than two.
+
+    Args:
+        year_hrefs (Mapping[int, str]): Paths to rasters of the same grid,
+            keyed by their year, one of those of `DELTA_DICT`.
+        workers (int, optional): Number of threads reading and counting
+            chunks. Defaults to 4.
+        chunk_size (int, optional): Minimum height and width of the chunks.
+            Defaults to `CHUNK_SIZE`.
+        change_directory (str, optional): Also write a change raster COG for
+            each pair of years in this directory, named by `change_file_name`.
+        profile (str, optional): Encoding profile of the change COGs.
+    Returns:
+        Dict[Tuple[int, int], np.ndarray]: The matrices, as from
+            `transition_matrix`, keyed by their pair of years.
+    """
+    years = sorted(year_hrefs)
+    unknown = [year for year in years if year not in DELTA_DICT]
+    if unknown:
+        raise ValueError(f"No NLCD land cover for years {unknown}")
+    if len(years) < 2:
+        raise ValueError("At least two years are needed")
+
+    pairs = list(zip(years[:-1], years[1:]))
+    if len(years) > 2:
+        pairs.append((years[0], years[-1]))
+    matrices = {}
+    for from_year, to_year in pairs:
+        logger.info(f"Computing transitions from {from_year} to {to_year}")
+        change_path = None
+        if change_directory is not None:
+            change_path = os.path.join(change_directory,
+                                       change_file_name(from_year, to_year))
+        matrix = transition_matrix(year_hrefs[from_year],
+                                   year_hrefs[to_year],
+                                   workers=workers,
+                                   chunk_size=chunk_size,
+                                   change_path=change_path,
+                                   profile=profile)
+        matrices[(from_year, to_year)] = matrix
+    return matrices
+
+
+def change_codes(from_data: np.ndarray, to_data: np.ndarray) -> np.ndarray:
+    """Change raster values between two arrays of classes: `from * 100 + to`
+    where the class changed, and `NO_CHANGE` where it did not or where either
+    array has no data."""
+    codes = from_data.astype(np.uint16) * 100 + to_data
+    codes[(from_data == to_data) | (from_data == NO_DATA) |
+          (to_data == NO_DATA)] = NO_CHANGE
+    return codes
+
+
+def change_file_name(from_year: int, to_year: int) -> str:
+    """File name of the change raster between two years."""
+    return f"nlcd_change_{from_year}_{to_year}.tif"
+
+
+def matrix_to_dict(matrix: np.ndarray) -> Dict[str, Dict[str, int]]:
+    """The non-zero counts of a transition matrix, as nested objects keyed by
+    the earlier then the later class value, for JSON output."""
+    values = ordered_classes(
+        int(value)
+        for value in np.flatnonzero(matrix.sum(axis=0) + matrix.sum(axis=1)))
+    result: Dict[str, Dict[str, int]] = {}
+    for from_value in values:
+        row = {
+            str(to_value): int(matrix[from_value, to_value])
+            for to_value in values if matrix[from_value, to_value]
+        }
+        if row:
+            result[str(from_value)] = row
+    return result
+
+
+def href_year(href: str) -> int:
+    """The year of an NLCD land cover file, from its name."""
+    match = re.match(r"nlcd_(\d\d\d\d)_land_cover", os.path.basename(href))
+    if match is None:
+        raise ValueError(f"Could not extract the year from {href}")
+    return int(match.group(1))
+
+
+def _check_aligned(from_dataset: Any, to_dataset: Any) -> None:
+    if (from_dataset.shape != to_dataset.shape
+            or from_dataset.transform != to_dataset.transform
+            or from_dataset.crs != to_dataset.crs):
+        raise ValueError(f"{from_dataset.name} and {to_dataset.name} are "
+                         "not on the same grid")
+    for dataset in [from_dataset, to_dataset]:
+        if dataset.dtypes[0] != "uint8":
+            raise ValueError(f"Expected a uint8 raster, {dataset.name} is "
+                             f"{dataset.dtypes[0]}")
+
+
+def _write_change_cog(input_path: str, output_path: str, profile: str,
+                      tmp_dir: str) -> None:
+    creation_options = cog_creation_options(profile)
+    if is_local(output_path):
+        rasterio.shutil.copy(input_path,
+                             output_path,
+                             driver="COG",
+                             **creation_options)
+        return
+    local_path = os.path.join(tmp_dir, os.path.basename(output_path))
+    rasterio.shutil.copy(input_path,
+                         local_path,
+                         driver="COG",
+                         **creation_options)
+    with open(local_path, "rb") as f:
+        upload(f, output_path)
@@ -1,75 +1,737 @@
 import logging
 import os
-from glob import glob
-from subprocess import CalledProcessError, check_output
-from tempfile import TemporaryDirectory
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from xml.sax.saxutils import escape, quoteattr
 
+import numpy as np
 import rasterio
+import rasterio.shutil
+from rasterio.dtypes import dtype_rev, typename_fwd
+from rasterio.enums import ColorInterp, Resampling
+from rasterio.errors import RasterBlockError
+from rasterio.io import DatasetReader, MemoryFile
+from rasterio.windows import Window
 
-from stactools.usgs_nlcd.constants import NO_DATA, TILING_PIXEL_SIZE
+from stactools.usgs_nlcd import manifest
+from stactools.usgs_nlcd.constants import (
+    COG_BLOCKSIZE,
+    COG_PROFILES,
+    DEFAULT_COG_PROFILE,
+    NO_DATA,
+    TILING_PIXEL_SIZE,
+)
+from stactools.usgs_nlcd.grid import TileGrid
+from stactools.usgs_nlcd.metrics import PipelineMetrics, TileMetrics
+from stactools.usgs_nlcd.utils import (
+    block_aligned_chunks,
+    bounded_map,
+    is_local,
+    upload,
+)
 
 logger = logging.getLogger(__name__)
 
+# GDAL COG driver creation options shared by `create_cog` and
+# `create_retiled_cogs`, so that both produce identically encoded files.
+COG_CREATION_OPTIONS: Dict[str, Any] = {
+    "num_threads": "ALL_CPUS",
+    "blocksize": COG_BLOCKSIZE,
+    "overviews": "IGNORE_EXISTING",
+    # Land cover classes are categorical, so overviews must not blend them.
+    "resampling": "nearest",
+}
+
+_TileResult = Tuple[Optional[Tuple[int, str]], TileMetrics]
+
+
+def cog_creation_options(profile: str = DEFAULT_COG_PROFILE) -> Dict[str, Any]:
+    """COG creation options for one of the `COG_PROFILES`.
+
+    Args:
+        profile (str, optional): Name of the encoding profile. Defaults to
+            `DEFAULT_COG_PROFILE`.
+    Returns:
+        Dict[str, Any]: The GDAL COG driver creation options.
+    """
+    if profile not in COG_PROFILES:
+        raise ValueError(f"Unknown COG profile {profile}, "
+                         f"expected one of {', '.join(COG_PROFILES)}")
+    return {**COG_CREATION_OPTIONS, **COG_PROFILES[profile]}
+
 
 def create_retiled_cogs(
     input_path: str,
     output_directory: str,
     raise_on_fail: bool = True,
     dry_run: bool = False,
+    tile_size: Tuple[int, int] = TILING_PIXEL_SIZE,
+    workers: int = 1,
+    resume: bool = True,
+    metrics: Optional[PipelineMetrics] = None,
+    profile: str = DEFAULT_COG_PROFILE,
+    overlap: int = 0,
+    verify_checksums: bool = False,
 ) -> str:
     """Split tiff into tiles and create COGs
+
+    Each tile is read as a window of the source and written straight to a COG,
+    so no uncompressed intermediate tiles are written to disk. Tiles are named
+    like the output of `gdal_retile.py`, e.g. `<name>_05_09.tif` for the tile
+    in the fifth row and ninth column.
+
+    The outcome of every tile is recorded in a `TileManifest` in the output
+    directory. When resuming, tiles the manifest records as complete (and
+    whose files are intact) or empty for the same source are skipped, so an
+    interrupted run only redoes missing, failed or corrupt tiles.
+
     Args:
         input_path (str): Path to the USGS NLCD data.
         output_directory (str): The directory to which the COG will be written.
+            This can be any fsspec URL. Tiles for remote destinations are
+            encoded in memory and uploaded while the next tiles are encoded.
         raise_on_fail (bool, optional): Whether to raise error on failure.
-            Defaults to True.
+            When False, failed tiles are logged and the remaining tiles are
+            still processed. Defaults to True.
         dry_run (bool, optional): Run without downloading tif, creating COG,
             and writing COG. Defaults to False.
+        tile_size (Tuple[int, int], optional): Width and height of the tiles in
+            pixels. Defaults to `TILING_PIXEL_SIZE`.
+        workers (int, optional): Number of processes creating tile COGs in
+            parallel. Tiles are always handled in row-major order. Defaults
+            to 1, which processes the tiles in the calling process.
+        resume (bool, optional): Skip tiles already done according to the
+            manifest. Defaults to True.
+        metrics (PipelineMetrics, optional): Collects the timings and sizes of
+            the run and of each tile.
+        profile (str, optional): Name of the encoding profile of the COGs, one
+            of `COG_PROFILES`. Tiles done with another profile are redone when
+            resuming. Defaults to `DEFAULT_COG_PROFILE`.
+        overlap (int, optional): Number of pixels by which each tile extends
+            into its neighbours on every side, see `TileGrid`. Defaults to 0.
+        verify_checksums (bool, optional): When resuming, also check the
+            checksums of complete tiles, reading them all, rather than only
+            their sizes. Defaults to False.
+    Returns:
+        str: The path to the output COGs.
+    """
+    _create_retiled_cogs([input_path], output_directory, raise_on_fail,
+                         dry_run, tile_size, workers, resume, metrics, profile,
+                         overlap, verify_checksums)
+    return output_directory
+
+
+def create_multi_year_retiled_cogs(
+    input_paths: Sequence[str],
+    output_directory: str,
+    raise_on_fail: bool = True,
+    dry_run: bool = False,
+    tile_size: Tuple[int, int] = TILING_PIXEL_SIZE,
+    workers: int = 1,
+    resume: bool = True,
+    metrics: Optional[PipelineMetrics] = None,
+    profile: str = DEFAULT_COG_PROFILE,
+    overlap: int = 0,
+    verify_checksums: bool = False,
+) -> str:
+    """Split the rasters of several years into tiles and create COGs, all the
+    years of a tile together
+
+    Like `create_retiled_cogs` for each of the rasters, which must share the
+    same grid, as the NLCD land cover rasters of all years do. The tiles are
+    planned once for all years, and whether a tile is empty is only checked
+    in the first raster: the data footprint of NLCD is the same every year,
+    so a tile empty in the first raster is recorded as empty for all years
+    without reading the others. All the years of a tile are then processed
+    one after the other, by the same process, while the tile is in cache.
+
+    Args:
+        input_paths (Sequence[str]): Paths to the USGS NLCD data of each
+            year.
+        output_directory (str): The directory to which the COGs of all years
+            will be written, a local path or fsspec URL.
+        raise_on_fail (bool, optional): Whether to raise error on failure.
+            When False, failed tiles are logged and the remaining tiles are
+            still processed. Defaults to True.
+        dry_run (bool, optional): Run without creating and writing COGs.
+            Defaults to False.
+        tile_size (Tuple[int, int], optional): Width and height of the tiles in
+            pixels. Defaults to `TILING_PIXEL_SIZE`.
+        workers (int, optional): Number of processes creating tile COGs in
+            parallel, each handling all the years of a tile. Defaults to 1,
+            which processes the tiles in the calling process.
+        resume (bool, optional): Skip tiles already done according to the
+            manifest. Defaults to True.
+        metrics (PipelineMetrics, optional): Collects the timings and sizes of
+            the run and of each tile.
+        profile (str, optional): Name of the encoding profile of the COGs.
+            Defaults to `DEFAULT_COG_PROFILE`.
+        overlap (int, optional): Number of pixels by which each tile extends
+            into its neighbours on every side. Defaults to 0.
+        verify_checksums (bool, optional): When resuming, also check the
+            checksums of complete tiles rather than only their sizes.
+            Defaults to False.
     Returns:
         str: The path to the output COGs.
     """
-    output = None
+    if not input_paths:
+        raise ValueError("No input rasters")
+    _create_retiled_cogs(list(input_paths), output_directory, raise_on_fail,
+                         dry_run, tile_size, workers, resume, metrics, profile,
+                         overlap, verify_checksums)
+    return output_directory
+
+
+def _create_retiled_cogs(
+    input_paths: List[str],
+    output_directory: str,
+    raise_on_fail: bool,
+    dry_run: bool,
+    tile_size: Tuple[int, int],
+    workers: int,
+    resume: bool,
+    metrics: Optional[PipelineMetrics],
+    profile: str,
+    overlap: int,
+    verify_checksums: bool,
+) -> None:
+    if metrics is None:
+        metrics = PipelineMetrics()
+    creation_options = cog_creation_options(profile)
     try:
         if dry_run:
             logger.info(
                 "Would have split TIF into tiles, created COGs, and written COGs"
             )
         else:
-            with TemporaryDirectory() as tmp_dir:
-                cmd = [
-                    "gdal_retile.py",
-                    "-ps",
-                    str(TILING_PIXEL_SIZE[0]),
-                    str(TILING_PIXEL_SIZE[1]),
-                    "-targetDir",
-                    tmp_dir,
-                    input_path,
+            sources = [
+                manifest.source_fingerprint(input_path)
+                for input_path in input_paths
+            ]
+            with ExitStack() as stack:
+                # Closed last, saving the outcomes of all the tiles processed,
+                # even if processing is interrupted.
+                tile_manifest = stack.enter_context(
+                    manifest.TileManifest.in_directory(output_directory))
+                datasets = [
+                    stack.enter_context(rasterio.open(input_path, "r"))
+                    for input_path in input_paths
                 ]
-                try:
-                    output = check_output(cmd)
-                except CalledProcessError as e:
-                    output = e.output
-                    raise
-                finally:
-                    logger.info(f"output: {str(output)}")
-                file_names = glob(f"{tmp_dir}/*.tif")
-                for f in file_names:
-                    input_file = os.path.join(tmp_dir, f)
-                    output_file = os.path.join(output_directory,
-                                               os.path.basename(f))
-                    with rasterio.open(input_file, "r") as dataset:
-                        contains_data = dataset.read().any()
-                    if contains_data:
-                        create_cog(input_file, output_file, raise_on_fail,
-                                   dry_run)
+                with metrics.stage("plan"):
+                    tiles = _plan_multi_year_tiles(datasets, input_paths,
+                                                   output_directory, tile_size,
+                                                   overlap, tile_manifest,
+                                                   sources, profile, resume,
+                                                   verify_checksums)
+                outcomes: Iterator[Tuple[Window, int, str, Any]]
+                if workers <= 1:
+                    outcomes = _process_tiles_serially(datasets, tiles,
+                                                       creation_options)
+                else:
+                    # Every worker compresses a tile of its own, so share the
+                    # CPUs between them rather than have each of them use all
+                    # of them.
+                    creation_options["num_threads"] = max(
+                        1, (os.cpu_count() or 1) // workers)
+                    outcomes = _process_tiles_in_workers(
+                        input_paths, tiles, creation_options, workers)
+                for window, index, output_file, outcome in outcomes:
+                    if isinstance(outcome, Exception):
+                        _record_failure(tile_manifest, output_file, window,
+                                        sources[index], profile)
+                        if raise_on_fail:
+                            raise outcome
+                    else:
+                        result, tile_metrics = outcome
+                        _record_result(tile_manifest, output_file, window,
+                                       sources[index], profile, result)
+                        metrics.add_tile(tile_metrics)
 
     except Exception:
-        logger.error("Failed to process {}".format(input_path))
+        logger.error("Failed to process {}".format(", ".join(input_paths)))
 
         if raise_on_fail:
             raise
 
-    return output_directory
+
+# A tile to create for some of the years: its window, and the index of the
+# input and the output path of each of these years.
+_PlannedTile = Tuple[Window, List[Tuple[int, str]]]
+
+
+def _plan_multi_year_tiles(
+    datasets: List[DatasetReader],
+    input_paths: List[str],
+    output_directory: str,
+    tile_size: Tuple[int, int],
+    overlap: int,
+    tile_manifest: manifest.TileManifest,
+    sources: List[str],
+    profile: str,
+    resume: bool,
+    verify_checksums: bool,
+) -> List[_PlannedTile]:
+    for input_path, dataset in zip(input_paths[1:], datasets[1:]):
+        if (dataset.shape != datasets[0].shape
+                or dataset.transform != datasets[0].transform):
+            raise ValueError(f"{input_path} is not on the grid of "
+                             f"{input_paths[0]}")
+    tiles = []
+    plans = [
+        plan_tiles(dataset,
+                   input_path,
+                   output_directory,
+                   tile_size,
+                   skip_empty=False,
+                   overlap=overlap)
+        for input_path, dataset in zip(input_paths, datasets)
+    ]
+    for tile in zip(*plans):
+        window = tile[0][0]
+        pending = [(index, output_file)
+                   for index, (_, output_file) in enumerate(tile)
+                   if not (resume and tile_manifest.is_done(
+                       output_file,
+                       window,
+                       sources[index],
+                       profile,
+                       verify_checksums=verify_checksums))]
+        if pending:
+            tiles.append((window, pending))
+    return tiles
+
+
+def _process_tiles_serially(
+    datasets: List[DatasetReader],
+    tiles: List[_PlannedTile],
+    creation_options: Dict[str, Any],
+) -> Iterator[Tuple[Window, int, str, Any]]:
+    # Tiles are encoded in this process, one after the other, while the
+    # previous tile is being stored on a thread.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for (window, index, output_file, _, _), future in bounded_map(
+                executor, _store_tile,
+                _encode_tiles(datasets, tiles, creation_options), 2):
+            try:
+                outcome: Any = future.result()
+            except Exception as e:
+                outcome = e
+            yield window, index, output_file, outcome
+
+
+def _process_tiles_in_workers(
+    input_paths: List[str],
+    tiles: List[_PlannedTile],
+    creation_options: Dict[str, Any],
+    workers: int,
+) -> Iterator[Tuple[Window, int, str, Any]]:
+    tasks = [(window, [(index, output_file, input_paths[index])
+                       for index, output_file in outputs], input_paths[0],
+              creation_options) for window, outputs in tiles]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = bounded_map(executor, _create_tile_task, tasks, 2 * workers)
+        for (window, outputs, _, _), future in results:
+            try:
+                outcomes = future.result()
+            except Exception as e:
+                outcomes = [e] * len(outputs)
+            for (index, output_file, _), outcome in zip(outputs, outcomes):
+                yield window, index, output_file, outcome
+
+
+def plan_tiles(
+    dataset: DatasetReader,
+    input_path: str,
+    output_directory: str,
+    tile_size: Tuple[int, int] = TILING_PIXEL_SIZE,
+    skip_empty: bool = True,
+    overlap: int = 0,
+) -> Iterator[Tuple[Window, str]]:
+    """Plan the tile COGs to create from a dataset.
+
+    Args:
+        dataset (DatasetReader): The opened source dataset.
+        input_path (str): Path to the source dataset, used to name the tiles.
+        output_directory (str): The directory to which the COGs will be written.
+        tile_size (Tuple[int, int], optional): Width and height of the tiles in
+            pixels. Defaults to `TILING_PIXEL_SIZE`.
+        skip_empty (bool, optional): Leave out tiles without any data, using
+            `window_has_data`. Defaults to True.
+        overlap (int, optional): Number of pixels by which each tile extends
+            into its neighbours on every side. Defaults to 0.
+        verify_checksums (bool, optional): When resuming, also check the
+            checksums of complete tiles rather than only their sizes.
+            Defaults to False.
+    Returns:
+        Iterator[Tuple[Window, str]]: The window and output path of each tile.
+    """
+    grid = TileGrid.from_dataset(dataset, tile_size, overlap)
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    for row, col in grid.tiles():
+        window = grid.window(row, col)
+        output_path = os.path.join(output_directory,
+                                   f"{name}_{grid.tile_name(row, col)}.tif")
+        if skip_empty and not window_has_data(dataset, window):
+            logger.info(f"Skipping empty tile {output_path}")
+            continue
+        yield window, output_path
+
+
+def window_has_data(dataset: DatasetReader, window: Window) -> bool:
+    """Check whether a window of a dataset contains any data.
+
+    If the dataset has overviews, the coarsest one is checked first: any data
+    found there proves that the window is not empty. Otherwise the window is
+    scanned, stopping at the first part containing data. The blocks of sparse
+    GeoTIFFs that were never written, as GDAL does for blocks of no data with
+    `SPARSE_OK`, are known to be empty without being read, so an empty window
+    of such a file costs no decoding. Other files are read in chunks aligned
+    to their internal blocks, so an empty window is decoded in full. At most
+    one chunk is held in memory at a time.
+
+    Args:
+        dataset (DatasetReader): The dataset to check.
+        window (Window): The window to check.
+    Returns:
+        bool: Whether any pixel in the window is not `NO_DATA`.
+    """
+    overviews = dataset.overviews(1)
+    if overviews:
+        factor = overviews[-1]
+        height = max(1, int(window.height) // factor)
+        width = max(1, int(window.width) // factor)
+        out_shape = (dataset.count, height, width)
+        if dataset.read(window=window, out_shape=out_shape).any():
+            return True
+
+    stored = _stored_blocks(dataset, window)
+    chunks = block_aligned_chunks(dataset,
+                                  window) if stored is None else stored
+    for chunk in chunks:
+        if dataset.read(window=chunk).any():
+            return True
+    return False
+
+
+def _stored_blocks(dataset: DatasetReader,
+                   window: Window) -> Optional[List[Window]]:
+    # The parts of the window in the blocks stored in a GeoTIFF, or None if
+    # which blocks are stored is not known.
+    if dataset.driver != "GTiff":
+        return None
+    block_height, block_width = dataset.block_shapes[0]
+    window = window.round_offsets().round_lengths()
+    first_row = int(window.row_off) // block_height
+    last_row = (int(window.row_off + window.height) - 1) // block_height
+    first_col = int(window.col_off) // block_width
+    last_col = (int(window.col_off + window.width) - 1) // block_width
+    blocks = []
+    for row in range(first_row, last_row + 1):
+        for col in range(first_col, last_col + 1):
+            if any(
+                    _block_is_stored(dataset, band, row, col)
+                    for band in dataset.indexes):
+                block = Window(col * block_width, row * block_height,
+                               block_width, block_height)
+                blocks.append(block.intersection(window))
+    return blocks
+
+
+def _block_is_stored(dataset: DatasetReader, band: int, row: int,
+                     col: int) -> bool:
+    try:
+        return dataset.block_size(band, row, col) > 0
+    except RasterBlockError:
+        # Sparse blocks have no size.
+        return False
+
+
+def _encode_tiles(
+    datasets: List[DatasetReader],
+    tiles: Iterable[_PlannedTile],
+    creation_options: Dict[str, Any],
+) -> Iterator[Tuple[Window, int, str, Any, TileMetrics]]:
+    for window, outputs in tiles:
+        empty = None
+        for index, output_path in outputs:
+            tile_metrics = TileMetrics(output_path)
+            encoded: Any
+            try:
+                if empty is None:
+                    with tile_metrics.stage("emptiness_check"):
+                        empty = not window_has_data(datasets[0], window)
+                if empty:
+                    logger.info(f"Skipping empty tile {output_path}")
+                    encoded = None
+                else:
+                    encoded = _encode_tile(datasets[index], window,
+                                           output_path, creation_options,
+                                           tile_metrics)
+            except Exception as e:
+                # Raised again by `_store_tile`, so that it fails with the
+                # tile.
+                encoded = e
+            yield window, index, output_path, encoded, tile_metrics
+
+
+def _encode_tile(
+    dataset: DatasetReader,
+    window: Window,
+    output_path: str,
+    creation_options: Dict[str, Any],
+    tile_metrics: TileMetrics,
+) -> Union[str, MemoryFile]:
+    with tile_metrics.stage("retile"):
+        data = dataset.read(window=window)
+    tile_metrics.input_bytes = data.nbytes
+    if is_local(output_path):
+        return _write_cog(dataset, window, data, output_path, creation_options,
+                          tile_metrics)
+    # Remote tiles are encoded in memory and uploaded from there.
+    memfile = MemoryFile()
+    try:
+        return _write_cog(dataset, window, data, memfile, creation_options,
+                          tile_metrics)
+    except Exception:
+        memfile.close()
+        raise
+
+
+def _store_tile(
+        task: Tuple[Window, int, str, Any, TileMetrics]) -> _TileResult:
+    _, _, output_path, encoded, tile_metrics = task
+    if isinstance(encoded, Exception):
+        raise encoded
+    if encoded is None:
+        return None, tile_metrics
+    if isinstance(encoded, MemoryFile):
+        try:
+            with tile_metrics.stage("upload"):
+                buffer = encoded.getbuffer()
+                upload(buffer, output_path)
+            record = manifest.buffer_record(buffer)
+        finally:
+            encoded.close()
+    else:
+        record = manifest.file_record(output_path)
+    tile_metrics.output_bytes = record[0]
+    return record, tile_metrics
+
+
+def _create_tile_task(
+    task: Tuple[Window, List[Tuple[int, str, str]], str, Dict[str, Any]]
+) -> List[Union[_TileResult, Exception]]:
+    window, outputs, footprint_path, creation_options = task
+    with ExitStack() as stack:
+        datasets = [
+            stack.enter_context(rasterio.open(path, "r"))
+            for path in [footprint_path] +
+            [input_path for _, _, input_path in outputs]
+        ]
+        # The outputs, with the position of their input in `datasets`.
+        tile = (window, [(position, output_path)
+                         for position, (_, output_path,
+                                        _) in enumerate(outputs, start=1)])
+        results: List[Union[_TileResult, Exception]] = []
+        for encoded in _encode_tiles(datasets, [tile], creation_options):
+            try:
+                results.append(_store_tile(encoded))
+            except Exception as e:
+                results.append(e)
+    return results
+
+
+def _record_result(
+    tile_manifest: manifest.TileManifest,
+    output_path: str,
+    window: Window,
+    source: str,
+    profile: str,
+    result: Optional[Tuple[int, str]],
+) -> None:
+    if result is None:
+        tile_manifest.record(output_path, window, source, profile,
+                             manifest.EMPTY)
+    else:
+        size, checksum = result
+        tile_manifest.record(output_path, window, source, profile,
+                             manifest.COMPLETE, size, checksum)
+
+
+def _record_failure(
+    tile_manifest: manifest.TileManifest,
+    output_path: str,
+    window: Window,
+    source: str,
+    profile: str,
+) -> None:
+    logger.error("Failed to create {}".format(output_path))
+    tile_manifest.record(output_path, window, source, profile, manifest.FAILED)
+
+
+def tile_windows(
+    width: int,
+    height: int,
+    tile_size: Tuple[int, int] = TILING_PIXEL_SIZE,
+) -> Iterator[Tuple[int, int, Window]]:
+    """Iterate over the tiling grid of a raster, row by row.
+
+    Edge tiles are clipped to the raster, as `gdal_retile.py` does.
+
+    Args:
+        width (int): Width of the raster in pixels.
+        height (int): Height of the raster in pixels.
+        tile_size (Tuple[int, int], optional): Width and height of the tiles in
+            pixels. Defaults to `TILING_PIXEL_SIZE`.
+    Returns:
+        Iterator[Tuple[int, int, Window]]: One-based tile row and column, and
+            the pixel window of the tile.
+    """
+    grid = TileGrid(width, height, tile_size)
+    for row, col in grid.tiles():
+        yield row, col, grid.window(row, col)
+
+
+def tile_file_name(
+    input_path: str,
+    row: int,
+    col: int,
+    width: int,
+    height: int,
+    tile_size: Tuple[int, int] = TILING_PIXEL_SIZE,
+) -> str:
+    """Name of a tile file, following the `gdal_retile.py` convention.
+
+    Args:
+        input_path (str): Path to the raster being tiled.
+        row (int): One-based tile row.
+        col (int): One-based tile column.
+        width (int): Width of the raster in pixels.
+        height (int): Height of the raster in pixels.
+        tile_size (Tuple[int, int], optional): Width and height of the tiles in
+            pixels. Defaults to `TILING_PIXEL_SIZE`.
+    Returns:
+        str: The file name of the tile.
+    """
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    suffix = TileGrid(width, height, tile_size).tile_name(row, col)
+    return f"{name}_{suffix}.tif"
+
+
+def write_window_cog(
+    dataset: DatasetReader,
+    window: Window,
+    data: np.ndarray,
+    output_path: str,
+    creation_options: Optional[Dict[str, Any]] = None,
+    tile_metrics: Optional[TileMetrics] = None,
+) -> str:
+    """Write pixels read from a window of a dataset as a COG.
+
+    Overviews are built explicitly, with nearest resampling, before the COG
+    is encoded, so that the two stages can be timed separately.
+
+    Args:
+        dataset (DatasetReader): The dataset the window was read from.
+        window (Window): The window of the dataset covered by `data`.
+        data (np.ndarray): The pixels of the window, as returned by
+            `dataset.read(window=window)`.
+        output_path (str): The path to which the COG will be written. This can
+            be any fsspec URL; COGs for remote destinations are encoded in
+            memory and streamed to the destination, without local files.
+        creation_options (Dict[str, Any], optional): COG creation options.
+            Defaults to those of `DEFAULT_COG_PROFILE`.
+        tile_metrics (TileMetrics, optional): Collects the time spent
+            building overviews, encoding and uploading the COG.
+    Returns:
+        str: The path to the output COG.
+    """
+    if creation_options is None:
+        creation_options = cog_creation_options()
+    if tile_metrics is None:
+        tile_metrics = TileMetrics(output_path)
+    if is_local(output_path):
+        _write_cog(dataset, window, data, output_path, creation_options,
+                   tile_metrics)
+    else:
+        with MemoryFile() as memfile:
+            _write_cog(dataset, window, data, memfile, creation_options,
+                       tile_metrics)
+            with tile_metrics.stage("upload"):
+                upload(memfile.getbuffer(), output_path)
+
+    return output_path
+
+
+def _write_cog(
+    dataset: DatasetReader,
+    window: Window,
+    data: np.ndarray,
+    destination: Union[str, MemoryFile],
+    creation_options: Dict[str, Any],
+    tile_metrics: TileMetrics,
+) -> Union[str, MemoryFile]:
+    profile = {
+        "driver": "COG",
+        "width": data.shape[2],
+        "height": data.shape[1],
+        "count": data.shape[0],
+        "dtype": data.dtype,
+        "crs": dataset.crs,
+        "transform": dataset.window_transform(window),
+        "nodata": NO_DATA,
+        **creation_options,
+        "overviews": "FORCE_USE_EXISTING",
+    }
+    if isinstance(destination, MemoryFile):
+        output = destination.open(**profile)
+    else:
+        output = rasterio.open(destination, "w", **profile)
+    try:
+        output.write(data)
+        if ColorInterp.palette in dataset.colorinterp:
+            # Keep the NLCD color table, which GDAL only writes for
+            # paletted bands.
+            output.colorinterp = dataset.colorinterp
+            for band in dataset.indexes:
+                if dataset.colorinterp[band - 1] == ColorInterp.palette:
+                    output.write_colormap(band, dataset.colormap(band))
+        factors = overview_factors(output.width, output.height,
+                                   profile["blocksize"])
+        if factors:
+            with tile_metrics.stage("overviews"):
+                output.build_overviews(factors, Resampling.nearest)
+    finally:
+        # The COG is encoded and written when the dataset is closed.
+        with tile_metrics.stage("translate"):
+            output.close()
+
+    return destination
+
+
+def overview_factors(width: int, height: int, blocksize: int) -> List[int]:
+    """Overview decimation factors, as chosen by GDAL's COG driver.
+
+    Overviews are added until the largest dimension of the smallest one fits
+    in a single block.
+    """
+    factors = []
+    factor = 1
+    while max(width, height) / factor > blocksize:
+        factor *= 2
+        factors.append(factor)
+    return factors
 
 
 def create_cog(
@@ -77,53 +739,61 @@ def create_cog(
     output_path: str,
     raise_on_fail: bool = True,
     dry_run: bool = False,
+    metrics: Optional[PipelineMetrics] = None,
+    profile: str = DEFAULT_COG_PROFILE,
 ) -> str:
     """Create COG from a tif
     Args:
         input_path (str): Path to the Natural Resources Canada Land Cover data.
-        output_path (str): The path to which the COG will be written.
+        output_path (str): The path to which the COG will be written. This can
+            be any fsspec URL.
         raise_on_fail (bool, optional): Whether to raise error on failure.
             Defaults to True.
         dry_run (bool, optional): Run without downloading tif, creating COG,
             and writing COG. Defaults to False.
+        metrics (PipelineMetrics, optional): Collects the timing and sizes of
+            the conversion.
+        profile (str, optional): Name of the encoding profile of the COG, one
+            of `COG_PROFILES`. Defaults to `DEFAULT_COG_PROFILE`.
     Returns:
         str: The path to the output COG.
     """
 
-    output = None
     try:
         if dry_run:
             logger.info("Would have read TIF, created COG, and written COG")
         else:
-            cmd = [
-                "gdal_translate",
-                "-of",
-                "COG",
-                "-co",
-                "NUM_THREADS=ALL_CPUS",
-                "-co",
-                "BLOCKSIZE=512",
-                "-co",
-                "compress=deflate",
-                "-co",
-                "LEVEL=9",
-                "-co",
-                "predictor=yes",
-                "-co",
-                "OVERVIEWS=IGNORE_EXISTING",
-                "-a_nodata",
-                str(NO_DATA),
-                input_path,
-                output_path,
-            ]
+            tile_metrics = TileMetrics(output_path)
+            with rasterio.open(input_path) as dataset:
+                source = _nodata_vrt(dataset, input_path)
+                input_bytes = dataset.width * dataset.height * sum(
+                    np.dtype(dtype).itemsize for dtype in dataset.dtypes)
+            creation_options = cog_creation_options(profile)
+            if is_local(output_path):
+                with tile_metrics.stage("translate"):
+                    rasterio.shutil.copy(source,
+                                         output_path,
+                                         driver="COG",
+                                         **creation_options)
+                output_bytes = os.path.getsize(output_path)
+            else:
+                # Encoded in memory and streamed to the destination, without
+                # local files.
+                with MemoryFile() as memfile:
+                    with tile_metrics.stage("translate"):
+                        rasterio.shutil.copy(source,
+                                             memfile.name,
+                                             driver="COG",
+                                             **creation_options)
+                    buffer = memfile.getbuffer()
+                    output_bytes = len(buffer)
+                    with tile_metrics.stage("upload"):
+                        upload(buffer, output_path)
 
-            try:
-                output = check_output(cmd)
-            except CalledProcessError as e:
-                output = e.output
-                raise
-            finally:
-                logger.info(f"output: {str(output)}")
+            if metrics is not None:
+                tile_metrics.input_bytes = input_bytes
+                tile_metrics.output_bytes = output_bytes
+                metrics.add_tile(tile_metrics)
 
     except Exception:
         logger.error("Failed to process {}".format(output_path))
@@ -132,3 +802,49 @@ def create_cog(
             raise
 
     return output_path
+
+
+def _nodata_vrt(dataset: DatasetReader, path: str) -> str:
+    # A VRT of the dataset with `NO_DATA` as its no data value, which the
+    # source rasters do not declare. The metadata, color interpretation and
+    # color table of the source are carried over, so the COG keeps the NLCD
+    # palette.
+    bands = "".join(
+        f'<VRTRasterBand dataType="{typename_fwd[dtype_rev[dtype]]}" '
+        f'band="{band}">{_vrt_metadata(dataset.tags(band))}'
+        f"<Description>{escape(description or '')}</Description>"
+        f"<NoDataValue>{NO_DATA}</NoDataValue>"
+        f"<ColorInterp>{colorinterp.name.capitalize()}</ColorInterp>"
+        f"{_vrt_color_table(dataset, band, colorinterp)}"
+        f'<SimpleSource><SourceFilename relativeToVRT="0">{escape(path)}'
+        f'</SourceFilename><SourceBand>{band}</SourceBand></SimpleSource>'
+        '</VRTRasterBand>' for band, dtype, description, colorinterp in zip(
+            dataset.indexes, dataset.dtypes, dataset.descriptions,
+            dataset.colorinterp))
+    srs = f"<SRS>{escape(dataset.crs.to_wkt())}</SRS>" if dataset.crs else ""
+    geo_transform = ", ".join(
+        str(value) for value in dataset.transform.to_gdal())
+    return (f'<VRTDataset rasterXSize="{dataset.width}" '
+            f'rasterYSize="{dataset.height}">{srs}'
+            f"<GeoTransform>{geo_transform}</GeoTransform>"
+            f"{_vrt_metadata(dataset.tags())}{bands}"
+            "</VRTDataset>")
+
+
+def _vrt_metadata(tags: Dict[str, str]) -> str:
+    if not tags:
+        return ""
+    items = "".join(f'<MDI key={quoteattr(key)}>{escape(value)}</MDI>'
+                    for key, value in tags.items())
+    return f"<Metadata>{items}</Metadata>"
+
+
+def _vrt_color_table(dataset: DatasetReader, band: int,
+                     colorinterp: ColorInterp) -> str:
+    if colorinterp != ColorInterp.palette:
+        return ""
+    colormap = dataset.colormap(band)
+    entries = "".join(
+        '<Entry c1="{}" c2="{}" c3="{}" c4="{}"/>'.format(*colormap[value])
+        for value in range(max(colormap) + 1))
+    return f"<ColorTable>{entries}</ColorTable>"
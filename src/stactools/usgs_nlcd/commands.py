@@ -1,9 +1,18 @@
+import json
 import logging
 import os
+from typing import Iterable, List, Optional, Tuple, Union
 
 import click
 
-from stactools.usgs_nlcd import cog, stac
+from stactools.usgs_nlcd.constants import (
+    COG_PROFILES,
+    DEFAULT_COG_PROFILE,
+    TILING_PIXEL_SIZE,
+)
+
+# The modules doing the work, and the libraries they use, are imported by
+# the commands when they run, so that registering the commands is fast.
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +42,10 @@ def create_usgsnlcd_command(cli):
         Args:
             destination (str): An HREF for the Collection JSON
         """
+        from stactools.usgs_nlcd import stac
+        from stactools.usgs_nlcd.validation import use_cached_validator
+
+        use_cached_validator()
         collection = stac.create_collection()
 
         collection.set_self_href(destination)
@@ -55,20 +68,547 @@ def create_usgsnlcd_command(cli):
         required=True,
         help="Path to an input COG",
     )
-    def create_item_command(source: str, destination: str):
+    @click.option(
+        "--cache",
+        help=("SQLite file caching the metadata read from COGs, so unchanged "
+              "COGs are not read again."),
+    )
+    @click.option(
+        "--class-histogram",
+        is_flag=True,
+        default=False,
+        help=("Count the pixels of each class, storing the counts and "
+              "fractions on the COG asset. This reads the whole COG."),
+    )
+    @click.option(
+        "--footprint",
+        is_flag=True,
+        default=False,
+        help=("Use the footprint of the data, computed from an overview, as "
+              "the item geometry instead of the COG bounds."),
+    )
+    @click.option(
+        "--preview",
+        "preview_format",
+        type=click.Choice(["png", "webp"]),
+        help=("Render a preview of the COG from its smallest overview, with "
+              "the NLCD colors, added as the thumbnail asset."),
+    )
+    @click.option(
+        "--preview-dir",
+        help="Directory of the previews. Defaults to the directory of the COG.",
+    )
+    def create_item_command(source: str, destination: str,
+                            cache: Optional[str], class_histogram: bool,
+                            footprint: bool, preview_format: Optional[str],
+                            preview_dir: Optional[str]):
         """Creates a STAC Item
 
         Args:
             source (str): Path to the COG asset.
             destination (str): An HREF for the STAC Collection
+            cache (str, optional): Path to the metadata cache.
+            class_histogram (bool): Count the pixels of each class.
+            footprint (bool): Use the data footprint as the item geometry.
+            preview_format (str, optional): Format of the preview to render.
+            preview_dir (str, optional): Directory of the preview.
         """
-        item = stac.create_item(source)
+        from stactools.usgs_nlcd import stac
+        from stactools.usgs_nlcd.cache import MetadataCache
+        from stactools.usgs_nlcd.validation import use_cached_validator
+
+        use_cached_validator()
+        if cache is not None:
+            with MetadataCache(cache) as metadata_cache:
+                item = stac.create_item(source,
+                                        cache=metadata_cache,
+                                        class_histogram=class_histogram,
+                                        footprint=footprint,
+                                        preview_format=preview_format,
+                                        preview_dir=preview_dir)
+        else:
+            item = stac.create_item(source,
+                                    class_histogram=class_histogram,
+                                    footprint=footprint,
+                                    preview_format=preview_format,
+                                    preview_dir=preview_dir)
         item.validate()
 
         item.save_object(dest_href=destination)
 
         return None
 
+    @usgsnlcd.command("create-items",
+                      short_help="Create STAC items for many COGs")
+    @click.option(
+        "-d",
+        "--destination",
+        help=("The output directory for the items, or for the collection "
+              "only with --ndjson"),
+    )
+    @click.option(
+        "-s",
+        "--source",
+        required=True,
+        help=("A directory of COGs, a glob, or a text file listing one COG "
+              "href per line"),
+    )
+    @click.option(
+        "-w",
+        "--workers",
+        type=int,
+        default=8,
+        help="Number of threads reading COG headers.",
+    )
+    @click.option(
+        "-c",
+        "--collection",
+        is_flag=True,
+        default=False,
+        help="Also write a collection containing the items.",
+    )
+    @click.option(
+        "--cache",
+        help=("SQLite file caching the metadata read from COGs, so unchanged "
+              "COGs are not read again."),
+    )
+    @click.option(
+        "--class-histogram",
+        is_flag=True,
+        default=False,
+        help=("Count the pixels of each class, storing the counts and "
+              "fractions on the COG asset. This reads the whole COG."),
+    )
+    @click.option(
+        "--footprint",
+        is_flag=True,
+        default=False,
+        help=("Use the footprint of the data, computed from an overview, as "
+              "the item geometry instead of the COG bounds."),
+    )
+    @click.option(
+        "--preview",
+        "preview_format",
+        type=click.Choice(["png", "webp"]),
+        help=("Render a preview of the COG from its smallest overview, with "
+              "the NLCD colors, added as the thumbnail asset."),
+    )
+    @click.option(
+        "--preview-dir",
+        help="Directory of the previews. Defaults to the directory of the COG.",
+    )
+    @click.option(
+        "--ndjson",
+        help=("Stream the items as newline-delimited JSON to this file, or "
+              "to the standard output with '-', instead of writing a file "
+              "per item."),
+    )
+    @click.option(
+        "--gzip",
+        "gzip_output",
+        is_flag=True,
+        default=None,
+        help=("Gzip the --ndjson output. Defaults to whether its name ends "
+              "with .gz."),
+    )
+    def create_items_command(source: str, destination: Optional[str],
+                             workers: int, collection: bool,
+                             cache: Optional[str], class_histogram: bool,
+                             footprint: bool, preview_format: Optional[str],
+                             preview_dir: Optional[str], ndjson: Optional[str],
+                             gzip_output: Optional[bool]):
+        """Creates STAC Items for many COGs in a single process
+
+        Items that cannot be created or do not validate are reported at the
+        end, without stopping the other items. Items are written as soon as
+        they are created, and the extent and summaries of the collection
+        computed from them, so any number of COGs can be processed in
+        constant memory.
+
+        Args:
+            source (str): A directory of COGs, a glob, or a text file listing
+            one COG href per line.
+            destination (str, optional): Directory of the output items.
+            workers (int): Number of threads reading COG headers.
+            collection (bool): Also write a collection containing the items.
+            cache (str, optional): Path to the metadata cache.
+            class_histogram (bool): Count the pixels of each class.
+            footprint (bool): Use the data footprints as the item geometries.
+            preview_format (str, optional): Format of the previews to render.
+            preview_dir (str, optional): Directory of the previews.
+            ndjson (str, optional): Path of the newline-delimited JSON
+            output, or '-' for the standard output.
+            gzip_output (bool, optional): Gzip the newline-delimited JSON.
+        """
+        from stactools.usgs_nlcd import stac
+        from stactools.usgs_nlcd.cache import MetadataCache
+        from stactools.usgs_nlcd.ndjson import STDOUT, NdjsonWriter
+        from stactools.usgs_nlcd.utils import expand_hrefs
+        from stactools.usgs_nlcd.validation import use_cached_validator
+
+        if destination is None and (ndjson is None or collection):
+            raise click.UsageError(
+                "--destination is needed without --ndjson or with "
+                "--collection")
+        use_cached_validator()
+        hrefs = expand_hrefs(source)
+        failures: List[Tuple[str, Exception]] = []
+
+        def on_error(href: str, error: Exception) -> None:
+            failures.append((href, error))
+
+        metadata_cache = MetadataCache(cache) if cache is not None else None
+        stac_collection = None
+        if collection and destination is not None:
+            stac_collection = stac.create_collection()
+            stac_collection.normalize_hrefs(destination)
+        summary = stac.CollectionSummary()
+        writer = None
+        if ndjson is not None:
+            writer = NdjsonWriter(ndjson, gzip_output)
+        try:
+            for item in stac.create_items(hrefs,
+                                          workers=workers,
+                                          on_error=on_error,
+                                          cache=metadata_cache,
+                                          class_histogram=class_histogram,
+                                          footprint=footprint,
+                                          preview_format=preview_format,
+                                          preview_dir=preview_dir):
+                try:
+                    item.validate()
+                except Exception as e:
+                    on_error(item.assets["landcover"].href, e)
+                    continue
+                summary.add(item)
+                if writer is not None:
+                    if stac_collection is not None:
+                        item.collection_id = stac_collection.id
+                    writer.write(item)
+                elif stac_collection is not None:
+                    stac.save_item_in_collection(item, stac_collection)
+                elif destination is not None:
+                    item.save_object(
+                        dest_href=os.path.join(destination, f"{item.id}.json"))
+        finally:
+            if metadata_cache is not None:
+                metadata_cache.close()
+            if writer is not None:
+                writer.close()
+
+        if stac_collection is not None:
+            summary.update_collection(stac_collection)
+            stac_collection.validate()
+            stac_collection.save()
+
+        # Keep the standard output for the items when they are streamed there.
+        click.echo(
+            f"Created {len(hrefs) - len(failures)} of {len(hrefs)} "
+            "items",
+            err=ndjson == STDOUT)
+        if failures:
+            for href, error in failures:
+                click.echo(f"Failed: {href}: {error}", err=True)
+            raise click.ClickException(
+                f"Failed to create {len(failures)} items")
+
+        return None
+
+    @usgsnlcd.command(
+        "create-change",
+        short_help="Compute land cover transitions between years",
+    )
+    @click.argument("sources", nargs=-1, required=True)
+    @click.option(
+        "-d",
+        "--destination",
+        required=True,
+        help="The output directory, a local path or fsspec URL",
+    )
+    @click.option(
+        "-w",
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of threads comparing windows of the rasters.",
+    )
+    @click.option(
+        "--change-raster",
+        is_flag=True,
+        default=False,
+        help="Also write a change raster COG for each pair of years.",
+    )
+    @click.option(
+        "-p",
+        "--profile",
+        type=click.Choice(list(COG_PROFILES)),
+        default=DEFAULT_COG_PROFILE,
+        show_default=True,
+        help="Encoding profile of the change COGs.",
+    )
+    def create_change_command(sources: Tuple[str, ...], destination: str,
+                              workers: int, change_raster: bool,
+                              profile: str) -> None:
+        """Computes the land cover transitions between NLCD rasters of several
+        years for the same grid, writing them to `transitions.json` in the
+        destination.
+
+        Args:
+            sources (Tuple[str, ...]): NLCD land cover rasters, whose years
+            are read from their names.
+            destination (str): Output directory.
+            workers (int): Number of threads comparing windows of the rasters.
+            change_raster (bool): Also write change raster COGs.
+            profile (str): Encoding profile of the change COGs.
+        """
+        import fsspec
+
+        from stactools.usgs_nlcd import change
+
+        year_hrefs = {}
+        for source in sources:
+            try:
+                year = change.href_year(source)
+            except ValueError as e:
+                raise click.BadParameter(str(e))
+            if year in year_hrefs:
+                raise click.BadParameter(f"Several rasters for {year}")
+            year_hrefs[year] = source
+        if len(year_hrefs) < 2:
+            raise click.BadParameter(
+                "Rasters of at least two years are needed")
+
+        matrices = change.transition_matrices(
+            year_hrefs,
+            workers=workers,
+            change_directory=destination if change_raster else None,
+            profile=profile)
+        transitions = {
+            f"{from_year}-{to_year}": change.matrix_to_dict(matrix)
+            for (from_year, to_year), matrix in matrices.items()
+        }
+        with fsspec.open(os.path.join(destination, "transitions.json"),
+                         "w") as f:
+            json.dump(transitions, f, indent=2)
+
+    @usgsnlcd.command(
+        "list-tiles",
+        short_help="List the tiles of the NLCD grid covering an area",
+    )
+    @click.option(
+        "--bbox",
+        nargs=4,
+        type=float,
+        help="West, south, east and north bounds in EPSG:4326.",
+    )
+    @click.option(
+        "--geojson",
+        help=("GeoJSON file of a geometry, feature or feature collection in "
+              "EPSG:4326."),
+    )
+    @click.option(
+        "--tile-size",
+        type=int,
+        default=TILING_PIXEL_SIZE[0],
+        show_default=True,
+        help="Width and height of the tiles in pixels.",
+    )
+    @click.option(
+        "--snap-to-blocks",
+        is_flag=True,
+        default=False,
+        help="Round the tile size to the nearest multiple of the COG blocks.",
+    )
+    @click.option(
+        "--overlap",
+        type=int,
+        default=0,
+        show_default=True,
+        help="Pixels by which tiles extend into their neighbours.",
+    )
+    def list_tiles_command(bbox: Optional[Tuple[float, float, float, float]],
+                           geojson: Optional[str], tile_size: int,
+                           snap_to_blocks: bool, overlap: int) -> None:
+        """Lists the `<row>_<column>` names of the tiles of the NLCD CONUS grid
+        covering a bounding box or GeoJSON geometries, one per line.
+
+        Args:
+            bbox (Tuple[float, float, float, float], optional): Bounds in
+            EPSG:4326.
+            geojson (str, optional): GeoJSON file in EPSG:4326.
+            tile_size (int): Width and height of the tiles in pixels.
+            snap_to_blocks (bool): Round the tile size to whole COG blocks.
+            overlap (int): Pixels by which tiles extend into their neighbours.
+        """
+        import fsspec
+
+        from stactools.usgs_nlcd.grid import TileGrid
+
+        # Without --bbox, click gives an empty tuple or None depending on its
+        # version.
+        if bool(bbox) == (geojson is not None):
+            raise click.UsageError("Give one of --bbox and --geojson")
+        grid = TileGrid.nlcd(_tile_size_option(tile_size, snap_to_blocks),
+                             overlap)
+        if bbox:
+            tiles = grid.tiles_for_bbox(bbox)
+        else:
+            with fsspec.open(geojson, "r") as f:
+                data = json.load(f)
+            features = data.get("features", [data])
+            tiles = sorted({
+                tile
+                for feature in features
+                for tile in grid.tiles_for_geometry(
+                    feature.get("geometry", feature))
+            })
+        for row, col in tiles:
+            click.echo(grid.tile_name(row, col))
+
+    @usgsnlcd.command("invalidate-cache",
+                      short_help="Remove COGs from a metadata cache")
+    @click.argument("cache")
+    @click.option(
+        "--prefix",
+        help="Only remove the COGs whose href starts with this prefix.",
+    )
+    def invalidate_cache_command(cache: str, prefix: Optional[str]) -> None:
+        """Removes COGs from a metadata cache, so their metadata is read again
+        the next time items are created for them.
+
+        Args:
+            cache (str): Path to the metadata cache.
+            prefix (str, optional): Only remove the COGs whose href starts
+            with this prefix.
+        """
+        from stactools.usgs_nlcd.cache import MetadataCache
+
+        with MetadataCache(cache) as metadata_cache:
+            count = metadata_cache.invalidate(prefix)
+        click.echo(f"Removed {count} COGs from the cache")
+
+    @usgsnlcd.command("export-geoparquet",
+                      short_help="Write STAC items to a GeoParquet file")
+    @click.argument("source")
+    @click.argument("destination")
+    @click.option(
+        "--row-group-size",
+        type=int,
+        default=1000,
+        show_default=True,
+        help="Number of items per row group of the file.",
+    )
+    def export_geoparquet_command(source: str, destination: str,
+                                  row_group_size: int) -> None:
+        """Writes STAC items to a GeoParquet file, one row per item, for bulk
+        loading and querying by year, bounding box and class.
+
+        Needs the `geoparquet` extra (pyarrow).
+
+        Args:
+            source (str): A catalog or collection JSON file whose items are
+            written, or a directory, glob or list file of item JSON files.
+            destination (str): Path of the GeoParquet file, a local path or
+            fsspec URL.
+            row_group_size (int): Number of items per row group.
+        """
+        import pystac
+
+        from stactools.usgs_nlcd import geoparquet
+        from stactools.usgs_nlcd.utils import expand_hrefs
+
+        items: Iterable[pystac.Item]
+        stac_object = None
+        if source.endswith(".json") and not any(char in source
+                                                for char in "*?["):
+            stac_object = pystac.read_file(source)
+        if isinstance(stac_object, pystac.Catalog):
+            items = stac_object.get_all_items()
+        elif isinstance(stac_object, pystac.Item):
+            items = [stac_object]
+        else:
+            items = (pystac.Item.from_file(href)
+                     for href in expand_hrefs(source, pattern="*.json"))
+        count = geoparquet.write_items(items, destination, row_group_size)
+        click.echo(f"Wrote {count} items to {destination}")
+
+    @usgsnlcd.command("validate", short_help="Validate STAC items")
+    @click.argument("source")
+    @click.option(
+        "--schema-dir",
+        help=("Directory of cached schemas, as written by fetch-schemas. "
+              "Defaults to the schemas shipped with the package."),
+    )
+    @click.option(
+        "--download",
+        is_flag=True,
+        default=False,
+        help="Download the schemas missing from the schema directory.",
+    )
+    def validate_command(source: str, schema_dir: Optional[str],
+                         download: bool) -> None:
+        """Validates STAC items against cached schemas, without network
+        access unless --download is given.
+
+        Args:
+            source (str): A directory, glob or list file of item JSON files,
+            or a newline-delimited JSON file of items (.ndjson or
+            .ndjson.gz).
+            schema_dir (str, optional): Directory of the cached schemas.
+            download (bool): Download the schemas missing from the directory.
+        """
+        import fsspec
+
+        from stactools.usgs_nlcd import validation
+        from stactools.usgs_nlcd.utils import expand_hrefs
+
+        def read_items() -> Iterable[dict]:
+            if source.endswith((".ndjson", ".ndjson.gz")):
+                with fsspec.open(source, "rt", compression="infer") as f:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+                return
+            for href in expand_hrefs(source, pattern="*.json"):
+                with fsspec.open(href, "r") as f:
+                    yield json.load(f)
+
+        validator = validation.cached_validator(
+            schema_dir or validation.SCHEMA_DIR, download)
+        count = 0
+        failures = 0
+        try:
+            for item in read_items():
+                count += 1
+                for id, error in validation.validate_items([item], validator):
+                    failures += 1
+                    click.echo(f"Invalid: {id}: {error}", err=True)
+        except validation.SchemaNotCachedError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Validated {count} items, {failures} invalid")
+        if failures:
+            raise click.ClickException(f"{failures} items are invalid")
+
+    @usgsnlcd.command("fetch-schemas",
+                      short_help="Download the STAC schemas for validation")
+    @click.option(
+        "--schema-dir",
+        help=("Directory to write the schemas to. Defaults to the schemas "
+              "shipped with the package."),
+    )
+    def fetch_schemas_command(schema_dir: Optional[str]) -> None:
+        """Downloads the schemas of the STAC objects created by this package,
+        and those they refer to, for offline validation.
+
+        Args:
+            schema_dir (str, optional): Directory to write the schemas to.
+        """
+        from stactools.usgs_nlcd import validation
+
+        schema_dir = schema_dir or validation.SCHEMA_DIR
+        uris = validation.fetch_schemas(schema_dir)
+        click.echo(f"Cached {len(uris)} schemas in {schema_dir}")
+
     @usgsnlcd.command(
         "create-cog",
         short_help="Transform Geotiff to Cloud-Optimized Geotiff.",
@@ -77,13 +617,15 @@ def create_usgsnlcd_command(cli):
         "-d",
         "--destination",
         required=True,
-        help="The output directory for the COG",
+        help="The output directory for the COG, a local path or fsspec URL",
     )
     @click.option(
         "-s",
         "--source",
         required=True,
-        help="Path to an input GeoTiff",
+        multiple=True,
+        help=("Path to an input GeoTiff. With --tile, give the rasters of "
+              "several years to tile them all in one pass."),
     )
     @click.option(
         "-t",
@@ -92,27 +634,153 @@ def create_usgsnlcd_command(cli):
         is_flag=True,
         default=False,
     )
-    def create_cog_command(destination: str, source: str, tile: bool) -> None:
+    @click.option(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes creating tile COGs in parallel with --tile.",
+    )
+    @click.option(
+        "--resume/--no-resume",
+        default=True,
+        help=("With --tile, skip tiles the manifest in the destination "
+              "records as done."),
+    )
+    @click.option(
+        "--verify-checksums",
+        is_flag=True,
+        default=False,
+        help=("When resuming, check the checksums of the tiles done rather "
+              "than only their sizes, reading them all again."),
+    )
+    @click.option(
+        "--metrics-file",
+        help="Write per-stage timings and sizes to this JSON file.",
+    )
+    @click.option(
+        "-p",
+        "--profile",
+        type=click.Choice(list(COG_PROFILES)),
+        default=DEFAULT_COG_PROFILE,
+        show_default=True,
+        help="Encoding profile of the COGs.",
+    )
+    @click.option(
+        "--tile-size",
+        type=int,
+        default=TILING_PIXEL_SIZE[0],
+        show_default=True,
+        help="Width and height of the tiles in pixels with --tile.",
+    )
+    @click.option(
+        "--snap-to-blocks",
+        is_flag=True,
+        default=False,
+        help=("Round the tile size to the nearest multiple of the COG blocks, "
+              "so no tile splits a block."),
+    )
+    @click.option(
+        "--overlap",
+        type=int,
+        default=0,
+        show_default=True,
+        help="Pixels by which tiles extend into their neighbours with --tile.",
+    )
+    def create_cog_command(destination: str, source: Tuple[str, ...],
+                           tile: bool, workers: int, resume: bool,
+                           verify_checksums: bool, metrics_file: Optional[str],
+                           profile: str, tile_size: int, snap_to_blocks: bool,
+                           overlap: int) -> None:
         """Generate a COG from an img/ige file. The COG will be saved in the desination
         with `_cog.tif` appended to the name.
         Args:
-            destination (str): Local directory to save output COGs
-            source (str, optional): An input USGS-NLCD img file (with the matching ige
-            file in the same folder)
+            destination (str): Directory to save output COGs, a local path or
+            fsspec URL
+            source (Tuple[str, ...]): Input USGS-NLCD img files (with the
+            matching ige files in the same folder)
             tile (bool, optional): Tile the tiff into many smaller files.
+            workers (int, optional): Number of processes creating tile COGs in
+            parallel.
+            resume (bool, optional): Skip tiles already done according to the
+            manifest in the destination.
+            verify_checksums (bool, optional): When resuming, check the
+            checksums of the tiles done rather than only their sizes.
+            metrics_file (str, optional): JSON file to write the timings and
+            sizes of the run to.
+            profile (str, optional): Encoding profile of the COGs.
+            tile_size (int, optional): Width and height of the tiles in
+            pixels.
+            snap_to_blocks (bool, optional): Round the tile size to whole COG
+            blocks.
+            overlap (int, optional): Pixels by which tiles extend into their
+            neighbours.
         """
-        create_cog_command_fn(destination, source, tile)
+        create_cog_command_fn(destination, list(source), tile, workers, resume,
+                              metrics_file, profile,
+                              _tile_size_option(tile_size, snap_to_blocks),
+                              overlap, verify_checksums)
 
-    def create_cog_command_fn(destination: str, source: str,
-                              tile: bool) -> None:
-        if not os.path.isdir(destination):
+    def create_cog_command_fn(destination: str,
+                              source: Union[str, List[str]],
+                              tile: bool,
+                              workers: int = 1,
+                              resume: bool = True,
+                              metrics_file: Optional[str] = None,
+                              profile: str = DEFAULT_COG_PROFILE,
+                              tile_size: Tuple[int, int] = TILING_PIXEL_SIZE,
+                              overlap: int = 0,
+                              verify_checksums: bool = False) -> None:
+        from stactools.usgs_nlcd import cog
+        from stactools.usgs_nlcd.metrics import PipelineMetrics
+        from stactools.usgs_nlcd.utils import is_local
+
+        if is_local(destination) and not os.path.isdir(destination):
             raise IOError(f'Destination folder "{destination}" not found')
 
-        if tile:
-            cog.create_retiled_cogs(source, destination)
-        else:
-            output_path = os.path.join(destination,
-                                       os.path.basename(source)[:-4] + ".tif")
-            cog.create_cog(source, output_path)
+        sources = [source] if isinstance(source, str) else source
+        metrics = PipelineMetrics()
+        try:
+            if tile and len(sources) > 1:
+                cog.create_multi_year_retiled_cogs(
+                    sources,
+                    destination,
+                    workers=workers,
+                    resume=resume,
+                    metrics=metrics,
+                    profile=profile,
+                    tile_size=tile_size,
+                    overlap=overlap,
+                    verify_checksums=verify_checksums)
+            elif tile:
+                cog.create_retiled_cogs(sources[0],
+                                        destination,
+                                        workers=workers,
+                                        resume=resume,
+                                        metrics=metrics,
+                                        profile=profile,
+                                        tile_size=tile_size,
+                                        overlap=overlap,
+                                        verify_checksums=verify_checksums)
+            else:
+                for input_path in sources:
+                    output_path = os.path.join(
+                        destination,
+                        os.path.basename(input_path)[:-4] + ".tif")
+                    cog.create_cog(input_path,
+                                   output_path,
+                                   metrics=metrics,
+                                   profile=profile)
+        finally:
+            if metrics_file is not None:
+                metrics.write(metrics_file)
 
     return usgsnlcd
+
+
+def _tile_size_option(tile_size: int, snap_to_blocks: bool) -> Tuple[int, int]:
+    from stactools.usgs_nlcd.grid import snap_tile_size
+
+    if snap_to_blocks:
+        return snap_tile_size((tile_size, tile_size))
+    return tile_size, tile_size
@@ -1,27 +1,55 @@
 from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from pyproj import CRS
-from pystac import Link, Provider, ProviderRole
+if TYPE_CHECKING:
+    from pyproj import CRS
+    from pystac import Link, Provider
+
+# This module is imported by the command line interface before any command
+# runs: the pyproj and pystac objects below are only created, and these
+# libraries imported, on first use, by `__getattr__`.
 
 NLCD_ID = "usgs-nlcd"
 NLCD_EPSG = 6350
-NLCD_CRS = CRS.from_epsg(NLCD_EPSG)
-NLCD_CRS_WKT = CRS.from_epsg(NLCD_EPSG).to_wkt()
+# `pyproj.CRS.from_epsg(NLCD_EPSG).to_wkt()`, precomputed.
+NLCD_CRS_WKT = (
+    'PROJCRS["NAD83(2011) / Conus Albers",BASEGEOGCRS["NAD83(2011)",'
+    'DATUM["NAD83 (National Spatial Reference System 2011)",'
+    'ELLIPSOID["GRS 1980",6378137,298.257222101,LENGTHUNIT["metre",'
+    '1]]],PRIMEM["Greenwich",0,ANGLEUNIT["degree",0.0174532925199433]],'
+    'ID["EPSG",6318]],CONVERSION["Conus Albers",METHOD["Albers Equal '
+    'Area",ID["EPSG",9822]],PARAMETER["Latitude of false origin",23,'
+    'ANGLEUNIT["degree",0.0174532925199433],ID["EPSG",8821]],'
+    'PARAMETER["Longitude of false origin",-96,ANGLEUNIT["degree",'
+    '0.0174532925199433],ID["EPSG",8822]],PARAMETER["Latitude of 1st '
+    'standard parallel",29.5,ANGLEUNIT["degree",0.0174532925199433],'
+    'ID["EPSG",8823]],PARAMETER["Latitude of 2nd standard parallel",'
+    '45.5,ANGLEUNIT["degree",0.0174532925199433],ID["EPSG",8824]],'
+    'PARAMETER["Easting at false origin",0,LENGTHUNIT["metre",1],'
+    'ID["EPSG",8826]],PARAMETER["Northing at false origin",0,'
+    'LENGTHUNIT["metre",1],ID["EPSG",8827]]],CS[Cartesian,2],'
+    'AXIS["easting (X)",east,ORDER[1],LENGTHUNIT["metre",1]],'
+    'AXIS["northing (Y)",north,ORDER[2],LENGTHUNIT["metre",1]],'
+    'USAGE[SCOPE["Data analysis and small scale data presentation for '
+    'contiguous lower 48 states."],AREA["United States (USA) - CONUS '
+    'onshore - Alabama; Arizona; Arkansas; California; Colorado; '
+    'Connecticut; Delaware; Florida; Georgia; Idaho; Illinois; '
+    'Indiana; Iowa; Kansas; Kentucky; Louisiana; Maine; Maryland; '
+    'Massachusetts; Michigan; Minnesota; Mississippi; Missouri; '
+    'Montana; Nebraska; Nevada; New Hampshire; New Jersey; New Mexico; '
+    'New York; North Carolina; North Dakota; Ohio; Oklahoma; Oregon; '
+    'Pennsylvania; Rhode Island; South Carolina; South Dakota; '
+    'Tennessee; Texas; Utah; Vermont; Virginia; Washington; West '
+    'Virginia; Wisconsin; Wyoming."],BBOX[24.41,-124.79,49.38,-66.91]],'
+    'ID["EPSG",6350]]')
 LICENSE = "proprietary"
 lic_link = "https://www.usgs.gov/core-science-systems/hdds/data-policy"
-LICENSE_LINK = Link(rel="license",
-                    target=lic_link,
-                    title="Public Domain Waiver - USGS")
 SPATIAL_EXTENT = [-130.2, 21.7, -63.7, 49.1]
-TEMPORAL_EXTENT = [datetime(2001, 1, 1) or None, datetime(2019, 1, 1)]
 SPATIAL_RES = 30
 THUMBNAIL_HREF = "https://www.mrlc.gov/sites/default/files/2019-04/Land_cover_L48_6.png"
 DESCRIPTION = "The National Land Cover Database (NLCD) is an operational land cover monitoring program providing updated land cover and related information for the United States at five-year intervals."  # noqa E501
 TITLE = 'USGS NLCD (CONUS) All Years'
-NLCD_PROVIDER = Provider(
-    name="United States Geological Survey",
-    roles=[ProviderRole.PRODUCER, ProviderRole.PROCESSOR, ProviderRole.HOST],
-    url="https://www.mrlc.gov/data/nlcd-land-cover-conus-all-years")
 
 KEYWORDS = [
     "CONUS",
@@ -45,6 +73,10 @@ DELTA_DICT = {
     2016: datetime(2018, 12, 31),
     2019: datetime(2021, 12, 31),
 }
+TEMPORAL_EXTENT: List[Optional[datetime]] = [
+    datetime(min(DELTA_DICT), 1, 1),
+    max(DELTA_DICT.values()),
+]
 
 NO_DATA = 0
 CLASSIFICATION_VALUES = {
@@ -70,4 +102,96 @@ CLASSIFICATION_VALUES = {
     90: "Woody Wetlands",
     95: "Emergent Herbaceous Wetlands"
 }
+# Official colors of the NLCD land cover classes, as RGB.
+NLCD_COLORMAP = {
+    11: (70, 107, 159),
+    12: (209, 222, 248),
+    21: (222, 197, 197),
+    22: (217, 146, 130),
+    23: (235, 0, 0),
+    24: (171, 0, 0),
+    31: (179, 172, 159),
+    41: (104, 171, 95),
+    42: (28, 95, 44),
+    43: (181, 197, 143),
+    51: (175, 150, 60),
+    52: (204, 184, 121),
+    71: (223, 223, 194),
+    72: (209, 209, 130),
+    73: (163, 204, 81),
+    74: (130, 186, 158),
+    81: (220, 217, 57),
+    82: (171, 108, 40),
+    90: (184, 217, 235),
+    95: (108, 159, 184),
+}
 TILING_PIXEL_SIZE = (10000, 10000)
+# Width and height of the internal blocks of the COGs.
+COG_BLOCKSIZE = 512
+# Upper left corner (in EPSG:6350) and size in pixels of the NLCD CONUS land
+# cover rasters, which all years share.
+NLCD_GRID_ORIGIN = (-2493045.0, 3310005.0)
+NLCD_GRID_SHAPE = (104424, 161190)
+
+# Named encodings of the COG pixels, overriding `cog.COG_CREATION_OPTIONS`.
+# All of them are lossless.
+COG_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Smallest files, slowest to write.
+    "archive": {
+        "compress": "deflate",
+        "level": 9,
+        "predictor": "yes",
+    },
+    "balanced": {
+        "compress": "zstd",
+        "level": 9,
+        "predictor": "yes",
+    },
+    # Fastest to write, for intermediate or short lived files.
+    "fast-write": {
+        "compress": "zstd",
+        "level": 1,
+        "predictor": "no",
+    },
+    "lerc": {
+        "compress": "lerc_zstd",
+        "max_z_error": 0,
+        "level": 9,
+    },
+}
+DEFAULT_COG_PROFILE = "archive"
+
+# Created on first use, by `__getattr__`.
+_LAZY_CONSTANTS = ("NLCD_CRS", "LICENSE_LINK", "NLCD_PROVIDER")
+
+if TYPE_CHECKING:
+    NLCD_CRS: CRS
+    LICENSE_LINK: Link
+    NLCD_PROVIDER: Provider
+else:
+
+    def __getattr__(name: str) -> Any:
+        if name not in _LAZY_CONSTANTS:
+            raise AttributeError(
+                f"module {__name__!r} has no attribute {name!r}")
+        return _lazy_constant(name)
+
+
+@lru_cache(maxsize=None)
+def _lazy_constant(name: str) -> Any:
+    if name == "NLCD_CRS":
+        from pyproj import CRS
+        return CRS.from_epsg(NLCD_EPSG)
+    if name == "LICENSE_LINK":
+        from pystac import Link
+        return Link(rel="license",
+                    target=lic_link,
+                    title="Public Domain Waiver - USGS")
+    from pystac import Provider, ProviderRole
+    return Provider(name="United States Geological Survey",
+                    roles=[
+                        ProviderRole.PRODUCER, ProviderRole.PROCESSOR,
+                        ProviderRole.HOST
+                    ],
+                    url=("https://www.mrlc.gov/data/"
+                         "nlcd-land-cover-conus-all-years"))
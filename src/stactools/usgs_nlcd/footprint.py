@@ -0,0 +1,98 @@
+import json
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import rasterio
+import rasterio.features
+from affine import Affine
+from pyproj import Transformer
+from rasterio.enums import Resampling
+from shapely.geometry import mapping, shape
+from shapely.ops import transform, unary_union
+
+from stactools.usgs_nlcd.constants import NO_DATA
+
+logger = logging.getLogger(__name__)
+
+# Footprints are computed from a version of the raster of at most this many
+# pixels, one byte each, read from an overview where one is small enough.
+DEFAULT_MAX_PIXELS = 1024 * 1024
+
+
+def data_footprint(
+        href: str,
+        max_pixels: int = DEFAULT_MAX_PIXELS) -> Optional[Dict[str, Any]]:
+    """The footprint of the data of an NLCD raster, in WGS84.
+
+    The data mask is read from the finest overview of at most `max_pixels`
+    pixels, or decimated to that size if there is none, so the cost does not
+    depend on the size of the raster. The mask is vectorised, simplified to
+    the resolution it was read at, and reprojected.
+
+    Args:
+        href (str): Path to the raster, as readable by rasterio.
+        max_pixels (int, optional): Maximum number of pixels read. Defaults
+            to `DEFAULT_MAX_PIXELS`.
+    Returns:
+        Optional[Dict[str, Any]]: A GeoJSON Polygon or MultiPolygon, or None
+            if the raster has no data.
+    """
+    with rasterio.open(href) as dataset:
+        factor = read_factor(dataset.width, dataset.height,
+                             dataset.overviews(1), max_pixels)
+        out_shape = (math.ceil(dataset.height / factor),
+                     math.ceil(dataset.width / factor))
+        data = dataset.read(1,
+                            out_shape=out_shape,
+                            resampling=Resampling.nearest)
+        nodata = NO_DATA if dataset.nodata is None else dataset.nodata
+        # The transform of the raster scaled to the pixels read.
+        t = dataset.transform
+        x_scale = dataset.width / out_shape[1]
+        y_scale = dataset.height / out_shape[0]
+        mask_transform = Affine(t.a * x_scale, t.b * y_scale, t.c,
+                                t.d * x_scale, t.e * y_scale, t.f)
+        crs = dataset.crs
+
+    mask = data != nodata
+    if not mask.any():
+        return None
+    polygons = [
+        shape(geometry) for geometry, _ in rasterio.features.shapes(
+            mask.astype(np.uint8), mask=mask, transform=mask_transform)
+    ]
+    footprint = unary_union(polygons).simplify(abs(mask_transform.a),
+                                               preserve_topology=True)
+    transformer = Transformer.from_crs(crs, 4326, always_xy=True)
+    footprint = transform(transformer.transform, footprint)
+    # As stored in JSON, with lists rather than tuples.
+    return json.loads(json.dumps(mapping(footprint)))
+
+
+def read_factor(width: int, height: int, overviews: List[int],
+                max_pixels: int) -> int:
+    """The decimation factor at which to read a raster within a pixel budget.
+
+    Args:
+        width (int): Width of the raster in pixels.
+        height (int): Height of the raster in pixels.
+        overviews (List[int]): Decimation factors of the overviews of the
+            raster.
+        max_pixels (int): Maximum number of pixels to read.
+    Returns:
+        int: 1 if the raster fits the budget, else the factor of its finest
+            overview that does, else the smallest factor that does.
+    """
+    def fits(factor: int) -> bool:
+        return (math.ceil(width / factor) *
+                math.ceil(height / factor)) <= max_pixels
+
+    for factor in [1] + sorted(overviews):
+        if fits(factor):
+            return factor
+    factor = max(2, math.ceil(math.sqrt(width * height / max_pixels)))
+    while not fits(factor):
+        factor += 1
+    return factor
@@ -0,0 +1,285 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import fsspec
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pystac import Item
+from shapely.geometry import shape
+
+from stactools.usgs_nlcd.histogram import CLASS_COUNTS_FIELD
+
+logger = logging.getLogger(__name__)
+
+# Items are buffered and written in row groups of this many rows. Readers
+# skip the row groups whose statistics rule out their filters.
+DEFAULT_ROW_GROUP_SIZE = 1000
+
+# Typed column of the href of each asset of NLCD items.
+ASSET_HREF_COLUMNS = {
+    "landcover": "landcover_href",
+    "metadata": "metadata_href",
+}
+
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+# The typed columns are for filtering and analysis; the `item` column holds
+# the JSON of the whole item, from which `read_items` recreates the items.
+ITEM_SCHEMA = pa.schema([
+    ("type", pa.string()),
+    ("stac_version", pa.string()),
+    ("stac_extensions", pa.list_(pa.string())),
+    ("id", pa.string()),
+    ("collection", pa.string()),
+    ("year", pa.int16()),
+    ("datetime", _TIMESTAMP),
+    ("start_datetime", _TIMESTAMP),
+    ("end_datetime", _TIMESTAMP),
+    ("geometry", pa.binary()),
+    ("bbox",
+     pa.struct([("xmin", pa.float64()), ("ymin", pa.float64()),
+                ("xmax", pa.float64()), ("ymax", pa.float64())])),
+    ("proj:epsg", pa.int32()),
+    ("proj:shape", pa.list_(pa.int64())),
+    ("proj:transform", pa.list_(pa.float64())),
+    ("proj:bbox", pa.list_(pa.float64())),
+] + [(column, pa.string()) for column in ASSET_HREF_COLUMNS.values()] + [
+    (CLASS_COUNTS_FIELD, pa.map_(pa.uint8(), pa.int64())),
+    ("item", pa.string()),
+])
+
+# GeoParquet metadata of the files: the geometry is the WKB geometry of the
+# item in WGS84, a polygon or, for data footprints, a multipolygon, and the
+# bbox column covers it.
+GEO_METADATA = {
+    "version": "1.1.0",
+    "primary_column": "geometry",
+    "columns": {
+        "geometry": {
+            "encoding": "WKB",
+            "geometry_types": ["Polygon", "MultiPolygon"],
+            "covering": {
+                "bbox": {
+                    "xmin": ["bbox", "xmin"],
+                    "ymin": ["bbox", "ymin"],
+                    "xmax": ["bbox", "xmax"],
+                    "ymax": ["bbox", "ymax"],
+                }
+            },
+        }
+    },
+}
+
+
+class ItemParquetWriter:
+    """Writes STAC items to a GeoParquet file, one row per item.
+
+    Rows are buffered and written as a row group every `row_group_size`
+    items, so memory use does not grow with the number of items. The columns
+    are those of `ITEM_SCHEMA`.
+    """
+    def __init__(self,
+                 path: str,
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> None:
+        """
+        Args:
+            path (str): Path of the file, local path or fsspec URL.
+            row_group_size (int, optional): Number of items per row group.
+                Defaults to `DEFAULT_ROW_GROUP_SIZE`.
+        """
+        self.path = path
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._file = fsspec.open(path, "wb").open()
+        schema = ITEM_SCHEMA.with_metadata({"geo": json.dumps(GEO_METADATA)})
+        self._writer = pq.ParquetWriter(self._file, schema)
+
+    def __enter__(self) -> "ItemParquetWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def write(self, item: Item) -> None:
+        """Add an item to the file."""
+        self._rows.append(item_to_row(item))
+        self.count += 1
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def close(self) -> None:
+        """Write the remaining items and close the file."""
+        self._flush()
+        self._writer.close()
+        self._file.close()
+        logger.info(f"Wrote {self.count} items to {self.path}")
+
+    def _flush(self) -> None:
+        if self._rows:
+            self._writer.write_table(
+                pa.Table.from_pylist(self._rows, schema=ITEM_SCHEMA))
+            self._rows = []
+
+
+def write_items(items: Iterable[Item],
+                path: str,
+                row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    """Write STAC items to a GeoParquet file.
+
+    Items are consumed as they are written, so `items` can be a generator of
+    any length, e.g. items from `stac.create_items` or read from a catalog.
+
+    Args:
+        items (Iterable[Item]): The items to write.
+        path (str): Path of the file, local path or fsspec URL.
+        row_group_size (int, optional): Number of items per row group.
+            Defaults to `DEFAULT_ROW_GROUP_SIZE`.
+    Returns:
+        int: The number of items written.
+    """
+    with ItemParquetWriter(path, row_group_size) as writer:
+        for item in items:
+            writer.write(item)
+    return writer.count
+
+
+def read_table(path: str,
+               years: Optional[Sequence[int]] = None,
+               bbox: Optional[Tuple[float, float, float, float]] = None,
+               columns: Optional[List[str]] = None) -> pa.Table:
+    """Read the rows of a GeoParquet file of items matching filters.
+
+    Filters are pushed down to the Parquet reader, which skips the row groups
+    whose `year` or `bbox` statistics cannot match.
+
+    Args:
+        path (str): Path of the file, local path or fsspec URL.
+        years (Sequence[int], optional): Only read the items of these years.
+        bbox (Tuple[float, float, float, float], optional): Only read the
+            items whose bounding box intersects this one, in WGS84.
+        columns (List[str], optional): Only read these columns.
+    Returns:
+        pa.Table: The matching rows.
+    """
+    fs, fs_path = fsspec.core.url_to_fs(path)
+    dataset = ds.dataset(fs_path, format="parquet", filesystem=fs)
+    return dataset.to_table(columns=columns,
+                            filter=item_filter(years=years, bbox=bbox))
+
+
+def read_items(
+    path: str,
+    years: Optional[Sequence[int]] = None,
+    bbox: Optional[Tuple[float, float, float,
+                         float]] = None) -> Iterator[Item]:
+    """Read the STAC items of a GeoParquet file matching filters.
+
+    The items are recreated from the `item` column, so they are the items
+    that were written, whole. Row groups are read one at a time, with the
+    filters of `read_table` pushed down.
+
+    Args:
+        path (str): Path of the file, local path or fsspec URL.
+        years (Sequence[int], optional): Only read the items of these years.
+        bbox (Tuple[float, float, float, float], optional): Only read the
+            items whose bounding box intersects this one, in WGS84.
+    Returns:
+        Iterator[Item]: The matching items, in the order of the file.
+    """
+    fs, fs_path = fsspec.core.url_to_fs(path)
+    dataset = ds.dataset(fs_path, format="parquet", filesystem=fs)
+    for batch in dataset.to_batches(columns=["item"],
+                                    filter=item_filter(years=years,
+                                                       bbox=bbox)):
+        for item in batch.column(0).to_pylist():
+            yield Item.from_dict(json.loads(item))
+
+
+def item_filter(
+    years: Optional[Sequence[int]] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None
+) -> Optional[pc.Expression]:
+    """A pyarrow dataset filter on the year and bounding box of items, or
+    None if there is nothing to filter on."""
+    conditions = []
+    if years is not None:
+        conditions.append(pc.field("year").isin(list(years)))
+    if bbox is not None:
+        west, south, east, north = bbox
+        conditions.extend([
+            pc.field("bbox", "xmin") <= east,
+            pc.field("bbox", "xmax") >= west,
+            pc.field("bbox", "ymin") <= north,
+            pc.field("bbox", "ymax") >= south,
+        ])
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def item_to_row(item: Item) -> Dict[str, Any]:
+    """The row of an item, following `ITEM_SCHEMA`."""
+    item_dict = item.to_dict(include_self_link=False)
+    properties = item.properties
+    start_datetime = _utc(item.common_metadata.start_datetime)
+    year_datetime = start_datetime or item.datetime
+    geometry = shape(item.geometry)
+    west, south, east, north = item.bbox or geometry.bounds
+    row = {
+        "type": "Feature",
+        "stac_version": item_dict["stac_version"],
+        "stac_extensions": item.stac_extensions,
+        "id": item.id,
+        "collection": item.collection_id,
+        "year": None if year_datetime is None else year_datetime.year,
+        "datetime": _utc(item.datetime),
+        "start_datetime": start_datetime,
+        "end_datetime": _utc(item.common_metadata.end_datetime),
+        "geometry": geometry.wkb,
+        "bbox": {
+            "xmin": west,
+            "ymin": south,
+            "xmax": east,
+            "ymax": north
+        },
+        "proj:epsg": properties.get("proj:epsg"),
+        "proj:shape": properties.get("proj:shape"),
+        "proj:transform": properties.get("proj:transform"),
+        "proj:bbox": properties.get("proj:bbox"),
+    }
+    for key, column in ASSET_HREF_COLUMNS.items():
+        asset = item.assets.get(key)
+        row[column] = None if asset is None else asset.href
+    landcover = item.assets.get("landcover")
+    counts = None
+    if landcover is not None:
+        counts = landcover.extra_fields.get(CLASS_COUNTS_FIELD)
+    row[CLASS_COUNTS_FIELD] = None if counts is None else [
+        (int(value), count) for value, count in counts.items()
+    ]
+    row["item"] = json.dumps(item_dict)
+    return row
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Item datetimes without a time zone are in UTC.
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
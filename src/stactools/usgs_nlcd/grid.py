@@ -0,0 +1,206 @@
+import math
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Tuple
+
+from affine import Affine
+from pyproj import Transformer
+from rasterio.io import DatasetReader
+from rasterio.windows import Window
+from shapely.geometry import box, shape
+from shapely.ops import transform
+
+from stactools.usgs_nlcd.constants import (
+    COG_BLOCKSIZE,
+    NLCD_EPSG,
+    NLCD_GRID_ORIGIN,
+    NLCD_GRID_SHAPE,
+    SPATIAL_RES,
+    TILING_PIXEL_SIZE,
+)
+
+Bounds = Tuple[float, float, float, float]
+
+
+class TileGrid:
+    """The grid of tiles a raster is split into.
+
+    Tiles are numbered by one-based row and column from the upper left, and
+    edge tiles are clipped to the raster, as `gdal_retile.py` does. Tiles can
+    overlap their neighbours by a number of pixels on every side. The window,
+    bounds and name of any tile, and the tiles covering an area, are computed
+    from the grid definition alone, without opening any file.
+    """
+    def __init__(
+            self,
+            width: int,
+            height: int,
+            tile_size: Tuple[int, int] = TILING_PIXEL_SIZE,
+            transform: Affine = Affine.identity(),
+            overlap: int = 0,
+    ) -> None:
+        """
+        Args:
+            width (int): Width of the raster in pixels.
+            height (int): Height of the raster in pixels.
+            tile_size (Tuple[int, int], optional): Width and height of the
+                tiles in pixels, overlap excluded. Defaults to
+                `TILING_PIXEL_SIZE`.
+            transform (Affine, optional): Geotransform of the raster, north
+                up. Only needed for the bounds of tiles and lookups by area.
+            overlap (int, optional): Number of pixels by which tiles extend
+                into their neighbours on each side. Defaults to 0.
+        """
+        if overlap < 0:
+            raise ValueError(f"Negative overlap: {overlap}")
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.transform = transform
+        self.overlap = overlap
+        self.cols = -(-width // tile_size[0])
+        self.rows = -(-height // tile_size[1])
+
+    @classmethod
+    def nlcd(cls,
+             tile_size: Tuple[int, int] = TILING_PIXEL_SIZE,
+             overlap: int = 0) -> "TileGrid":
+        """The grid of the NLCD CONUS land cover rasters."""
+        height, width = NLCD_GRID_SHAPE
+        return cls(
+            width, height, tile_size,
+            Affine(SPATIAL_RES, 0, NLCD_GRID_ORIGIN[0], 0, -SPATIAL_RES,
+                   NLCD_GRID_ORIGIN[1]), overlap)
+
+    @classmethod
+    def from_dataset(cls,
+                     dataset: DatasetReader,
+                     tile_size: Tuple[int, int] = TILING_PIXEL_SIZE,
+                     overlap: int = 0) -> "TileGrid":
+        """The grid of an opened raster."""
+        return cls(dataset.width, dataset.height, tile_size, dataset.transform,
+                   overlap)
+
+    def tiles(self) -> Iterator[Tuple[int, int]]:
+        """All the tiles of the grid, row by row, as (row, column)."""
+        for row in range(1, self.rows + 1):
+            for col in range(1, self.cols + 1):
+                yield row, col
+
+    def window(self, row: int, col: int) -> Window:
+        """The pixel window of a tile, overlap included."""
+        self._check_tile(row, col)
+        tile_width, tile_height = self.tile_size
+        col_off = max(0, (col - 1) * tile_width - self.overlap)
+        row_off = max(0, (row - 1) * tile_height - self.overlap)
+        col_stop = min(self.width, col * tile_width + self.overlap)
+        row_stop = min(self.height, row * tile_height + self.overlap)
+        return Window(col_off, row_off, col_stop - col_off, row_stop - row_off)
+
+    def bounds(self, row: int, col: int) -> Bounds:
+        """The bounds of a tile, in the CRS of the raster."""
+        window = self.window(row, col)
+        t = self.transform
+        return (t.c + window.col_off * t.a,
+                t.f + (window.row_off + window.height) * t.e,
+                t.c + (window.col_off + window.width) * t.a,
+                t.f + window.row_off * t.e)
+
+    def bbox(self, row: int, col: int) -> List[float]:
+        """The bounding box of a tile in EPSG:4326, for rasters in the NLCD
+        CRS."""
+        return list(_to_wgs84().transform_bounds(*self.bounds(row, col)))
+
+    def tile_name(self, row: int, col: int) -> str:
+        """The `<row>_<column>` suffix of the file name of a tile, zero padded
+        like `gdal_retile.py` does."""
+        digits = len(str(max(self.rows, self.cols)))
+        return f"{row:0{digits}d}_{col:0{digits}d}"
+
+    def tiles_for_bounds(self, bounds: Bounds) -> List[Tuple[int, int]]:
+        """The tiles intersecting bounds in the CRS of the raster.
+
+        Found by arithmetic on the grid, in time proportional to the number
+        of tiles returned.
+
+        Args:
+            bounds (Tuple[float, float, float, float]): West, south, east and
+                north bounds.
+        Returns:
+            List[Tuple[int, int]]: The (row, column) of the tiles, row by row.
+        """
+        west, south, east, north = bounds
+        t = self.transform
+        col_min = (west - t.c) / t.a - self.overlap
+        col_max = (east - t.c) / t.a + self.overlap
+        row_min = (north - t.f) / t.e - self.overlap
+        row_max = (south - t.f) / t.e + self.overlap
+        tile_width, tile_height = self.tile_size
+        first_col = max(1, math.floor(col_min / tile_width) + 1)
+        last_col = min(self.cols, math.ceil(col_max / tile_width))
+        first_row = max(1, math.floor(row_min / tile_height) + 1)
+        last_row = min(self.rows, math.ceil(row_max / tile_height))
+        return [(row, col) for row in range(first_row, last_row + 1)
+                for col in range(first_col, last_col + 1)]
+
+    def tiles_for_bbox(self, bbox: Bounds) -> List[Tuple[int, int]]:
+        """The tiles intersecting a bounding box in EPSG:4326, for rasters in
+        the NLCD CRS."""
+        return self.tiles_for_bounds(_from_wgs84().transform_bounds(
+            *bbox, densify_pts=21))
+
+    def tiles_for_geometry(
+        self,
+        geometry: Dict[str, Any],
+    ) -> List[Tuple[int, int]]:
+        """The tiles intersecting a GeoJSON geometry in EPSG:4326, for rasters
+        in the NLCD CRS.
+
+        Candidates are found from the bounds of the geometry, then only those
+        whose bounds intersect the geometry itself are kept.
+
+        Args:
+            geometry (Dict[str, Any]): A GeoJSON geometry, such as the outline
+                of a county.
+        Returns:
+            List[Tuple[int, int]]: The (row, column) of the tiles, row by row.
+        """
+        projected = transform(_from_wgs84().transform, shape(geometry))
+        return [(row, col)
+                for row, col in self.tiles_for_bounds(projected.bounds)
+                if projected.intersects(box(*self.bounds(row, col)))]
+
+    def _check_tile(self, row: int, col: int) -> None:
+        if not (1 <= row <= self.rows and 1 <= col <= self.cols):
+            raise ValueError(f"No tile at row {row}, column {col} in a grid "
+                             f"of {self.rows} rows and {self.cols} columns")
+
+
+def snap_tile_size(tile_size: Tuple[int, int],
+                   blocksize: int = COG_BLOCKSIZE) -> Tuple[int, int]:
+    """The nearest tile size made of whole blocks.
+
+    Tiles whose size is a multiple of the block size of the COGs only have
+    full blocks, except at the edges of the raster, and their bounds do not
+    split the blocks of a raster with the same block size.
+
+    Args:
+        tile_size (Tuple[int, int]): Width and height of the tiles in pixels.
+        blocksize (int, optional): Width and height of the blocks. Defaults
+            to `COG_BLOCKSIZE`.
+    Returns:
+        Tuple[int, int]: The width and height rounded to the nearest
+            multiple of `blocksize`, and at least one block.
+    """
+    width, height = (max(1, round(size / blocksize)) * blocksize
+                     for size in tile_size)
+    return width, height
+
+
+@lru_cache(maxsize=None)
+def _to_wgs84() -> Transformer:
+    return Transformer.from_crs(NLCD_EPSG, 4326, always_xy=True)
+
+
+@lru_cache(maxsize=None)
+def _from_wgs84() -> Transformer:
+    return Transformer.from_crs(4326, NLCD_EPSG, always_xy=True)
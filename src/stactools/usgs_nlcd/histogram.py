@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import rasterio
+from pystac import Asset
+from rasterio.windows import Window
+
+from stactools.usgs_nlcd.constants import CLASSIFICATION_VALUES, NO_DATA
+from stactools.usgs_nlcd.utils import (
+    ThreadDatasets,
+    block_aligned_chunks,
+    bounded_map,
+)
+
+CLASS_COUNTS_FIELD = "nlcd:class_counts"
+CLASS_FRACTIONS_FIELD = "nlcd:class_fractions"
+
+# Pixels are counted in chunks of at least this many rows and columns, of
+# one byte each.
+CHUNK_SIZE = 2048
+
+
+def class_counts(href: str,
+                 workers: int = 4,
+                 chunk_size: int = CHUNK_SIZE) -> Dict[int, int]:
+    """Count the pixels of each class in an NLCD raster.
+
+    The raster is read in chunks aligned to its blocks, which are counted
+    with `numpy.bincount` on a pool of threads. At most two chunks per thread
+    are in memory at a time, whatever the size of the raster.
+
+    Args:
+        href (str): Path to the raster, as readable by rasterio.
+        workers (int, optional): Number of threads reading and counting
+            chunks. Defaults to 4.
+        chunk_size (int, optional): Minimum height and width of the chunks.
+            Defaults to `CHUNK_SIZE`.
+    Returns:
+        Dict[int, int]: The number of pixels of each value found in the
+            raster, `NO_DATA` included.
+    """
+    with rasterio.open(href) as dataset:
+        if dataset.dtypes[0] != "uint8":
+            raise ValueError(
+                f"Expected a uint8 raster, {href} is {dataset.dtypes[0]}")
+        chunks = list(
+            block_aligned_chunks(dataset,
+                                 Window(0, 0, dataset.width, dataset.height),
+                                 min_size=chunk_size))
+
+    counts = np.zeros(256, dtype=np.int64)
+    with ThreadDatasets(href) as datasets, ThreadPoolExecutor(
+            max_workers=workers) as executor:
+
+        def count(window: Window) -> np.ndarray:
+            return np.bincount(datasets.get().read(1, window=window).ravel(),
+                               minlength=256)
+
+        for _, future in bounded_map(executor, count, chunks, 2 * workers):
+            counts += future.result()
+    return {int(value): int(counts[value]) for value in np.flatnonzero(counts)}
+
+
+def class_fractions(counts: Dict[int, int]) -> Dict[int, float]:
+    """The fraction of the pixels with data that are of each class.
+
+    Args:
+        counts (Dict[int, int]): Pixel counts, as from `class_counts`.
+    Returns:
+        Dict[int, float]: The fraction of each class found, rounded to 6
+            decimals. `NO_DATA` pixels are left out of the total.
+    """
+    total = sum(count for value, count in counts.items() if value != NO_DATA)
+    if total == 0:
+        return {}
+    return {
+        value: round(count / total, 6)
+        for value, count in counts.items() if value != NO_DATA
+    }
+
+
+def add_class_histogram(asset: Asset, counts: Dict[Any, int]) -> None:
+    """Store class counts and fractions on an asset.
+
+    They are stored as `nlcd:class_counts` and `nlcd:class_fractions`
+    objects keyed by class value, in the order of `CLASSIFICATION_VALUES`,
+    so that items can be filtered by the classes their raster contains.
+
+    Args:
+        asset (Asset): The asset of the raster.
+        counts (Dict[Any, int]): Pixel counts of the raster keyed by class
+            value, as integers or strings.
+    """
+    int_counts = {int(value): count for value, count in counts.items()}
+    fractions = class_fractions(int_counts)
+    asset.extra_fields[CLASS_COUNTS_FIELD] = {
+        str(value): int_counts[value]
+        for value in ordered_classes(int_counts)
+    }
+    asset.extra_fields[CLASS_FRACTIONS_FIELD] = {
+        str(value): fractions[value]
+        for value in ordered_classes(fractions)
+    }
+
+
+def ordered_classes(values: Iterable[int]) -> List[int]:
+    """Class values in the order of `CLASSIFICATION_VALUES`, followed by any
+    other values in increasing order."""
+    values = {int(value) for value in values}
+    known = [value for value in CLASSIFICATION_VALUES if value in values]
+    return known + sorted(values - set(known))
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple, Union
+
+import fsspec
+from rasterio.windows import Window
+
+from stactools.usgs_nlcd.utils import is_local
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+COMPLETE = "complete"
+EMPTY = "empty"
+FAILED = "failed"
+
+# Number of tile records after which the manifest is saved.
+FLUSH_EVERY = 32
+
+
+class TileManifest:
+    """Record of the tile COGs created in an output directory.
+
+    The manifest is stored as JSON next to the tiles. Each tile is keyed by its
+    file name and records its window, the fingerprint of the source it was
+    cut from, the encoding profile, its output path, size, checksum and
+    status. The file is rewritten (atomically on local file systems) every
+    `flush_every` records and when the manifest is closed, including when a
+    run is interrupted by an exception, so an interrupted run leaves a
+    manifest describing the tiles finished before the interruption. Tiles
+    finished since the last save of a killed run are not recorded, and are
+    redone by the next run. The path can be any fsspec URL.
+
+    The manifest is a context manager, which closes it on exit.
+    """
+    def __init__(self, path: str, flush_every: int = FLUSH_EVERY) -> None:
+        self.path = path
+        self.flush_every = flush_every
+        self.tiles: Dict[str, Dict[str, Any]] = {}
+        self._unsaved = 0
+        self._fs, self._fs_path = fsspec.core.url_to_fs(path)
+        if self._fs.exists(self._fs_path):
+            with self._fs.open(self._fs_path, "r") as f:
+                self.tiles = json.load(f).get("tiles", {})
+
+    @classmethod
+    def in_directory(cls,
+                     output_directory: str,
+                     flush_every: int = FLUSH_EVERY) -> "TileManifest":
+        """Open the manifest of an output directory, creating it if missing."""
+        return cls(os.path.join(output_directory, MANIFEST_FILE_NAME),
+                   flush_every)
+
+    def __enter__(self) -> "TileManifest":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def is_done(self,
+                output_path: str,
+                window: Window,
+                source: str,
+                profile: str,
+                verify_checksums: bool = False) -> bool:
+        """Check whether a tile was completed with the same encoding profile,
+        or found empty, by a previous run on the same source.
+
+        A completed tile only counts as done if its file still exists with
+        the recorded size and, when `verify_checksums` is set, checksum.
+        Checking the checksums reads every tile again, so it is left to runs
+        after which tiles may have been corrupted without changing size.
+        """
+        entry = self.tiles.get(os.path.basename(output_path))
+        if (entry is None or entry["source"] != source
+                or entry["window"] != _window_list(window)):
+            return False
+        if entry["status"] == EMPTY:
+            return True
+        if entry["status"] != COMPLETE or entry["profile"] != profile:
+            return False
+        try:
+            if self._fs.size(_fs_path(output_path)) != entry["size"]:
+                return False
+        except (OSError, KeyError):
+            return False
+        if verify_checksums and file_checksum(
+                output_path) != entry["checksum"]:
+            logger.warning(f"Checksum mismatch for {output_path}")
+            return False
+        return True
+
+    def record(
+        self,
+        output_path: str,
+        window: Window,
+        source: str,
+        profile: str,
+        status: str,
+        size: Optional[int] = None,
+        checksum: Optional[str] = None,
+    ) -> None:
+        """Record the outcome of a tile, saving the manifest every
+        `flush_every` records."""
+        self.tiles[os.path.basename(output_path)] = {
+            "window": _window_list(window),
+            "source": source,
+            "profile": profile,
+            "path": output_path,
+            "size": size,
+            "checksum": checksum,
+            "status": status,
+        }
+        self._unsaved += 1
+        if self._unsaved >= self.flush_every:
+            self.save()
+
+    def close(self) -> None:
+        """Save the records not saved yet."""
+        if self._unsaved:
+            self.save()
+
+    def save(self) -> None:
+        content = json.dumps({"tiles": self.tiles}, indent=2, sort_keys=True)
+        if is_local(self.path):
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(content)
+            os.replace(tmp_path, self.path)
+        else:
+            # Object stores replace objects atomically.
+            with self._fs.open(self._fs_path, "w") as f:
+                f.write(content)
+        self._unsaved = 0
+
+
+def source_fingerprint(path: str) -> str:
+    """Cheap fingerprint of a source file, from its name, size and mtime."""
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def file_checksum(path: str) -> str:
+    """SHA-256 checksum of a file or fsspec URL, prefixed with the algorithm
+    name."""
+    sha256 = hashlib.sha256()
+    with fsspec.open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return f"sha256:{sha256.hexdigest()}"
+
+
+def file_record(path: str) -> Tuple[int, str]:
+    """Size and checksum of a file, as recorded in the manifest."""
+    fs, fs_path = fsspec.core.url_to_fs(path)
+    return fs.size(fs_path), file_checksum(path)
+
+
+def buffer_record(buffer: Union[bytes, memoryview]) -> Tuple[int, str]:
+    """Size and checksum of the content of a file held in memory."""
+    return len(buffer), f"sha256:{hashlib.sha256(buffer).hexdigest()}"
+
+
+def _fs_path(url: str) -> str:
+    return fsspec.core.url_to_fs(url)[1]
+
+
+def _window_list(window: Window) -> list:
+    return [
+        int(window.col_off),
+        int(window.row_off),
+        int(window.width),
+        int(window.height)
+    ]
@@ -0,0 +1,101 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+import rasterio
+
+
+class TileMetrics:
+    """Wall time per stage and bytes in and out for a single output file.
+
+    `input_bytes` counts the uncompressed pixel bytes read from the source, so
+    that the compression ratio compares like with like whatever the format of
+    the source is.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.stages: Dict[str, float] = {}
+        self.input_bytes = 0
+        self.output_bytes = 0
+
+    def stage(self, name: str) -> ContextManager[None]:
+        """Time a stage, adding to any time already spent in it."""
+        return _timed(self.stages, name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        ratio = compression_ratio(self.input_bytes, self.output_bytes)
+        return {
+            "path": self.path,
+            "stages": self.stages,
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "compression_ratio": ratio,
+        }
+
+
+class PipelineMetrics:
+    """Metrics of a COG pipeline run, aggregated from its `TileMetrics`.
+
+    Stage names used by `cog`:
+
+    - `plan`: planning the tiles of a run, including manifest checks.
+    - `emptiness_check`: ruling out empty tiles.
+    - `retile`: reading the window of a tile from the source.
+    - `overviews`: building the overviews of a tile.
+    - `translate`: encoding and writing a COG.
+    - `upload`: streaming a COG to a remote destination.
+    """
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.tiles: List[TileMetrics] = []
+        self._start = time.perf_counter()
+
+    def stage(self, name: str) -> ContextManager[None]:
+        """Time a run level stage, adding to any time already spent in it."""
+        return _timed(self.stages, name)
+
+    def add_tile(self, tile: TileMetrics) -> None:
+        self.tiles.append(tile)
+
+    def to_dict(self) -> Dict[str, Any]:
+        stages = dict(self.stages)
+        for tile in self.tiles:
+            for name, seconds in tile.stages.items():
+                stages[name] = stages.get(name, 0.0) + seconds
+        input_bytes = sum(tile.input_bytes for tile in self.tiles)
+        output_bytes = sum(tile.output_bytes for tile in self.tiles)
+        return {
+            "gdal_version": rasterio.__gdal_version__,
+            "rasterio_version": rasterio.__version__,
+            "run": {
+                "wall_time": time.perf_counter() - self._start,
+                "stages": stages,
+                "tile_count": len(self.tiles),
+                "input_bytes": input_bytes,
+                "output_bytes": output_bytes,
+                "compression_ratio": compression_ratio(input_bytes,
+                                                       output_bytes),
+            },
+            "tiles": [tile.to_dict() for tile in self.tiles],
+        }
+
+    def write(self, path: str) -> None:
+        """Write the report as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def compression_ratio(input_bytes: int, output_bytes: int) -> Optional[float]:
+    if not output_bytes:
+        return None
+    return input_bytes / output_bytes
+
+
+@contextmanager
+def _timed(stages: Dict[str, float], name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
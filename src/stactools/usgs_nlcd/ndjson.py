@@ -0,0 +1,98 @@
+import gzip
+import json
+import logging
+import sys
+from typing import IO, Any, Iterable, Optional, Union
+
+import fsspec
+from pystac import Item
+
+logger = logging.getLogger(__name__)
+
+# Path writing to the standard output.
+STDOUT = "-"
+
+# Gzip output is flushed every this many items, as every flush ends a
+# compressed block. Plain output is flushed after every item.
+GZIP_FLUSH_INTERVAL = 100
+
+
+class NdjsonWriter:
+    """Streams STAC items as newline-delimited JSON, one item per line.
+
+    Lines are flushed as items are written, so the output can be piped
+    straight into a bulk loader such as `pypgstac load items` while items are
+    still being created.
+    """
+    def __init__(self,
+                 path: str = STDOUT,
+                 compress: Optional[bool] = None) -> None:
+        """
+        Args:
+            path (str, optional): Local path or fsspec URL of the output
+                file, or `STDOUT`. Defaults to `STDOUT`.
+            compress (bool, optional): Gzip the output. Defaults to whether
+                `path` ends with `.gz`.
+        """
+        self.path = path
+        self.count = 0
+        if compress is None:
+            compress = path.endswith(".gz")
+        self._owns_target = path != STDOUT
+        self._target: IO[bytes]
+        if self._owns_target:
+            self._target = fsspec.open(path, "wb").open()
+        else:
+            self._target = sys.stdout.buffer
+        self._stream: Union[IO[bytes], gzip.GzipFile] = self._target
+        self._flush_interval = 1
+        if compress:
+            self._stream = gzip.GzipFile(fileobj=self._target, mode="wb")
+            self._flush_interval = GZIP_FLUSH_INTERVAL
+
+    def __enter__(self) -> "NdjsonWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def write(self, item: Item) -> None:
+        """Write an item as a line of JSON."""
+        line = json.dumps(item.to_dict(include_self_link=False),
+                          separators=(",", ":"))
+        self._stream.write(line.encode("utf-8") + b"\n")
+        self.count += 1
+        if self.count % self._flush_interval == 0:
+            self._stream.flush()
+
+    def close(self) -> None:
+        """Flush the remaining items, and close the output file."""
+        if self._stream is not self._target:
+            # Writes the gzip trailer, leaving the target open.
+            self._stream.close()
+        if self._owns_target:
+            self._target.close()
+        else:
+            self._target.flush()
+        logger.info(f"Wrote {self.count} items to {self.path}")
+
+
+def write_items(items: Iterable[Item],
+                path: str = STDOUT,
+                compress: Optional[bool] = None) -> int:
+    """Write STAC items as newline-delimited JSON.
+
+    Args:
+        items (Iterable[Item]): The items to write, consumed as they are
+            written.
+        path (str, optional): Local path or fsspec URL of the output file, or
+            `STDOUT`. Defaults to `STDOUT`.
+        compress (bool, optional): Gzip the output. Defaults to whether
+            `path` ends with `.gz`.
+    Returns:
+        int: The number of items written.
+    """
+    with NdjsonWriter(path, compress) as writer:
+        for item in items:
+            writer.write(item)
+    return writer.count
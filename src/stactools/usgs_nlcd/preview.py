@@ -0,0 +1,130 @@
+import logging
+import math
+import os
+import warnings
+from typing import Any, Dict, Optional
+
+import fsspec
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.errors import NotGeoreferencedWarning
+from rasterio.io import MemoryFile
+
+from stactools.usgs_nlcd.constants import NLCD_COLORMAP, NO_DATA
+
+logger = logging.getLogger(__name__)
+
+# GDAL driver and creation options, file extension and media type of each
+# preview format.
+PREVIEW_FORMATS: Dict[str, Dict[str, Any]] = {
+    "png": {
+        "driver": "PNG",
+        "options": {},
+        "extension": "png",
+        "media_type": "image/png",
+    },
+    "webp": {
+        "driver": "WEBP",
+        "options": {
+            "lossless": "YES"
+        },
+        "extension": "webp",
+        "media_type": "image/webp",
+    },
+}
+DEFAULT_PREVIEW_FORMAT = "png"
+
+# Largest width or height of the previews, in pixels.
+PREVIEW_MAX_SIZE = 512
+
+
+def preview_href(cog_href: str,
+                 preview_format: str = DEFAULT_PREVIEW_FORMAT,
+                 directory: Optional[str] = None) -> str:
+    """The href of the preview of a COG.
+
+    Args:
+        cog_href (str): Path to the COG.
+        preview_format (str, optional): One of `PREVIEW_FORMATS`. Defaults to
+            `DEFAULT_PREVIEW_FORMAT`.
+        directory (str, optional): Directory of the preview. Defaults to the
+            directory of the COG.
+    Returns:
+        str: The href of the preview, named after the COG.
+    """
+    extension = PREVIEW_FORMATS[preview_format]["extension"]
+    stem = os.path.splitext(os.path.basename(cog_href))[0]
+    if directory is None:
+        directory = os.path.dirname(cog_href)
+    return os.path.join(directory, f"{stem}.preview.{extension}")
+
+
+def create_preview(href: str,
+                   destination: str,
+                   preview_format: str = DEFAULT_PREVIEW_FORMAT,
+                   max_size: int = PREVIEW_MAX_SIZE) -> str:
+    """Render a small image of an NLCD raster with the NLCD class colors.
+
+    Only the smallest overview of the raster is read, so the cost does not
+    depend on the size of the raster if it has overviews, as COGs do. No data
+    is transparent.
+
+    Args:
+        href (str): Path to the raster, as readable by rasterio.
+        destination (str): Local path or fsspec URL of the image.
+        preview_format (str, optional): One of `PREVIEW_FORMATS`. Defaults to
+            `DEFAULT_PREVIEW_FORMAT`.
+        max_size (int, optional): Largest width or height of the image.
+            Defaults to `PREVIEW_MAX_SIZE`.
+    Returns:
+        str: The media type of the image.
+    """
+    if preview_format not in PREVIEW_FORMATS:
+        raise ValueError(
+            f"Unknown preview format {preview_format}, expected one of "
+            f"{', '.join(PREVIEW_FORMATS)}")
+    preview = PREVIEW_FORMATS[preview_format]
+    with rasterio.open(href) as dataset:
+        factor = max(dataset.overviews(1), default=1)
+        factor = max(factor, math.ceil(max(dataset.shape) / max_size))
+        out_shape = (math.ceil(dataset.height / factor),
+                     math.ceil(dataset.width / factor))
+        data = dataset.read(1,
+                            out_shape=out_shape,
+                            resampling=Resampling.nearest)
+        nodata = NO_DATA if dataset.nodata is None else int(dataset.nodata)
+
+    rgba = colorize(data, nodata)
+    with warnings.catch_warnings(), MemoryFile() as memory_file:
+        # Previews are plain images.
+        warnings.simplefilter("ignore", NotGeoreferencedWarning)
+        with memory_file.open(driver=preview["driver"],
+                              width=out_shape[1],
+                              height=out_shape[0],
+                              count=4,
+                              dtype=np.uint8,
+                              **preview["options"]) as image:
+            image.write(rgba)
+        with fsspec.open(destination, "wb") as f:
+            f.write(memory_file.read())
+    logger.info(f"Wrote a {out_shape[1]}x{out_shape[0]} preview of {href} "
+                f"to {destination}")
+    return str(preview["media_type"])
+
+
+def colorize(data: np.ndarray, nodata: int = NO_DATA) -> np.ndarray:
+    """Color NLCD classes with `NLCD_COLORMAP`.
+
+    Args:
+        data (np.ndarray): A 2D array of NLCD classes.
+        nodata (int, optional): The no data value, made transparent. Defaults
+            to `NO_DATA`.
+    Returns:
+        np.ndarray: An array of shape (4, height, width) of RGBA bands.
+    """
+    lookup = np.zeros((256, 4), dtype=np.uint8)
+    for value, color in NLCD_COLORMAP.items():
+        lookup[value] = (*color, 255)
+    lookup[nodata, 3] = 0
+    return np.moveaxis(lookup[data], -1, 0)
@@ -1,18 +1,34 @@
+import asyncio
 import logging
 import os.path
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, List, Optional
+from functools import lru_cache
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
-import fsspec
 import rasterio
-from pyproj import CRS, Proj
+from pyproj import Transformer
 from pystac import (
     Asset,
     CatalogType,
     Collection,
     Extent,
     Item,
+    Link,
     MediaType,
     SpatialExtent,
     TemporalExtent,
@@ -32,8 +48,12 @@ from pystac.extensions.raster import (
     RasterExtension,
     Sampling,
 )
-from stactools.core.io import ReadHrefModifier
+from pystac.utils import datetime_to_str
+from shapely.geometry import shape
+from stactools.core.io import ReadHrefModifier, use_fsspec
 
+from stactools.usgs_nlcd import histogram, preview, tiff
+from stactools.usgs_nlcd.cache import MetadataCache, file_version
 from stactools.usgs_nlcd.constants import (
     CLASSIFICATION_VALUES,
     DELTA_DICT,
@@ -51,27 +71,449 @@ from stactools.usgs_nlcd.constants import (
     THUMBNAIL_HREF,
     TITLE,
 )
+from stactools.usgs_nlcd.footprint import data_footprint
+from stactools.usgs_nlcd.utils import bounded_map
 
 logger = logging.getLogger(__name__)
 
+# Read and write STAC objects through fsspec, so that any fsspec URL can be
+# used. Done here rather than when the package is imported, which is kept
+# free of heavy imports.
+use_fsspec()
+
+# GDAL configuration for reading COG headers, possibly over HTTP.
+GDAL_ENV_OPTIONS = {
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+    "GDAL_HTTP_MULTIPLEX": "YES",
+    "GDAL_HTTP_VERSION": "2",
+}
+
+FILE_VALUES: List[Dict[str, Any]] = [{
+    "values": [value],
+    "summary": summary
+} for value, summary in CLASSIFICATION_VALUES.items()]
+
 
 def create_item(
     cog_href: str,
     cog_href_modifier: Optional[ReadHrefModifier] = None,
+    cache: Optional[MetadataCache] = None,
+    class_histogram: bool = False,
+    footprint: bool = False,
+    preview_format: Optional[str] = None,
+    preview_dir: Optional[str] = None,
 ) -> Item:
     """Creates a STAC Item
     Args:
         cog_href (str): Path to COG asset.
             The COG should be created in advance using `cog.create_cog`
         cog_href_modifier (ReadHrefModifier, optional): Modifier for access to cog_href
+        cache (MetadataCache, optional): Cache of the facts read from COGs,
+            used if the COG is unchanged since they were cached
+        class_histogram (bool, optional): Count the pixels of each class in
+            the COG, storing the counts and fractions on the COG asset (see
+            `histogram.add_class_histogram`). This reads the whole COG.
+        footprint (bool, optional): Use the footprint of the data of the COG
+            as the geometry of the item, instead of its bounds (see
+            `footprint.data_footprint`). This reads a small overview.
+        preview_format (str, optional): Render a preview of the COG in this
+            format, one of `preview.PREVIEW_FORMATS`, added as the thumbnail
+            asset of the item (see `preview.create_preview`). This reads the
+            smallest overview.
+        preview_dir (str, optional): Directory of the preview. Defaults to
+            the directory of the COG.
+    Returns:
+        Item: STAC Item object
+    """
+    facts = _cached_facts(cog_href,
+                          cog_href_modifier,
+                          cache,
+                          class_histogram,
+                          histogram_workers=4,
+                          footprint=footprint)
+    if preview_format is not None:
+        _add_preview(facts, cog_href, cog_href_modifier, preview_format,
+                     preview_dir)
+    return _create_item(cog_href, facts)
+
+
+def create_items(
+    cog_hrefs: Iterable[str],
+    cog_href_modifier: Optional[ReadHrefModifier] = None,
+    workers: int = 8,
+    on_error: Optional[Callable[[str, Exception], None]] = None,
+    cache: Optional[MetadataCache] = None,
+    class_histogram: bool = False,
+    footprint: bool = False,
+    preview_format: Optional[str] = None,
+    preview_dir: Optional[str] = None,
+) -> Iterator[Item]:
+    """Creates STAC Items for many COGs
+
+    The COG headers are read concurrently on a pool of threads, all using
+    `GDAL_ENV_OPTIONS`, while the parts common to all items are computed only
+    once. Items are yielded in the order of `cog_hrefs` as soon as they are
+    ready, so the hrefs can be a lazy iterable of any length.
+
+    Args:
+        cog_hrefs (Iterable[str]): Paths to COG assets.
+        cog_href_modifier (ReadHrefModifier, optional): Modifier for access to
+            the COGs
+        workers (int, optional): Number of threads reading COG headers.
+            Defaults to 8.
+        on_error (Callable[[str, Exception], None], optional): Called with the
+            href and the exception when an item cannot be created, in which
+            case that item is skipped. By default the exception is raised.
+        cache (MetadataCache, optional): Cache of the facts read from COGs,
+            used for the COGs unchanged since they were cached
+        class_histogram (bool, optional): Count the pixels of each class in
+            the COGs, each COG on one of the threads.
+        footprint (bool, optional): Use the footprints of the data of the
+            COGs as the geometries of the items.
+        preview_format (str, optional): Render previews of the COGs in this
+            format, each COG on one of the threads.
+        preview_dir (str, optional): Directory of the previews. Defaults to
+            the directories of the COGs.
+    Returns:
+        Iterator[Item]: STAC Item objects
+    """
+    def read(cog_href: str) -> Dict[str, Any]:
+        # rasterio environments are thread local.
+        with rasterio.Env(**GDAL_ENV_OPTIONS):
+            facts = _cached_facts(cog_href,
+                                  cog_href_modifier,
+                                  cache,
+                                  class_histogram,
+                                  footprint=footprint)
+            if preview_format is not None:
+                _add_preview(facts, cog_href, cog_href_modifier,
+                             preview_format, preview_dir)
+            return facts
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for cog_href, future in bounded_map(executor, read, cog_hrefs,
+                                            2 * workers):
+            try:
+                item = _create_item(cog_href, future.result())
+            except Exception as e:
+                if on_error is None:
+                    raise
+                logger.error(f"Failed to create item for {cog_href}")
+                on_error(cog_href, e)
+                continue
+            yield item
+
+
+async def create_item_async(
+    cog_href: str,
+    cog_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Any = None,
+    cache: Optional[MetadataCache] = None,
+    class_histogram: bool = False,
+    footprint: bool = False,
+    preview_format: Optional[str] = None,
+    preview_dir: Optional[str] = None,
+) -> Item:
+    """Creates a STAC Item without blocking the event loop
+
+    The COG header is read with `session`. Cache lookups, class histograms,
+    footprints and previews, which use blocking I/O, run in the default
+    executor.
+
+    Args:
+        cog_href (str): Path to COG asset.
+            The COG should be created in advance using `cog.create_cog`
+        cog_href_modifier (ReadHrefModifier, optional): Modifier for access to cog_href
+        session (aiohttp.ClientSession, optional): HTTP session to read the
+            COG header with. By default a session is opened for this item
+            only.
+        cache (MetadataCache, optional): Cache of the facts read from COGs,
+            used if the COG is unchanged since they were cached
+        class_histogram (bool, optional): Count the pixels of each class in
+            the COG, as in `create_item`.
+        footprint (bool, optional): Use the footprint of the data of the COG
+            as the geometry of the item, as in `create_item`.
+        preview_format (str, optional): Render a preview of the COG in this
+            format, as in `create_item`.
+        preview_dir (str, optional): Directory of the preview. Defaults to
+            the directory of the COG.
     Returns:
         Item: STAC Item object
     """
+    loop = asyncio.get_running_loop()
+    access_href = _access_href(cog_href, cog_href_modifier)
+    facts, version = None, None
+    if cache is not None:
+        facts, version = await loop.run_in_executor(None, _lookup_facts,
+                                                    cog_href, access_href,
+                                                    cache)
+    updated = facts is None
+    if facts is None:
+        if session is None:
+            session = await _open_http_session(1)
+            try:
+                facts = await read_cog_facts_async(access_href, session)
+            finally:
+                await session.close()
+        else:
+            facts = await read_cog_facts_async(access_href, session)
+
+    def complete(facts: Dict[str, Any]) -> Dict[str, Any]:
+        with rasterio.Env(**GDAL_ENV_OPTIONS):
+            facts = _complete_cached_facts(facts, cog_href, access_href, cache,
+                                           version, updated, class_histogram,
+                                           1, footprint)
+            if preview_format is not None:
+                _add_preview(facts, cog_href, cog_href_modifier,
+                             preview_format, preview_dir)
+            return facts
+
+    if (cache is not None or class_histogram or footprint
+            or preview_format is not None):
+        facts = await loop.run_in_executor(None, complete, facts)
+    return _create_item(cog_href, facts)
+
+
+async def create_items_async(
+    cog_hrefs: Iterable[str],
+    cog_href_modifier: Optional[ReadHrefModifier] = None,
+    concurrency: int = 64,
+    on_error: Optional[Callable[[str, Exception], None]] = None,
+    cache: Optional[MetadataCache] = None,
+    class_histogram: bool = False,
+    footprint: bool = False,
+    preview_format: Optional[str] = None,
+    preview_dir: Optional[str] = None,
+) -> AsyncIterator[Item]:
+    """Creates STAC Items for many COGs, reading their headers concurrently
+
+    All the COG headers are read through one asynchronous fsspec
+    `HTTPFileSystem` session, which keeps up to `concurrency` requests in
+    flight over reused connections. This suits remote COGs, signed with
+    `cog_href_modifier` for instance, for which each header read is a round
+    trip of its own.
+
+    Like `create_items`, this is lazy: at most `concurrency` items are being
+    created at once, and the next href is taken from `cog_hrefs` only when
+    an item is yielded, so the hrefs can be an iterable of any length and
+    memory does not grow with it. The work done in the default executor (see
+    `create_item_async`) is also bounded by the size of its thread pool.
+
+    Args:
+        cog_hrefs (Iterable[str]): Paths to COG assets.
+        cog_href_modifier (ReadHrefModifier, optional): Modifier for access to
+            the COGs
+        concurrency (int, optional): Maximum number of items created at once.
+            Defaults to 64.
+        on_error (Callable[[str, Exception], None], optional): Called with the
+            href and the exception when an item cannot be created, in which
+            case that item is skipped. By default the exception is raised.
+        cache (MetadataCache, optional): Cache of the facts read from COGs,
+            used for the COGs unchanged since they were cached
+        class_histogram (bool, optional): Count the pixels of each class in
+            the COGs.
+        footprint (bool, optional): Use the footprints of the data of the
+            COGs as the geometries of the items.
+        preview_format (str, optional): Render previews of the COGs in this
+            format.
+        preview_dir (str, optional): Directory of the previews. Defaults to
+            the directories of the COGs.
+    Returns:
+        AsyncIterator[Item]: STAC Item objects, in the order of `cog_hrefs`
+    """
+    session = await _open_http_session(concurrency)
+    pending: Deque[Tuple[str, "asyncio.Future[Item]"]] = deque()
+
+    async def next_item() -> Optional[Item]:
+        cog_href, task = pending.popleft()
+        try:
+            return await task
+        except Exception as e:
+            if on_error is None:
+                raise
+            logger.error(f"Failed to create item for {cog_href}")
+            on_error(cog_href, e)
+            return None
+
+    try:
+        for cog_href in cog_hrefs:
+            future = asyncio.ensure_future(
+                create_item_async(cog_href,
+                                  cog_href_modifier,
+                                  session,
+                                  cache=cache,
+                                  class_histogram=class_histogram,
+                                  footprint=footprint,
+                                  preview_format=preview_format,
+                                  preview_dir=preview_dir))
+            pending.append((cog_href, future))
+            if len(pending) >= concurrency:
+                item = await next_item()
+                if item is not None:
+                    yield item
+        while pending:
+            item = await next_item()
+            if item is not None:
+                yield item
+    finally:
+        for _, task in pending:
+            task.cancel()
+        await session.close()
+
+
+async def _open_http_session(connections: int) -> Any:
+    # aiohttp is only needed, through fsspec, by the asynchronous API.
+    import aiohttp
+    from fsspec.implementations.http import HTTPFileSystem
+
+    fs = HTTPFileSystem(
+        asynchronous=True,
+        skip_instance_cache=True,
+        client_kwargs={
+            "connector": aiohttp.TCPConnector(limit=connections),
+        },
+    )
+    return await fs.set_session()
+
+
+def read_cog_facts(cog_access_href: str) -> Dict[str, Any]:
+    """Reads the facts about a COG that its STAC Item is made from
+
+    The facts are parsed from the TIFF header, which a single range read of
+    the start of the file also returning the file size provides. Files whose
+    header cannot be parsed that way are opened with GDAL instead.
+
+    Args:
+        cog_access_href (str): Path to the COG, as readable by rasterio and
+            fsspec.
+    Returns:
+        Dict[str, Any]: The `bbox` (in EPSG:4326), `proj_bbox`, `transform`
+            and `shape` of the COG, and its `size` in bytes if known.
+    """
+    header, size = tiff.read_header(cog_access_href)
+    facts = tiff.parse_geotiff_header(header)
+    if facts is None:
+        logger.debug(f"Reading {cog_access_href} with GDAL")
+        facts = _read_cog_facts_with_gdal(cog_access_href)
+    return _complete_facts(facts, size)
+
+
+async def read_cog_facts_async(cog_access_href: str,
+                               session: Any) -> Dict[str, Any]:
+    """Reads the facts about a COG without blocking the event loop
+
+    The asynchronous counterpart of `read_cog_facts`, reading the TIFF header
+    with `session`. The GDAL fallback runs in the default executor.
+
+    Args:
+        cog_access_href (str): Path to the COG, as readable by rasterio and
+            fsspec.
+        session (aiohttp.ClientSession): HTTP session to read the header with.
+    Returns:
+        Dict[str, Any]: The same facts as `read_cog_facts`.
+    """
+    header, size = await tiff.read_header_async(cog_access_href, session)
+    facts = tiff.parse_geotiff_header(header)
+    if facts is None:
+        logger.debug(f"Reading {cog_access_href} with GDAL")
+        facts = await asyncio.get_running_loop().run_in_executor(
+            None, _read_cog_facts_with_gdal, cog_access_href)
+    return _complete_facts(facts, size)
+
+
+def _cached_facts(cog_href: str,
+                  cog_href_modifier: Optional[ReadHrefModifier],
+                  cache: Optional[MetadataCache],
+                  class_histogram: bool = False,
+                  histogram_workers: int = 1,
+                  footprint: bool = False) -> Dict[str, Any]:
+    access_href = _access_href(cog_href, cog_href_modifier)
+    facts, version = None, None
+    if cache is not None:
+        facts, version = _lookup_facts(cog_href, access_href, cache)
+    updated = facts is None
+    if facts is None:
+        facts = read_cog_facts(access_href)
+    return _complete_cached_facts(facts, cog_href, access_href, cache, version,
+                                  updated, class_histogram, histogram_workers,
+                                  footprint)
+
+
+def _lookup_facts(
+        cog_href: str, access_href: str,
+        cache: MetadataCache) -> Tuple[Optional[Dict[str, Any]], str]:
+    # Keyed by the unmodified href, which stays the same when signed URLs
+    # are not.
+    version = file_version(access_href)
+    return cache.get(cog_href, version), version
+
+
+def _complete_cached_facts(facts: Dict[str, Any], cog_href: str,
+                           access_href: str, cache: Optional[MetadataCache],
+                           version: Optional[str], updated: bool,
+                           class_histogram: bool, histogram_workers: int,
+                           footprint: bool) -> Dict[str, Any]:
+    if class_histogram and "class_counts" not in facts:
+        counts = histogram.class_counts(access_href, histogram_workers)
+        facts["class_counts"] = {
+            str(value): count
+            for value, count in counts.items()
+        }
+        updated = True
+    if footprint and "footprint" not in facts:
+        # None for COGs without data.
+        facts["footprint"] = data_footprint(access_href)
+        updated = True
+    if cache is not None and version is not None and updated:
+        cache.put(cog_href, version, facts)
+    if not class_histogram:
+        facts.pop("class_counts", None)
+    if not footprint:
+        facts.pop("footprint", None)
+    return facts
+
+
+def _add_preview(facts: Dict[str, Any], cog_href: str,
+                 cog_href_modifier: Optional[ReadHrefModifier],
+                 preview_format: str, preview_dir: Optional[str]) -> None:
+    # Previews are files of their own, so they are not cached with the facts.
+    href = preview.preview_href(cog_href, preview_format, preview_dir)
+    media_type = preview.create_preview(
+        _access_href(cog_href, cog_href_modifier), href, preview_format)
+    facts["preview"] = {"href": href, "media_type": media_type}
+
+
+def _complete_facts(facts: Dict[str, Any],
+                    size: Optional[int]) -> Dict[str, Any]:
+    facts["bbox"] = list(_transformer().transform_bounds(*facts["proj_bbox"]))
+    facts["size"] = size
+    return facts
+
+
+def _read_cog_facts_with_gdal(cog_access_href: str) -> Dict[str, Any]:
+    env = rasterio.Env(**GDAL_ENV_OPTIONS)
+    with env, rasterio.open(cog_access_href) as dataset:
+        return {
+            "proj_bbox": list(dataset.bounds),
+            "transform": list(dataset.transform),
+            "shape": [dataset.height, dataset.width],
+        }
+
+
+@lru_cache(maxsize=None)
+def _transformer() -> Transformer:
+    return Transformer.from_crs(NLCD_EPSG, 4326, always_xy=True)
+
+
+def _access_href(cog_href: str,
+                 cog_href_modifier: Optional[ReadHrefModifier]) -> str:
     if cog_href_modifier is not None:
-        cog_access_href = cog_href_modifier(cog_href)
-    else:
-        cog_access_href = cog_href
+        return cog_href_modifier(cog_href)
+    return cog_href
 
+
+def _create_item(cog_href: str, facts: Dict[str, Any]) -> Item:
     match = re.match(
         r"nlcd_(\d\d\d\d)_land_cover_l48_(\d*)_(\d\d)_(\d\d)\.tif",
         os.path.basename(cog_href))
@@ -99,19 +541,7 @@ def create_item(
     start_datetime = datetime(int(year_str), 1, 1)
     end_datetime = DELTA_DICT[int(year_str)]
 
-    with rasterio.open(cog_access_href) as dataset:
-        cog_bbox = list(dataset.bounds)
-        cog_transform = list(dataset.transform)
-        cog_shape = [dataset.height, dataset.width]
-
-        transformer = Proj.from_crs(CRS.from_epsg(NLCD_EPSG),
-                                    CRS.from_epsg(4326),
-                                    always_xy=True)
-        bbox = list(
-            transformer.transform_bounds(dataset.bounds.left,
-                                         dataset.bounds.bottom,
-                                         dataset.bounds.right,
-                                         dataset.bounds.top))
+    bbox = facts["bbox"]
     geom = {
         "type":
         "Polygon",
@@ -119,6 +549,9 @@ def create_item(
                          [bbox[2], bbox[3]], [bbox[0], bbox[3]],
                          [bbox[0], bbox[1]]]]
     }
+    if facts.get("footprint") is not None:
+        geom = facts["footprint"]
+        bbox = list(shape(geom).bounds)
     # Create the item
     item = Item(id=id,
                 properties=properties,
@@ -135,9 +568,9 @@ def create_item(
     item_projection.epsg = NLCD_EPSG
     item_projection.wkt2 = NLCD_CRS_WKT
 
-    item_projection.bbox = cog_bbox
-    item_projection.transform = cog_transform
-    item_projection.shape = cog_shape
+    item_projection.bbox = facts["proj_bbox"]
+    item_projection.transform = facts["transform"]
+    item_projection.shape = facts["shape"]
 
     item_label = LabelExtension.ext(item, add_if_missing=True)
     item_label.label_type = LabelType.RASTER
@@ -177,15 +610,22 @@ def create_item(
     # File Extension
     cog_asset_file = FileExtension.ext(cog_asset, add_if_missing=True)
     # The following odd type annotation is needed
-    mapping: List[Any] = [{
-        "values": [value],
-        "summary": summary
-    } for value, summary in CLASSIFICATION_VALUES.items()]
+    mapping: List[Any] = [dict(value) for value in FILE_VALUES]
     cog_asset_file.values = mapping
-    with fsspec.open(cog_access_href) as file:
-        size = file.size
-        if size is not None:
-            cog_asset_file.size = size
+    if facts["size"] is not None:
+        cog_asset_file.size = facts["size"]
+    if "class_counts" in facts:
+        histogram.add_class_histogram(cog_asset, facts["class_counts"])
+    if "preview" in facts:
+        item.add_asset(
+            "thumbnail",
+            Asset(
+                href=facts["preview"]["href"],
+                media_type=facts["preview"]["media_type"],
+                roles=["thumbnail"],
+                title="USGS Land Cover preview",
+            ),
+        )
     # Raster Extension
     cog_asset_raster = RasterExtension.ext(cog_asset, add_if_missing=True)
     cog_asset_raster.bands = [
@@ -293,3 +733,109 @@ def create_collection(thumbnail_url: str = THUMBNAIL_HREF) -> Collection:
     collection.add_link(LICENSE_LINK)
 
     return collection
+
+
+def save_item_in_collection(item: Item, collection: Collection) -> None:
+    """Saves an item of a collection and links it from the collection.
+
+    The item is saved where `Collection.normalize_hrefs` would place it,
+    next to the collection, which must have a self href. The collection only
+    links to the item by href, without keeping the item itself, so that many
+    items can be added to a collection one at a time without holding them
+    all in memory.
+
+    Args:
+        item (Item): The item to save.
+        collection (Collection): The collection of the item.
+    """
+    collection_href = collection.get_self_href()
+    if collection_href is None:
+        raise ValueError("The collection must have a self href")
+    item_href = os.path.join(os.path.dirname(collection_href), item.id,
+                             f"{item.id}.json")
+    item.set_self_href(item_href)
+    item.set_root(collection)
+    item.set_parent(collection)
+    item.set_collection(collection)
+    item.save_object(include_self_link=False)
+    # Setting the root caches the item in the collection, which would then
+    # hold every item saved; unset it to drop the item from that cache.
+    item.set_root(None)
+    collection.add_link(Link("item", item_href, media_type=MediaType.JSON))
+
+
+class CollectionSummary:
+    """Extent and summaries of a collection, accumulated one item at a time.
+
+    Only the running bounds and the few distinct values summarized are
+    kept, not the items, so any number of items (as from `create_items`) can
+    be summarized in one pass with constant memory, for instance while they
+    are being written out:
+
+        summary = CollectionSummary()
+        for item in summary.summarize(create_items(cog_hrefs)):
+            item.save_object(...)
+        collection = create_collection()
+        summary.update_collection(collection)
+    """
+    def __init__(self) -> None:
+        self.count = 0
+        self.bbox: Optional[List[float]] = None
+        self.start_datetime: Optional[datetime] = None
+        self.end_datetime: Optional[datetime] = None
+        self.datetimes: Set[datetime] = set()
+        self.epsgs: Set[int] = set()
+
+    def add(self, item: Item) -> None:
+        """Include an item in the extent and summaries."""
+        self.count += 1
+        if item.bbox is not None:
+            if self.bbox is None:
+                self.bbox = list(item.bbox)
+            else:
+                self.bbox = [
+                    min(self.bbox[0], item.bbox[0]),
+                    min(self.bbox[1], item.bbox[1]),
+                    max(self.bbox[2], item.bbox[2]),
+                    max(self.bbox[3], item.bbox[3]),
+                ]
+        start = item.common_metadata.start_datetime or item.datetime
+        end = item.common_metadata.end_datetime or item.datetime
+        if start is not None and (self.start_datetime is None
+                                  or start < self.start_datetime):
+            self.start_datetime = start
+        if end is not None and (self.end_datetime is None
+                                or end > self.end_datetime):
+            self.end_datetime = end
+        if item.datetime is not None:
+            self.datetimes.add(item.datetime)
+        epsg = ProjectionExtension.ext(item).epsg
+        if epsg is not None:
+            self.epsgs.add(epsg)
+
+    def summarize(self, items: Iterable[Item]) -> Iterator[Item]:
+        """Include each item in the extent and summaries as it is yielded."""
+        for item in items:
+            self.add(item)
+            yield item
+
+    def update_collection(self, collection: Collection) -> None:
+        """Set the extent of a collection, and its `datetime` and `proj:epsg`
+        summaries, to those of the items added.
+
+        Nothing is changed if no items were added.
+        """
+        if self.count == 0:
+            return
+        bboxes = ([self.bbox] if self.bbox is not None else
+                  collection.extent.spatial.bboxes)
+        collection.extent = Extent(
+            SpatialExtent(bboxes),
+            TemporalExtent([[self.start_datetime, self.end_datetime]]),
+        )
+        collection.summaries.add(
+            "datetime",
+            [datetime_to_str(value) for value in sorted(self.datetimes)])
+        collection_proj = ProjectionExtension.summaries(collection,
+                                                        add_if_missing=True)
+        collection_proj.epsg = sorted(self.epsgs)
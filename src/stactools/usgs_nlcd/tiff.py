@@ -0,0 +1,244 @@
+"""Minimal GeoTIFF header parsing, for reading COG metadata with a single
+range request instead of a full GDAL dataset open."""
+import asyncio
+import re
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import fsspec
+import requests
+from fsspec.implementations.local import LocalFileSystem
+
+# COGs keep all their IFDs at the start of the file. For the tile sizes of
+# this package they fit in well under this many bytes.
+HEADER_BYTES = 16384
+
+# Seconds to wait for an HTTP server to connect, and between bytes sent.
+HTTP_TIMEOUT = 30
+
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+MODEL_PIXEL_SCALE = 33550
+MODEL_TIEPOINT = 33922
+MODEL_TRANSFORMATION = 34264
+GEO_KEY_DIRECTORY = 34735
+
+GT_RASTER_TYPE_GEO_KEY = 1025
+RASTER_PIXEL_IS_AREA = 1
+
+# TIFF field types: struct format and size in bytes.
+FIELD_TYPES = {
+    1: ("B", 1),
+    2: ("c", 1),
+    3: ("H", 2),
+    4: ("I", 4),
+    5: ("II", 8),
+    6: ("b", 1),
+    7: ("B", 1),
+    8: ("h", 2),
+    9: ("i", 4),
+    10: ("ii", 8),
+    11: ("f", 4),
+    12: ("d", 8),
+    16: ("Q", 8),
+    17: ("q", 8),
+    18: ("Q", 8),
+}
+
+_TAGS = {
+    IMAGE_WIDTH, IMAGE_LENGTH, MODEL_PIXEL_SCALE, MODEL_TIEPOINT,
+    MODEL_TRANSFORMATION, GEO_KEY_DIRECTORY
+}
+
+
+def read_header(href: str,
+                length: int = HEADER_BYTES) -> Tuple[bytes, Optional[int]]:
+    """Read the first bytes of a file, and its size, in one request.
+
+    HTTP(S) URLs are read with a single ranged GET, the size coming from its
+    Content-Range header. At most `length` bytes are downloaded, even from
+    servers ignoring the range. Other hrefs are read through fsspec with a
+    single ranged read; their size is only returned for local files.
+
+    Args:
+        href (str): Path or URL of the file.
+        length (int, optional): Number of bytes to read. Defaults to
+            `HEADER_BYTES`.
+    Returns:
+        Tuple[bytes, Optional[int]]: The bytes read and the size of the file,
+            if known.
+    """
+    if href.startswith(("http://", "https://")):
+        with requests.get(href,
+                          headers={"Range": f"bytes=0-{length - 1}"},
+                          stream=True,
+                          timeout=HTTP_TIMEOUT) as response:
+            response.raise_for_status()
+            # A server ignoring the range sends the whole file; stop reading
+            # after the header.
+            data = b""
+            for chunk in response.iter_content(chunk_size=length):
+                data += chunk
+                if len(data) >= length:
+                    break
+            return data[:length], content_size(response.status_code,
+                                               response.headers)
+    fs, path = fsspec.core.url_to_fs(href)
+    # A single ranged read, without the read-ahead of fsspec files. It does not
+    # return the size, which would take another request on remote file
+    # systems, so the size is only read from local ones.
+    data = fs.cat_file(path, start=0, end=length)
+    size = fs.size(path) if isinstance(fs, LocalFileSystem) else None
+    return data, size
+
+
+async def read_header_async(
+        href: str,
+        session: Any,
+        length: int = HEADER_BYTES) -> Tuple[bytes, Optional[int]]:
+    """Read the first bytes of a file, and its size, without blocking.
+
+    The asynchronous counterpart of `read_header`. HTTP(S) URLs are read with
+    a single ranged GET made with `session`, so that connections are reused
+    across calls. Other hrefs are read by `read_header` in the default
+    executor of the event loop.
+
+    Args:
+        href (str): Path or URL of the file.
+        session (aiohttp.ClientSession): The HTTP session, as provided by
+            the `set_session` method of an asynchronous fsspec
+            `HTTPFileSystem`.
+        length (int, optional): Number of bytes to read. Defaults to
+            `HEADER_BYTES`.
+    Returns:
+        Tuple[bytes, Optional[int]]: The bytes read and the size of the file,
+            if known.
+    """
+    if href.startswith(("http://", "https://")):
+        async with session.get(href,
+                               headers={"Range":
+                                        f"bytes=0-{length - 1}"}) as response:
+            response.raise_for_status()
+            # A server ignoring the range sends the whole file; stop reading
+            # after the header.
+            data = b""
+            while len(data) < length:
+                chunk = await response.content.read(length - len(data))
+                if not chunk:
+                    break
+                data += chunk
+            return data, content_size(response.status, response.headers)
+    return await asyncio.get_running_loop().run_in_executor(
+        None, read_header, href, length)
+
+
+def content_size(status: int, headers: Any) -> Optional[int]:
+    """Size of a file from the headers of a (possibly ranged) HTTP response."""
+    if status == 206:
+        match = re.match(r"bytes \d+-\d+/(\d+)",
+                         headers.get("Content-Range", ""))
+        return int(match.group(1)) if match else None
+    length = headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def parse_geotiff_header(data: bytes) -> Optional[Dict[str, Any]]:
+    """Georeferencing of a GeoTIFF from the bytes at the start of the file.
+
+    Only north-up rasters georeferenced with a single tie point and pixel
+    scale, or a model transformation, and using PixelIsArea are handled.
+    `None` is returned for anything else, or if the first IFD or the values
+    it points to are not all within `data`, so that callers can fall back to
+    GDAL.
+
+    Args:
+        data (bytes): The first bytes of the file.
+    Returns:
+        Optional[Dict[str, Any]]: The `shape` ([height, width]), `transform`
+            (as the 9 coefficients of an affine matrix, like
+            `list(dataset.transform)`) and `proj_bbox` of the raster.
+    """
+    try:
+        tags = _read_first_ifd(data)
+    except (struct.error, KeyError):
+        return None
+    if tags is None or IMAGE_WIDTH not in tags or IMAGE_LENGTH not in tags:
+        return None
+    width, height = tags[IMAGE_WIDTH][0], tags[IMAGE_LENGTH][0]
+
+    geo_keys = tags.get(GEO_KEY_DIRECTORY)
+    if geo_keys is not None:
+        raster_type = _geo_key(geo_keys, GT_RASTER_TYPE_GEO_KEY)
+        if raster_type not in (None, RASTER_PIXEL_IS_AREA):
+            return None
+
+    if MODEL_TRANSFORMATION in tags:
+        m = tags[MODEL_TRANSFORMATION]
+        a, b, c, d, e, f = m[0], m[1], m[3], m[4], m[5], m[7]
+    elif MODEL_TIEPOINT in tags and MODEL_PIXEL_SCALE in tags:
+        tiepoint = tags[MODEL_TIEPOINT]
+        if len(tiepoint) != 6:
+            return None
+        i, j, _, x, y, _ = tiepoint
+        scale_x, scale_y = tags[MODEL_PIXEL_SCALE][:2]
+        a, b, c = scale_x, 0.0, x - i * scale_x
+        d, e, f = 0.0, -scale_y, y + j * scale_y
+    else:
+        return None
+    if b != 0 or d != 0:
+        return None
+
+    xs = [c, c + a * width]
+    ys = [f, f + e * height]
+    return {
+        "shape": [height, width],
+        "transform": [a, b, c, d, e, f, 0.0, 0.0, 1.0],
+        "proj_bbox": [min(xs), min(ys), max(xs),
+                      max(ys)],
+    }
+
+
+def _read_first_ifd(data: bytes) -> Optional[Dict[int, List[Any]]]:
+    byte_order = {b"II": "<", b"MM": ">"}[data[:2]]
+    (version, ) = struct.unpack_from(f"{byte_order}H", data, 2)
+    if version == 42:
+        (ifd_offset, ) = struct.unpack_from(f"{byte_order}I", data, 4)
+        count_format, entry_format, entry_size, inline_size = "H", "HHII", 12, 4
+    elif version == 43:
+        (ifd_offset, ) = struct.unpack_from(f"{byte_order}Q", data, 8)
+        count_format, entry_format, entry_size, inline_size = "Q", "HHQQ", 20, 8
+    else:
+        return None
+
+    (entry_count, ) = struct.unpack_from(f"{byte_order}{count_format}", data,
+                                         ifd_offset)
+    entries_offset = ifd_offset + struct.calcsize(count_format)
+    tags = {}
+    for index in range(entry_count):
+        entry_offset = entries_offset + index * entry_size
+        tag, field_type, count, value_offset = struct.unpack_from(
+            f"{byte_order}{entry_format}", data, entry_offset)
+        if tag not in _TAGS:
+            continue
+        value_format, value_size = FIELD_TYPES[field_type]
+        values_size = value_size * count
+        if values_size <= inline_size:
+            # Small values are stored in the entry itself.
+            offset = entry_offset + entry_size - inline_size
+        else:
+            offset = value_offset
+        if offset + values_size > len(data):
+            return None
+        tags[tag] = list(
+            struct.unpack_from(f"{byte_order}{value_format * count}", data,
+                               offset))
+    return tags
+
+
+def _geo_key(geo_keys: List[int], key: int) -> Optional[int]:
+    # Header of 4 shorts, then 4 shorts per key: id, location, count, value.
+    for index in range(4, len(geo_keys) - 3, 4):
+        key_id, location, _, value = geo_keys[index:index + 4]
+        if key_id == key and location == 0:
+            return value
+    return None
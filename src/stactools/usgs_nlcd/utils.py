@@ -0,0 +1,174 @@
+import glob
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import fsspec
+import rasterio
+from fsspec.implementations.local import LocalFileSystem
+from rasterio.io import DatasetReader
+from rasterio.windows import Window, intersection
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def bounded_map(
+    executor: Executor,
+    fn: Callable[[T], R],
+    iterable: Iterable[T],
+    max_pending: int,
+) -> Iterator[Tuple[T, "Future[R]"]]:
+    """Submit `fn(item)` for every item, keeping at most `max_pending` tasks
+    queued on the executor.
+
+    Unlike `Executor.map`, the iterable is consumed lazily and failures are
+    not raised here: the futures are yielded in submission order, so callers
+    get deterministic ordering and can handle errors per item. Futures that
+    have not been yielded yet are cancelled if the caller stops early.
+
+    Args:
+        executor (Executor): The executor to submit the tasks to.
+        fn (Callable): The function to call on each item.
+        iterable (Iterable): The items to process.
+        max_pending (int): Maximum number of submitted but not yet yielded
+            tasks.
+    Returns:
+        Iterator[Tuple[T, Future]]: Each item with the future of its result.
+    """
+    pending: Deque[Tuple[T, "Future[R]"]] = deque()
+    try:
+        for item in iterable:
+            pending.append((item, executor.submit(fn, item)))
+            if len(pending) >= max_pending:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def is_local(url: str) -> bool:
+    """Whether a path or fsspec URL refers to the local file system."""
+    fs, _ = fsspec.core.url_to_fs(url)
+    return isinstance(fs, LocalFileSystem)
+
+
+def upload(data: Union[bytes, memoryview, BinaryIO],
+           url: str,
+           chunk_size: int = 8 << 20) -> None:
+    """Write bytes, or the content of a binary file, to an fsspec URL.
+
+    The data is written in chunks of `chunk_size` bytes, so that file system
+    implementations can stream it out, e.g. as multipart uploads.
+    """
+    with fsspec.open(url, "wb") as f:
+        if hasattr(data, "read"):
+            for chunk in iter(lambda: data.read(chunk_size), b""):
+                f.write(chunk)
+        else:
+            view = memoryview(data)
+            for start in range(0, len(view), chunk_size):
+                f.write(view[start:start + chunk_size])
+
+
+def expand_hrefs(source: str, pattern: str = "*.tif") -> List[str]:
+    """Expand a directory, glob or list file into the hrefs it refers to.
+
+    Args:
+        source (str): A local directory, whose files matching `pattern` are
+            used, a glob, or a text file listing one href (path or URL) per
+            line.
+        pattern (str, optional): Pattern of the files used from a directory.
+            Defaults to "*.tif".
+    Returns:
+        List[str]: The hrefs, sorted for directories and globs, in listed
+            order for list files.
+    """
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, pattern)))
+    if any(char in source for char in "*?["):
+        return sorted(glob.glob(source))
+    with fsspec.open(source, "r") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def block_aligned_chunks(dataset: DatasetReader,
+                         window: Window,
+                         min_size: int = 512) -> Iterator[Window]:
+    """Split a window of a dataset into chunks aligned to its internal blocks.
+
+    Each chunk is made of whole blocks of the dataset, at least `min_size`
+    pixels high and wide, clipped to the window, so that reading a chunk
+    decodes each block it touches only once.
+
+    Args:
+        dataset (DatasetReader): The dataset.
+        window (Window): The window to split.
+        min_size (int, optional): Minimum height and width of the chunks.
+            Defaults to 512.
+    Returns:
+        Iterator[Window]: The chunks, row by row.
+    """
+    block_height, block_width = dataset.block_shapes[0]
+    chunk_height = block_height * max(1, min_size // block_height)
+    chunk_width = block_width * max(1, min_size // block_width)
+    row_start = int(window.row_off) // chunk_height * chunk_height
+    col_start = int(window.col_off) // chunk_width * chunk_width
+    row_stop = int(window.row_off + window.height)
+    col_stop = int(window.col_off + window.width)
+    for row_off in range(row_start, row_stop, chunk_height):
+        for col_off in range(col_start, col_stop, chunk_width):
+            yield intersection(
+                window, Window(col_off, row_off, chunk_width, chunk_height))
+
+
+class ThreadDatasets:
+    """A dataset opened once in each thread that reads it.
+
+    rasterio datasets must not be shared between threads. Threads of a pool
+    reading windows of the same file get their own dataset from `get`, kept
+    open for their next windows until `close` is called.
+    """
+    def __init__(self, href: str) -> None:
+        self.href = href
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._datasets: List[DatasetReader] = []
+
+    def __enter__(self) -> "ThreadDatasets":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def get(self) -> DatasetReader:
+        """The dataset of the current thread, opened on first use."""
+        dataset = getattr(self._local, "dataset", None)
+        if dataset is None:
+            dataset = self._local.dataset = rasterio.open(self.href)
+            with self._lock:
+                self._datasets.append(dataset)
+        return dataset
+
+    def close(self) -> None:
+        """Close the datasets of all threads."""
+        with self._lock:
+            for dataset in self._datasets:
+                dataset.close()
+            self._datasets = []
+        self._local = threading.local()
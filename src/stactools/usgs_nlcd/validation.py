@@ -0,0 +1,319 @@
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import fsspec
+import jsonschema
+import pystac
+from pystac import Item, STACObjectType, STACValidationError
+from pystac.validation import STACValidator, set_validator
+from pystac.validation.schema_uri_map import DefaultSchemaUriMap
+
+logger = logging.getLogger(__name__)
+
+# Directory of the schemas shipped with the package, one file per schema at
+# its URI without the scheme, as written by `fetch_schemas`. Populate it with
+# `stac usgsnlcd fetch-schemas`, which writes the published schemas verbatim.
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), "schemas")
+
+# Schemas of the STAC objects created by this package. Those they refer to
+# are fetched with them.
+SCHEMA_URIS = [
+    "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/item.json",
+    ("https://schemas.stacspec.org/v1.0.0/collection-spec/json-schema/"
+     "collection.json"),
+    "https://stac-extensions.github.io/file/v2.0.0/schema.json",
+    "https://stac-extensions.github.io/item-assets/v1.0.0/schema.json",
+    "https://stac-extensions.github.io/label/v1.0.0/schema.json",
+    "https://stac-extensions.github.io/projection/v1.0.0/schema.json",
+    "https://stac-extensions.github.io/raster/v1.0.0/schema.json",
+]
+
+
+class SchemaNotCachedError(Exception):
+    """A schema is neither cached nor allowed to be downloaded."""
+
+
+def schema_path(uri: str, directory: str = SCHEMA_DIR) -> str:
+    """The path of the cached copy of a schema.
+
+    Args:
+        uri (str): URI of the schema.
+        directory (str, optional): Directory of the cached schemas. Defaults
+            to `SCHEMA_DIR`.
+    Returns:
+        str: The path of the schema, at its URI without the scheme.
+    """
+    parsed = urlparse(uri)
+    return os.path.join(directory, parsed.netloc, *parsed.path.split("/"))
+
+
+class SchemaCache:
+    """JSON schemas by URI, read from a directory of cached schemas.
+
+    Schemas are read from the directory once per cache, the first time they
+    are used. Schemas missing from the directory are downloaded if allowed,
+    and kept in memory only.
+    """
+    def __init__(self,
+                 directory: str = SCHEMA_DIR,
+                 download: bool = False) -> None:
+        """
+        Args:
+            directory (str, optional): Directory of the cached schemas, laid
+                out by `schema_path`. Defaults to `SCHEMA_DIR`.
+            download (bool, optional): Download the schemas missing from the
+                directory, instead of raising `SchemaNotCachedError`.
+        """
+        self.directory = directory
+        self.download = download
+        self.schemas: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, uri: str) -> Dict[str, Any]:
+        """The schema at a URI.
+
+        Args:
+            uri (str): URI of the schema, without a fragment.
+        Returns:
+            Dict[str, Any]: The schema.
+        """
+        if uri not in self.schemas:
+            path = schema_path(uri, self.directory)
+            if os.path.exists(path):
+                with open(path) as f:
+                    self.schemas[uri] = json.load(f)
+            elif self.download:
+                logger.info(f"Downloading schema {uri}")
+                with fsspec.open(uri, "r") as f:
+                    self.schemas[uri] = json.load(f)
+            else:
+                raise SchemaNotCachedError(
+                    f"Schema {uri} is not in {self.directory}, see "
+                    "`stac usgsnlcd fetch-schemas`")
+        return self.schemas[uri]
+
+    def closure(self, uris: Iterable[str]) -> List[str]:
+        """The URIs of some schemas and of all the schemas they refer to.
+
+        Args:
+            uris (Iterable[str]): URIs of the schemas.
+        Returns:
+            List[str]: The URIs, in the order they were found.
+        """
+        found: List[str] = []
+        pending = list(uris)
+        while pending:
+            uri = pending.pop(0)
+            if uri in found:
+                continue
+            found.append(uri)
+            for ref in _refs(self.get(uri)):
+                ref_uri = urldefrag(urljoin(uri, ref))[0]
+                if ref_uri and ref_uri not in found:
+                    pending.append(ref_uri)
+        return found
+
+
+def _refs(schema: Any) -> Iterator[str]:
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            if key == "$ref" and isinstance(value, str):
+                yield value
+            else:
+                yield from _refs(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from _refs(value)
+
+
+def fetch_schemas(directory: str = SCHEMA_DIR,
+                  uris: Iterable[str] = SCHEMA_URIS) -> List[str]:
+    """Download schemas, and those they refer to, into a directory.
+
+    Schemas already in the directory are kept. Run this where there is
+    network access, and copy the directory to where there is not.
+
+    Args:
+        directory (str, optional): Directory of the cached schemas. Defaults
+            to `SCHEMA_DIR`.
+        uris (Iterable[str], optional): URIs of the schemas. Defaults to
+            `SCHEMA_URIS`.
+    Returns:
+        List[str]: The URIs of the schemas in the directory.
+    """
+    cache = SchemaCache(directory, download=True)
+    found = cache.closure(uris)
+    for uri in found:
+        path = schema_path(uri, directory)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(cache.get(uri), f, indent=2)
+    logger.info(f"Cached {len(found)} schemas in {directory}")
+    return found
+
+
+class CachedSchemaValidator(STACValidator):
+    """Validates STAC objects against the schemas of a `SchemaCache`.
+
+    A validator is compiled once per schema, and references between schemas
+    are resolved from the cache, so that validating many objects reads and
+    compiles each schema only once, without network access if the schemas
+    are cached. Validators are not thread safe.
+    """
+    def __init__(self, schemas: SchemaCache) -> None:
+        """
+        Args:
+            schemas (SchemaCache): The schemas to validate against.
+        """
+        self.schemas = schemas
+        self.schema_uri_map = DefaultSchemaUriMap()
+        self._validators: Dict[str, Any] = {}
+        self._resources: Dict[str, Any] = {}
+
+    def validator(self, schema_uri: str) -> Any:
+        """The compiled validator of a schema.
+
+        Args:
+            schema_uri (str): URI of the schema.
+        Returns:
+            jsonschema.protocols.Validator: The validator.
+        """
+        if schema_uri not in self._validators:
+            schema = self.schemas.get(schema_uri)
+            if "$id" not in schema:
+                # Relative references are resolved against the `$id`.
+                schema = dict(schema, **{"$id": schema_uri})
+            validator_class = jsonschema.validators.validator_for(schema)
+            self._validators[schema_uri] = validator_class(
+                schema, **self._references(schema_uri, schema))
+        return self._validators[schema_uri]
+
+    def _references(self, schema_uri: str,
+                    schema: Dict[str, Any]) -> Dict[str, Any]:
+        # How the validators resolve references to other schemas: through a
+        # `referencing` registry on jsonschema >= 4.18, whose legacy
+        # RefResolver loses track of the base URI in schemas with an `$id`,
+        # through a RefResolver before.
+        try:
+            from referencing import Registry, Resource
+            from referencing.jsonschema import DRAFT7
+        except ImportError:
+            resolver = jsonschema.RefResolver(base_uri=schema_uri,
+                                              referrer=schema,
+                                              handlers={
+                                                  "http": self.schemas.get,
+                                                  "https": self.schemas.get,
+                                              })
+            return {"resolver": resolver}
+
+        def retrieve(uri: str) -> Any:
+            if uri not in self._resources:
+                self._resources[uri] = Resource.from_contents(
+                    self.schemas.get(uri), default_specification=DRAFT7)
+            return self._resources[uri]
+
+        registry = Registry(retrieve=retrieve)  # type: ignore
+        return {"registry": registry}
+
+    def validate_core(self,
+                      stac_dict: Dict[str, Any],
+                      stac_object_type: STACObjectType,
+                      stac_version: str,
+                      href: Optional[str] = None) -> Optional[str]:
+        schema_uri = self.schema_uri_map.get_object_schema_uri(
+            stac_object_type, stac_version)
+        if schema_uri is None:
+            return None
+        self._validate(stac_dict, stac_object_type, schema_uri, href)
+        return schema_uri
+
+    def validate_extension(self,
+                           stac_dict: Dict[str, Any],
+                           stac_object_type: STACObjectType,
+                           stac_version: str,
+                           extension_id: str,
+                           href: Optional[str] = None) -> Optional[str]:
+        self._validate(stac_dict, stac_object_type, extension_id, href)
+        return extension_id
+
+    def _validate(
+        self,
+        stac_dict: Dict[str, Any],
+        stac_object_type: STACObjectType,
+        schema_uri: str,
+        href: Optional[str],
+    ) -> None:
+        try:
+            self.validator(schema_uri).validate(stac_dict)
+        except jsonschema.ValidationError as e:
+            message = f"Validation failed for {stac_object_type} "
+            if href is not None:
+                message += f"at {href} "
+            message += (f"with ID {stac_dict.get('id')} against schema at "
+                        f"{schema_uri}")
+            raise STACValidationError(message, source=e) from e
+
+
+@lru_cache(maxsize=None)
+def cached_validator(directory: str = SCHEMA_DIR,
+                     download: bool = False) -> CachedSchemaValidator:
+    """The validator of the schemas of a directory, one per process.
+
+    Args:
+        directory (str, optional): Directory of the cached schemas. Defaults
+            to `SCHEMA_DIR`.
+        download (bool, optional): Download the schemas missing from the
+            directory.
+    Returns:
+        CachedSchemaValidator: The validator.
+    """
+    return CachedSchemaValidator(SchemaCache(directory, download))
+
+
+def use_cached_validator(directory: str = SCHEMA_DIR,
+                         download: bool = True) -> None:
+    """Validate with `cached_validator` in `pystac` validation functions.
+
+    Makes the `validate` methods of STAC objects use cached schemas and
+    compiled validators.
+
+    Args:
+        directory (str, optional): Directory of the cached schemas. Defaults
+            to `SCHEMA_DIR`.
+        download (bool, optional): Download the schemas missing from the
+            directory, once per process. Defaults to True.
+    """
+    set_validator(cached_validator(directory, download))
+
+
+def validate_items(
+    items: Iterable[Union[Item, Dict[str, Any]]],
+    validator: Optional[CachedSchemaValidator] = None
+) -> Iterator[Tuple[str, Exception]]:
+    """Validate many items, reporting the invalid ones.
+
+    Args:
+        items (Iterable[Union[Item, Dict[str, Any]]]): The items, or their
+            JSON.
+        validator (CachedSchemaValidator, optional): The validator. Defaults
+            to `cached_validator()`, which needs the schemas to be cached.
+    Returns:
+        Iterator[Tuple[str, Exception]]: The IDs of the invalid items, with
+            the validation errors.
+    """
+    if validator is None:
+        validator = cached_validator()
+    for item in items:
+        if isinstance(item, Item):
+            item = item.to_dict(include_self_link=False)
+        try:
+            validator.validate(
+                item, STACObjectType.ITEM,
+                item.get("stac_version", pystac.get_stac_version()),
+                item.get("stac_extensions", []))
+        except STACValidationError as e:
+            yield item.get("id", ""), e
@@ -1,3 +1,87 @@
+import os
+import re
+import threading
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
 from stactools.testing import TestData
 
 test_data = TestData(__file__)
+
+
+def create_test_raster(
+        path: str,
+        width: int = 1000,
+        height: int = 700,
+        data: Optional[np.ndarray] = None,
+        colormap: Optional[Dict[int, Tuple[int, ...]]] = None) -> str:
+    """Write a small NLCD-like uint8 GeoTIFF in EPSG:6350.
+
+    Unless `data` is given, the left half of the raster is no data and the
+    right half is Deciduous Forest (41). `colormap`, if given, is written as
+    the color table of the band, like the NLCD palette.
+    """
+    if data is None:
+        data = np.zeros((height, width), dtype=np.uint8)
+        data[:, width // 2:] = 41
+    with rasterio.open(path,
+                       "w",
+                       driver="GTiff",
+                       width=data.shape[1],
+                       height=data.shape[0],
+                       count=1,
+                       dtype=np.uint8,
+                       crs="EPSG:6350",
+                       transform=from_origin(-2000000, 3000000, 30, 30),
+                       nodata=0,
+                       tiled=True) as dataset:
+        dataset.write(data, 1)
+        if colormap is not None:
+            dataset.write_colormap(1, colormap)
+    return path
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Serves files like a static file host, honouring single byte ranges."""
+    def do_GET(self) -> None:
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        path = self.translate_path(self.path)
+        if match is None or not os.path.isfile(path):
+            super().do_GET()
+            return
+        size = os.path.getsize(path)
+        start, end = int(match.group(1)), min(int(match.group(2)), size - 1)
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@contextmanager
+def serve_directory(directory: str, ranges: bool = True) -> Iterator[str]:
+    """Serve a directory over HTTP on localhost, yielding its base URL.
+
+    Unless `ranges` is False, byte ranges are honoured.
+    """
+    handler = RangeRequestHandler if ranges else SimpleHTTPRequestHandler
+    server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                 partial(handler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/"
+    finally:
+        server.shutdown()
+        server.server_close()
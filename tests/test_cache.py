@@ -0,0 +1,63 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from stactools.usgs_nlcd.cache import MetadataCache, file_version
+
+
+class MetadataCacheTest(unittest.TestCase):
+    def test_get_put(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "cache.sqlite")
+            facts = {"shape": [700, 1000], "size": 1234}
+            with MetadataCache(path) as cache:
+                self.assertIsNone(cache.get("a.tif", "1234:1"))
+                cache.put("a.tif", "1234:1", facts)
+                self.assertEqual(cache.get("a.tif", "1234:1"), facts)
+                self.assertIsNone(cache.get("a.tif", "1234:2"))
+
+            with MetadataCache(path) as cache:
+                self.assertEqual(len(cache), 1)
+                self.assertEqual(cache.get("a.tif", "1234:1"), facts)
+                cache.put("a.tif", "1234:2", {"size": 1})
+                self.assertEqual(len(cache), 1)
+                self.assertIsNone(cache.get("a.tif", "1234:1"))
+
+    def test_evicts_least_recently_used(self):
+        with TemporaryDirectory() as tmp_dir:
+            with MetadataCache(os.path.join(tmp_dir, "cache.sqlite"),
+                               max_entries=2) as cache:
+                cache.put("a.tif", "1", {})
+                cache.put("b.tif", "1", {})
+                cache.get("a.tif", "1")
+                cache.put("c.tif", "1", {})
+
+                self.assertEqual(len(cache), 2)
+                self.assertIsNotNone(cache.get("a.tif", "1"))
+                self.assertIsNone(cache.get("b.tif", "1"))
+                self.assertIsNotNone(cache.get("c.tif", "1"))
+
+    def test_invalidate(self):
+        with TemporaryDirectory() as tmp_dir:
+            with MetadataCache(os.path.join(tmp_dir, "cache.sqlite")) as cache:
+                for href in ["s3://a/1.tif", "s3://a/2.tif", "s3://b/1.tif"]:
+                    cache.put(href, "1", {})
+
+                self.assertEqual(cache.invalidate("s3://a/"), 2)
+                self.assertIsNone(cache.get("s3://a/1.tif", "1"))
+                self.assertIsNotNone(cache.get("s3://b/1.tif", "1"))
+                self.assertEqual(cache.invalidate(), 1)
+                self.assertEqual(len(cache), 0)
+
+    def test_file_version(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "a.tif")
+            with open(path, "wb") as f:
+                f.write(b"a")
+            version = file_version(path)
+            self.assertEqual(file_version(path), version)
+
+            with open(path, "wb") as f:
+                f.write(b"ab")
+            self.assertNotEqual(file_version(path), version)
+            self.assertTrue(file_version(path).startswith("2:"))
@@ -0,0 +1,101 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import rasterio
+
+from stactools.usgs_nlcd import change
+from tests import create_test_raster
+
+
+def _random_classes(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).choice(np.array([0, 21, 41, 82],
+                                                       dtype=np.uint8),
+                                              size=(700, 1000))
+
+
+class ChangeTest(unittest.TestCase):
+    def test_transition_matrix(self):
+        from_data, to_data = _random_classes(0), _random_classes(1)
+        expected = np.zeros((256, 256), dtype=np.int64)
+        np.add.at(expected, (from_data.ravel(), to_data.ravel()), 1)
+        with TemporaryDirectory() as tmp_dir:
+            from_path = create_test_raster(os.path.join(tmp_dir, "from.tif"),
+                                           data=from_data)
+            to_path = create_test_raster(os.path.join(tmp_dir, "to.tif"),
+                                         data=to_data)
+            change_path = os.path.join(tmp_dir, "change.tif")
+
+            matrix = change.transition_matrix(from_path,
+                                              to_path,
+                                              workers=3,
+                                              chunk_size=256,
+                                              change_path=change_path)
+
+            np.testing.assert_array_equal(matrix, expected)
+            with rasterio.open(change_path) as dataset:
+                self.assertEqual(dataset.dtypes[0], "uint16")
+                self.assertEqual(dataset.nodata, change.NO_CHANGE)
+                self.assertTrue(dataset.overviews(1))
+                np.testing.assert_array_equal(
+                    dataset.read(1), change.change_codes(from_data, to_data))
+
+    def test_change_codes(self):
+        from_data = np.array([[41, 41, 0, 82]], dtype=np.uint8)
+        to_data = np.array([[41, 21, 21, 0]], dtype=np.uint8)
+        np.testing.assert_array_equal(change.change_codes(from_data, to_data),
+                                      [[0, 4121, 0, 0]])
+
+    def test_transition_matrices(self):
+        with TemporaryDirectory() as tmp_dir:
+            year_hrefs = {
+                year:
+                create_test_raster(os.path.join(
+                    tmp_dir, f"nlcd_{year}_land_cover_l48_20210604.tif"),
+                                   data=_random_classes(year))
+                for year in [2019, 2001, 2011]
+            }
+            matrices = change.transition_matrices(year_hrefs,
+                                                  change_directory=tmp_dir)
+
+            self.assertEqual(list(matrices), [(2001, 2011), (2011, 2019),
+                                              (2001, 2019)])
+            for from_year, to_year in matrices:
+                self.assertTrue(
+                    os.path.exists(
+                        os.path.join(
+                            tmp_dir,
+                            change.change_file_name(from_year, to_year))))
+            with self.assertRaises(ValueError):
+                change.transition_matrices({2001: year_hrefs[2001]})
+            with self.assertRaises(ValueError):
+                change.transition_matrices({
+                    2001: year_hrefs[2001],
+                    2002: year_hrefs[2011]
+                })
+
+    def test_misaligned_rasters(self):
+        with TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(ValueError):
+                change.transition_matrix(
+                    create_test_raster(os.path.join(tmp_dir, "a.tif")),
+                    create_test_raster(os.path.join(tmp_dir, "b.tif"),
+                                       width=500))
+
+    def test_matrix_to_dict(self):
+        matrix = np.zeros((256, 256), dtype=np.int64)
+        matrix[41, 41] = 10
+        matrix[41, 21] = 2
+        matrix[82, 82] = 5
+        self.assertEqual(change.matrix_to_dict(matrix), {
+            "41": {
+                "21": 2,
+                "41": 10
+            },
+            "82": {
+                "82": 5
+            }
+        })
+        self.assertEqual(list(change.matrix_to_dict(matrix)["41"]),
+                         ["21", "41"])
@@ -0,0 +1,502 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import fsspec
+import numpy as np
+import rasterio
+from rasterio.enums import ColorInterp
+from rasterio.io import MemoryFile
+from rasterio.windows import Window
+
+from stactools.usgs_nlcd import cog, manifest
+from stactools.usgs_nlcd.metrics import PipelineMetrics
+from tests import create_test_raster
+
+
+class CogTest(unittest.TestCase):
+    def test_tile_windows(self):
+        windows = list(cog.tile_windows(1000, 700, (400, 400)))
+        self.assertEqual([(row, col) for row, col, _ in windows], [(1, 1),
+                                                                   (1, 2),
+                                                                   (1, 3),
+                                                                   (2, 1),
+                                                                   (2, 2),
+                                                                   (2, 3)])
+        _, _, last = windows[-1]
+        self.assertEqual((last.col_off, last.row_off), (800, 400))
+        self.assertEqual((last.width, last.height), (200, 300))
+
+    def test_tile_file_name(self):
+        self.assertEqual(
+            cog.tile_file_name("/data/nlcd_2019_land_cover_l48_20210604.img",
+                               5, 9, 161190, 104424),
+            "nlcd_2019_land_cover_l48_20210604_05_09.tif")
+
+    def test_create_retiled_cogs(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            output_directory = os.path.join(tmp_dir, "tiles")
+            os.mkdir(output_directory)
+
+            cog.create_retiled_cogs(source,
+                                    output_directory,
+                                    tile_size=(400, 400))
+
+            # Tiles in the first column only cover the empty left half.
+            self.assertEqual(sorted(os.listdir(output_directory)), [
+                "manifest.json", "source_1_2.tif", "source_1_3.tif",
+                "source_2_2.tif", "source_2_3.tif"
+            ])
+            with rasterio.open(os.path.join(output_directory,
+                                            "source_2_3.tif")) as dataset:
+                self.assertEqual(dataset.shape, (300, 200))
+                self.assertEqual(dataset.nodata, 0)
+                self.assertEqual(dataset.compression.value, "DEFLATE")
+                self.assertEqual(dataset.transform.c, -2000000 + 800 * 30)
+                self.assertTrue((dataset.read(1) == 41).all())
+
+    def test_create_retiled_cogs_keeps_color_table(self):
+        with TemporaryDirectory() as tmp_dir:
+            colormap = {0: (0, 0, 0, 0), 41: (104, 171, 95, 255)}
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"),
+                                        colormap=colormap)
+            output_directory = os.path.join(tmp_dir, "tiles")
+            os.mkdir(output_directory)
+
+            cog.create_retiled_cogs(source,
+                                    output_directory,
+                                    tile_size=(400, 400))
+
+            with rasterio.open(os.path.join(output_directory,
+                                            "source_2_3.tif")) as dataset:
+                self.assertEqual(dataset.colorinterp, (ColorInterp.palette, ))
+                self.assertEqual(dataset.colormap(1)[41], colormap[41])
+                self.assertEqual(dataset.colormap(1)[0], colormap[0])
+
+    def test_create_retiled_cogs_with_overlap(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            output_directory = os.path.join(tmp_dir, "tiles")
+            os.mkdir(output_directory)
+
+            cog.create_retiled_cogs(source,
+                                    output_directory,
+                                    tile_size=(400, 400),
+                                    overlap=150)
+
+            # The first column now reaches into the data of the right half.
+            self.assertIn("source_1_1.tif", os.listdir(output_directory))
+            with rasterio.open(os.path.join(output_directory,
+                                            "source_2_2.tif")) as dataset:
+                self.assertEqual(dataset.shape, (450, 700))
+                self.assertEqual(dataset.transform.c, -2000000 + 250 * 30)
+                self.assertEqual(dataset.transform.f, 3000000 - 250 * 30)
+
+    def test_create_retiled_cogs_with_workers(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            serial = os.path.join(tmp_dir, "serial")
+            parallel = os.path.join(tmp_dir, "parallel")
+            os.mkdir(serial)
+            os.mkdir(parallel)
+
+            cog.create_retiled_cogs(source, serial, tile_size=(400, 400))
+            cog.create_retiled_cogs(source,
+                                    parallel,
+                                    tile_size=(400, 400),
+                                    workers=2)
+
+            self.assertEqual(sorted(os.listdir(parallel)),
+                             sorted(os.listdir(serial)))
+
+    def test_create_retiled_cogs_raise_on_fail(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            output_directory = os.path.join(tmp_dir, "tiles")
+            os.mkdir(output_directory)
+            # A directory in the way of one of the tiles.
+            os.mkdir(os.path.join(output_directory, "source_1_3.tif"))
+
+            with self.assertRaises(Exception):
+                cog.create_retiled_cogs(source,
+                                        output_directory,
+                                        tile_size=(400, 400),
+                                        workers=2)
+            with self.assertLogs(cog.logger, "ERROR") as logs:
+                cog.create_retiled_cogs(source,
+                                        output_directory,
+                                        raise_on_fail=False,
+                                        tile_size=(400, 400),
+                                        workers=2)
+            self.assertEqual(len(logs.output), 1)
+            tile_manifest = manifest.TileManifest.in_directory(
+                output_directory)
+            self.assertEqual(tile_manifest.tiles["source_1_3.tif"]["status"],
+                             manifest.FAILED)
+            self.assertEqual(tile_manifest.tiles["source_2_3.tif"]["status"],
+                             manifest.COMPLETE)
+
+    def test_create_retiled_cogs_resumes_from_manifest(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            output_directory = os.path.join(tmp_dir, "tiles")
+            os.mkdir(output_directory)
+            cog.create_retiled_cogs(source,
+                                    output_directory,
+                                    tile_size=(400, 400))
+            tile_manifest = manifest.TileManifest.in_directory(
+                output_directory)
+            self.assertEqual(
+                sorted(entry["status"]
+                       for entry in tile_manifest.tiles.values()),
+                [manifest.COMPLETE] * 4 + [manifest.EMPTY] * 2)
+
+            # Lose one tile and corrupt another.
+            os.remove(os.path.join(output_directory, "source_1_2.tif"))
+            corrupt = os.path.join(output_directory, "source_2_3.tif")
+            with open(corrupt, "r+b") as f:
+                f.seek(-1, os.SEEK_END)
+                f.write(b"x")
+            kept = os.path.join(output_directory, "source_1_3.tif")
+            kept_mtime = os.stat(kept).st_mtime_ns
+            corrupt_mtime = os.stat(corrupt).st_mtime_ns
+
+            with patch.object(cog,
+                              "window_has_data",
+                              wraps=cog.window_has_data) as has_data:
+                cog.create_retiled_cogs(source,
+                                        output_directory,
+                                        tile_size=(400, 400))
+            self.assertEqual(has_data.call_count, 1)
+            self.assertEqual(os.stat(kept).st_mtime_ns, kept_mtime)
+            self.assertTrue(
+                os.path.exists(os.path.join(output_directory,
+                                            "source_1_2.tif")))
+            # Only sizes are checked by default.
+            self.assertEqual(os.stat(corrupt).st_mtime_ns, corrupt_mtime)
+
+            with patch.object(cog,
+                              "window_has_data",
+                              wraps=cog.window_has_data) as has_data:
+                cog.create_retiled_cogs(source,
+                                        output_directory,
+                                        tile_size=(400, 400),
+                                        verify_checksums=True)
+            self.assertEqual(has_data.call_count, 1)
+            self.assertEqual(os.stat(kept).st_mtime_ns, kept_mtime)
+            with rasterio.open(corrupt) as dataset:
+                self.assertTrue((dataset.read(1) == 41).all())
+
+    def test_tile_manifest_saves_in_batches(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "manifest.json")
+            window = Window(0, 0, 400, 400)
+            with manifest.TileManifest(path, flush_every=2) as tile_manifest:
+                tile_manifest.record("a.tif", window, "source", "balanced",
+                                     manifest.EMPTY)
+                self.assertFalse(os.path.exists(path))
+                tile_manifest.record("b.tif", window, "source", "balanced",
+                                     manifest.EMPTY)
+                self.assertEqual(sorted(manifest.TileManifest(path).tiles),
+                                 ["a.tif", "b.tif"])
+                tile_manifest.record("c.tif", window, "source", "balanced",
+                                     manifest.EMPTY)
+                self.assertEqual(len(manifest.TileManifest(path).tiles), 2)
+            self.assertEqual(len(manifest.TileManifest(path).tiles), 3)
+
+    def test_create_multi_year_retiled_cogs(self):
+        with TemporaryDirectory() as tmp_dir:
+            years = [2001, 2011, 2019]
+            sources = []
+            for year in years:
+                data = np.zeros((700, 1000), dtype=np.uint8)
+                data[:, 500:] = 41 if year < 2019 else 21
+                sources.append(
+                    create_test_raster(os.path.join(
+                        tmp_dir, f"nlcd_{year}_land_cover_l48_20210604.tif"),
+                                       data=data))
+            serial = os.path.join(tmp_dir, "serial")
+            parallel = os.path.join(tmp_dir, "parallel")
+            os.mkdir(serial)
+            os.mkdir(parallel)
+
+            with patch.object(cog,
+                              "window_has_data",
+                              wraps=cog.window_has_data) as has_data:
+                cog.create_multi_year_retiled_cogs(sources,
+                                                   serial,
+                                                   tile_size=(400, 400))
+            self.assertEqual(has_data.call_count, 6)
+            cog.create_multi_year_retiled_cogs(sources,
+                                               parallel,
+                                               tile_size=(400, 400),
+                                               workers=2)
+
+            for output_directory in [serial, parallel]:
+                tiles = manifest.TileManifest.in_directory(
+                    output_directory).tiles
+                self.assertEqual(len(tiles), 18)
+                self.assertEqual(
+                    tiles["nlcd_2011_land_cover_l48_20210604_1_1.tif"]
+                    ["status"], manifest.EMPTY)
+                self.assertEqual(
+                    sorted(name for name in os.listdir(output_directory)
+                           if name.endswith(".tif")),
+                    sorted(f"nlcd_{year}_land_cover_l48_20210604_{tile}.tif"
+                           for year in years
+                           for tile in ["1_2", "1_3", "2_2", "2_3"]))
+            with rasterio.open(
+                    os.path.join(
+                        parallel,
+                        "nlcd_2019_land_cover_l48_20210604_2_3.tif")) as ds:
+                self.assertTrue((ds.read(1) == 21).all())
+
+            # Nothing is left to do for any year.
+            with patch.object(cog, "_encode_tile") as encode_tile:
+                cog.create_multi_year_retiled_cogs(sources,
+                                                   serial,
+                                                   tile_size=(400, 400))
+            encode_tile.assert_not_called()
+
+            with self.assertRaises(ValueError):
+                cog.create_multi_year_retiled_cogs(
+                    sources[:1] + [
+                        create_test_raster(os.path.join(tmp_dir, "small.tif"),
+                                           width=500)
+                    ], serial)
+
+    def test_window_has_data(self):
+        data = np.zeros((1000, 1000), dtype=np.uint8)
+        # A single pixel that no overview keeps.
+        data[601, 899] = 82
+        with TemporaryDirectory() as tmp_dir:
+            path = create_test_raster(os.path.join(tmp_dir, "source.tif"),
+                                      data=data)
+            with rasterio.open(path, "r+") as dataset:
+                dataset.build_overviews([2, 4, 8])
+            with rasterio.open(path) as dataset:
+                self.assertTrue(
+                    cog.window_has_data(dataset, Window(500, 500, 500, 500)))
+                self.assertFalse(
+                    cog.window_has_data(dataset, Window(0, 500, 500, 500)))
+                self.assertFalse(
+                    cog.window_has_data(dataset, Window(500, 0, 500, 500)))
+
+    def test_window_has_data_sparse(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sparse.tif")
+            with rasterio.open(path,
+                               "w",
+                               driver="GTiff",
+                               width=1024,
+                               height=1024,
+                               count=1,
+                               dtype=np.uint8,
+                               nodata=0,
+                               tiled=True,
+                               blockxsize=256,
+                               blockysize=256,
+                               sparse_ok=True) as dataset:
+                dataset.write(np.full((256, 256), 41, dtype=np.uint8),
+                              1,
+                              window=Window(768, 0, 256, 256))
+                # Blocks of no data are not written either.
+                dataset.write(np.zeros((256, 256), dtype=np.uint8),
+                              1,
+                              window=Window(0, 0, 256, 256))
+            with rasterio.open(path) as dataset, patch.object(
+                    dataset, "read", wraps=dataset.read) as read:
+                self.assertFalse(
+                    cog.window_has_data(dataset, Window(0, 0, 768, 1024)))
+                self.assertEqual(read.call_count, 0)
+                self.assertTrue(
+                    cog.window_has_data(dataset, Window(500, 100, 400, 100)))
+                self.assertEqual(read.call_count, 1)
+
+    def test_plan_tiles_skips_empty_tiles(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            with rasterio.open(path) as dataset:
+                planned = list(
+                    cog.plan_tiles(dataset, path, tmp_dir, (400, 400)))
+                everything = list(
+                    cog.plan_tiles(dataset,
+                                   path,
+                                   tmp_dir, (400, 400),
+                                   skip_empty=False))
+        self.assertEqual(len(planned), 4)
+        self.assertEqual(len(everything), 6)
+
+    def test_create_retiled_cogs_metrics(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"),
+                                        width=1400)
+            output_directory = os.path.join(tmp_dir, "tiles")
+            os.mkdir(output_directory)
+            metrics = PipelineMetrics()
+
+            cog.create_retiled_cogs(source,
+                                    output_directory,
+                                    tile_size=(700, 700),
+                                    metrics=metrics)
+
+            with rasterio.open(os.path.join(output_directory,
+                                            "source_1_2.tif")) as dataset:
+                self.assertEqual(dataset.overviews(1), [2])
+            report = metrics.to_dict()
+            self.assertEqual(set(report["run"]["stages"]), {
+                "plan", "emptiness_check", "retile", "overviews", "translate"
+            })
+            self.assertEqual(report["run"]["input_bytes"], 700 * 700)
+            self.assertGreater(report["run"]["compression_ratio"], 1)
+            written = [
+                tile for tile in report["tiles"] if tile["output_bytes"] > 0
+            ]
+            self.assertEqual(len(written), 1)
+            self.assertEqual(
+                written[0]["output_bytes"],
+                os.path.getsize(
+                    os.path.join(output_directory, "source_1_2.tif")))
+
+    def test_cog_creation_options(self):
+        options = cog.cog_creation_options("fast-write")
+        self.assertEqual(options["compress"], "zstd")
+        self.assertEqual(options["blocksize"], 512)
+        with self.assertRaises(ValueError):
+            cog.cog_creation_options("smallest")
+
+    def test_create_retiled_cogs_profile(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            output_directory = os.path.join(tmp_dir, "tiles")
+            os.mkdir(output_directory)
+            tile = os.path.join(output_directory, "source_1_1.tif")
+
+            cog.create_retiled_cogs(source, output_directory)
+            with rasterio.open(tile) as dataset:
+                self.assertEqual(dataset.compression.value, "DEFLATE")
+
+            # Tiles are redone when the profile changes.
+            cog.create_retiled_cogs(source,
+                                    output_directory,
+                                    profile="fast-write")
+            with rasterio.open(tile) as dataset:
+                self.assertEqual(dataset.compression.value, "ZSTD")
+
+    def test_create_cog(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = os.path.join(tmp_dir, "source.tif")
+            with rasterio.open(create_test_raster(source), "r+") as dataset:
+                # The source rasters do not declare their no data value.
+                dataset.nodata = None
+            output = os.path.join(tmp_dir, "cog.tif")
+            metrics = PipelineMetrics()
+
+            cog.create_cog(source, output, metrics=metrics)
+
+            with rasterio.open(output) as dataset:
+                self.assertEqual(dataset.nodata, 0)
+                self.assertEqual(dataset.shape, (700, 1000))
+                self.assertEqual(dataset.overviews(1), [2])
+                self.assertEqual(dataset.read(1)[0, -1], 41)
+            tile_metrics = metrics.to_dict()["tiles"][0]
+            self.assertEqual(tile_metrics["input_bytes"], 700 * 1000)
+            self.assertEqual(tile_metrics["output_bytes"],
+                             os.path.getsize(output))
+
+    def test_create_cog_keeps_color_table(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = os.path.join(tmp_dir, "source.tif")
+            colormap = {0: (0, 0, 0, 0), 41: (104, 171, 95, 255)}
+            with rasterio.open(create_test_raster(source, colormap=colormap),
+                               "r+") as dataset:
+                dataset.nodata = None
+                dataset.update_tags(AREA_OR_POINT="Area")
+                dataset.update_tags(1, CLASS="land cover")
+                dataset.set_band_description(1, "NLCD <Land Cover>")
+            output = os.path.join(tmp_dir, "cog.tif")
+
+            cog.create_cog(source, output)
+
+            with rasterio.open(output) as dataset:
+                self.assertEqual(dataset.nodata, 0)
+                self.assertEqual(dataset.colorinterp, (ColorInterp.palette, ))
+                self.assertEqual(dataset.colormap(1)[41], colormap[41])
+                self.assertEqual(dataset.colormap(1)[0], colormap[0])
+                self.assertEqual(dataset.tags()["AREA_OR_POINT"], "Area")
+                self.assertEqual(dataset.tags(1)["CLASS"], "land cover")
+                self.assertEqual(dataset.descriptions, ("NLCD <Land Cover>", ))
+
+    def test_create_cog_to_fsspec_url(self):
+        fs = fsspec.filesystem("memory")
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            cog.create_cog(source, "memory://create-cog/cog.tif")
+            # Nothing is written locally.
+            self.assertEqual(os.listdir(tmp_dir), ["source.tif"])
+        try:
+            with rasterio.open(
+                    MemoryFile(
+                        fs.cat("memory://create-cog/cog.tif"))) as dataset:
+                self.assertEqual(dataset.driver, "GTiff")
+                self.assertEqual(dataset.shape, (700, 1000))
+        finally:
+            fs.rm("/create-cog", recursive=True)
+
+    def test_create_retiled_cogs_to_fsspec_url(self):
+        fs = fsspec.filesystem("memory")
+        destination = "memory://test-create-retiled-cogs"
+        try:
+            with TemporaryDirectory() as tmp_dir:
+                source = create_test_raster(os.path.join(
+                    tmp_dir, "source.tif"))
+                metrics = PipelineMetrics()
+
+                cog.create_retiled_cogs(source,
+                                        destination,
+                                        tile_size=(400, 400),
+                                        metrics=metrics)
+
+                names = sorted(
+                    os.path.basename(path)
+                    for path in fs.ls("/test-create-retiled-cogs",
+                                      detail=False))
+                self.assertEqual(names, [
+                    "manifest.json", "source_1_2.tif", "source_1_3.tif",
+                    "source_2_2.tif", "source_2_3.tif"
+                ])
+                self.assertIn("upload", metrics.to_dict()["run"]["stages"])
+                with rasterio.open(
+                        MemoryFile(fs.cat(
+                            f"{destination}/source_2_3.tif"))) as dataset:
+                    self.assertEqual(dataset.shape, (300, 200))
+                    self.assertTrue((dataset.read(1) == 41).all())
+
+                # Nothing to redo on a rerun.
+                with patch.object(cog, "_encode_tile") as encode_tile:
+                    cog.create_retiled_cogs(source,
+                                            destination,
+                                            tile_size=(400, 400))
+                encode_tile.assert_not_called()
+        finally:
+            fs.rm("/test-create-retiled-cogs", recursive=True)
+
+    def test_write_window_cog_to_fsspec_url(self):
+        fs = fsspec.filesystem("memory")
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            with rasterio.open(source) as dataset:
+                window = Window(500, 0, 500, 700)
+                cog.write_window_cog(dataset, window,
+                                     dataset.read(window=window),
+                                     "memory://write-window-cog/tile.tif")
+        try:
+            with rasterio.open(
+                    MemoryFile(fs.cat(
+                        "memory://write-window-cog/tile.tif"))) as dataset:
+                self.assertEqual(dataset.shape, (700, 500))
+                self.assertEqual(dataset.overviews(1), [2])
+        finally:
+            fs.rm("/write-window-cog", recursive=True)
@@ -1,10 +1,21 @@
+import json
 import os.path
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 import pystac
+import rasterio
 from stactools.testing import CliTestCase
 
+from stactools.usgs_nlcd import geoparquet, stac
+from stactools.usgs_nlcd.cache import MetadataCache
 from stactools.usgs_nlcd.commands import create_usgsnlcd_command
+from tests import create_test_raster
+from tests.test_validation import (
+    PROJECTION_SCHEMA_URI,
+    TEST_SCHEMAS,
+    write_schemas,
+)
 
 
 class CommandsTest(CliTestCase):
@@ -57,3 +68,377 @@ class CommandsTest(CliTestCase):
             self.assertEqual(item.id, "usgs-nlcd-2019-05-09")
 
             item.validate()
+
+    def test_create_cog_tile_metrics_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            metrics_file = os.path.join(tmp_dir, "metrics.json")
+            destination = os.path.join(tmp_dir, "tiles")
+            os.mkdir(destination)
+
+            result = self.run_command([
+                "usgsnlcd", "create-cog", "-s", source, "-d", destination,
+                "--tile", "--metrics-file", metrics_file
+            ])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+
+            self.assertTrue(
+                os.path.exists(os.path.join(destination, "source_1_1.tif")))
+            with open(metrics_file) as f:
+                report = json.load(f)
+            self.assertEqual(report["run"]["tile_count"], 1)
+            self.assertIn("translate", report["tiles"][0]["stages"])
+
+    def test_create_cog_tile_verify_checksums(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            destination = os.path.join(tmp_dir, "tiles")
+            os.mkdir(destination)
+            args = [
+                "usgsnlcd", "create-cog", "-s", source, "-d", destination,
+                "--tile"
+            ]
+            self.assertEqual(self.run_command(args).exit_code, 0)
+            tile = os.path.join(destination, "source_1_1.tif")
+            with open(tile, "r+b") as f:
+                f.seek(-1, os.SEEK_END)
+                f.write(b"x")
+            mtime = os.stat(tile).st_mtime_ns
+
+            result = self.run_command(args + ["--verify-checksums"])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+
+            # The corrupt tile, of the same size, was redone.
+            self.assertNotEqual(os.stat(tile).st_mtime_ns, mtime)
+            with rasterio.open(tile) as dataset:
+                self.assertEqual(dataset.read(1)[0, -1], 41)
+
+    def test_create_cog_tile_several_years(self):
+        with TemporaryDirectory() as tmp_dir:
+            sources = [
+                create_test_raster(
+                    os.path.join(tmp_dir,
+                                 f"nlcd_{year}_land_cover_l48_20210604.tif"))
+                for year in [2016, 2019]
+            ]
+            destination = os.path.join(tmp_dir, "tiles")
+            os.mkdir(destination)
+
+            result = self.run_command([
+                "usgsnlcd", "create-cog", "-s", sources[0], "-s", sources[1],
+                "-d", destination, "--tile"
+            ])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+
+            for year in [2016, 2019]:
+                self.assertTrue(
+                    os.path.exists(
+                        os.path.join(
+                            destination,
+                            f"nlcd_{year}_land_cover_l48_20210604_1_1.tif")))
+
+    def test_create_cog_tile_size_snapped_to_blocks(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = create_test_raster(os.path.join(tmp_dir, "source.tif"))
+            destination = os.path.join(tmp_dir, "tiles")
+            os.mkdir(destination)
+
+            result = self.run_command([
+                "usgsnlcd", "create-cog", "-s", source, "-d", destination,
+                "--tile", "--tile-size", "400", "--snap-to-blocks",
+                "--overlap", "16"
+            ])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+
+            # 400 pixels round to one 512 pixel block.
+            with rasterio.open(os.path.join(destination,
+                                            "source_1_2.tif")) as dataset:
+                self.assertEqual(dataset.shape, (528, 504))
+                self.assertEqual(dataset.transform.c, -2000000 + 496 * 30)
+
+    def test_create_items(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = os.path.join(tmp_dir, "cogs")
+            os.mkdir(source)
+            for tile in ["01_01", "01_02"]:
+                create_test_raster(
+                    os.path.join(
+                        source,
+                        f"nlcd_2019_land_cover_l48_20210604_{tile}.tif"))
+            create_test_raster(os.path.join(source, "not_nlcd.tif"))
+            destination = os.path.join(tmp_dir, "items")
+            os.mkdir(destination)
+
+            # Schema validation needs network access.
+            with patch.object(pystac.Item, "validate"):
+                result = self.run_command([
+                    "usgsnlcd", "create-items", "-s", source, "-d",
+                    destination, "-w", "2"
+                ])
+
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn("not_nlcd.tif", result.output)
+            self.assertEqual(
+                sorted(os.listdir(destination)),
+                ["usgs-nlcd-2019-01-01.json", "usgs-nlcd-2019-01-02.json"])
+
+    def test_create_items_collection(self):
+        with TemporaryDirectory() as tmp_dir:
+            hrefs = [
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        f"nlcd_2019_land_cover_l48_20210604_{tile}.tif"))
+                for tile in ["01_01", "01_02"]
+            ]
+            list_file = os.path.join(tmp_dir, "cogs.txt")
+            with open(list_file, "w") as f:
+                f.write("\n".join(hrefs))
+            destination = os.path.join(tmp_dir, "catalog")
+
+            with patch.object(pystac.Item, "validate"), patch.object(
+                    pystac.Collection, "validate"):
+                result = self.run_command([
+                    "usgsnlcd", "create-items", "-s", list_file, "-d",
+                    destination, "--collection"
+                ])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+
+            collection = pystac.read_file(
+                os.path.join(destination, "collection.json"))
+            self.assertEqual(
+                sorted(item.id for item in collection.get_all_items()),
+                ["usgs-nlcd-2019-01-01", "usgs-nlcd-2019-01-02"])
+
+    def test_create_items_ndjson(self):
+        with TemporaryDirectory() as tmp_dir:
+            for tile in ["01_01", "01_02"]:
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        f"nlcd_2019_land_cover_l48_20210604_{tile}.tif"))
+            source = os.path.join(tmp_dir, "*.tif")
+
+            with patch.object(pystac.Item, "validate"):
+                result = self.run_command([
+                    "usgsnlcd", "create-items", "-s", source, "--ndjson", "-"
+                ])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+            items = [
+                json.loads(line) for line in result.output.splitlines()
+                if line.startswith("{")
+            ]
+            self.assertEqual(sorted(item["id"] for item in items),
+                             ["usgs-nlcd-2019-01-01", "usgs-nlcd-2019-01-02"])
+
+            destination = os.path.join(tmp_dir, "catalog")
+            ndjson_path = os.path.join(tmp_dir, "items.ndjson")
+            with patch.object(pystac.Item, "validate"), patch.object(
+                    pystac.Collection, "validate"):
+                result = self.run_command([
+                    "usgsnlcd", "create-items", "-s", source, "-d",
+                    destination, "--collection", "--ndjson", ndjson_path
+                ])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+            collection = pystac.read_file(
+                os.path.join(destination, "collection.json"))
+            self.assertEqual(list(collection.get_all_items()), [])
+            self.assertEqual(collection.extent.spatial.bboxes[0],
+                             items[0]["bbox"])
+            with open(ndjson_path) as f:
+                self.assertEqual(
+                    [json.loads(line)["collection"] for line in f],
+                    [collection.id] * 2)
+            self.assertEqual(sorted(os.listdir(destination)),
+                             ["collection.json"])
+
+            result = self.run_command(
+                ["usgsnlcd", "create-items", "-s", source, "--collection"])
+            self.assertNotEqual(result.exit_code, 0)
+
+    def test_export_geoparquet(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_paths = [
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        f"nlcd_2019_land_cover_l48_20210604_{tile}.tif"))
+                for tile in ["01_01", "01_02"]
+            ]
+            collection = stac.create_collection()
+            collection.normalize_hrefs(os.path.join(tmp_dir, "catalog"))
+            for item in stac.create_items(cog_paths):
+                stac.save_item_in_collection(item, collection)
+            collection.save_object(include_self_link=False)
+            destination = os.path.join(tmp_dir, "items.parquet")
+
+            result = self.run_command([
+                "usgsnlcd", "export-geoparquet",
+                collection.get_self_href(), destination
+            ])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+            self.assertIn("Wrote 2 items", result.output)
+            self.assertEqual(
+                sorted(
+                    geoparquet.read_table(destination).column(
+                        "id").to_pylist()),
+                ["usgs-nlcd-2019-01-01", "usgs-nlcd-2019-01-02"])
+
+            # A glob of item files.
+            result = self.run_command([
+                "usgsnlcd", "export-geoparquet",
+                os.path.join(tmp_dir, "catalog", "*", "*.json"), destination
+            ])
+            self.assertIn("Wrote 2 items", result.output)
+
+    def test_invalidate_cache(self):
+        with TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, "cache.sqlite")
+            create_test_raster(
+                os.path.join(tmp_dir,
+                             "nlcd_2019_land_cover_l48_20210604_01_01.tif"))
+            with patch.object(pystac.Item, "validate"):
+                result = self.run_command([
+                    "usgsnlcd", "create-items", "-s",
+                    os.path.join(tmp_dir, "*.tif"), "-d", tmp_dir, "--cache",
+                    cache_path
+                ])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+            with MetadataCache(cache_path) as cache:
+                self.assertEqual(len(cache), 1)
+
+            result = self.run_command(
+                ["usgsnlcd", "invalidate-cache", cache_path])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+            self.assertIn("Removed 1 COGs", result.output)
+            with MetadataCache(cache_path) as cache:
+                self.assertEqual(len(cache), 0)
+
+    def test_validate(self):
+        with TemporaryDirectory() as tmp_dir:
+            schema_dir = os.path.join(tmp_dir, "schemas")
+            write_schemas(schema_dir, TEST_SCHEMAS)
+            item = stac.create_item(
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        "nlcd_2019_land_cover_l48_20210604_01_01.tif")))
+            item_dict = item.to_dict(include_self_link=False)
+            with open(os.path.join(tmp_dir, "valid.json"), "w") as f:
+                json.dump(item_dict, f)
+            item_dict["properties"]["proj:epsg"] = "6350"
+            with open(os.path.join(tmp_dir, "invalid.json"), "w") as f:
+                json.dump(item_dict, f)
+            # Only the core and projection schemas are needed.
+            item_dict["stac_extensions"] = [PROJECTION_SCHEMA_URI]
+            with open(os.path.join(tmp_dir, "items.ndjson"), "w") as f:
+                f.write(json.dumps(item_dict) + "\n")
+
+            result = self.run_command([
+                "usgsnlcd", "validate",
+                os.path.join(tmp_dir, "*.json"), "--schema-dir", schema_dir
+            ])
+            # The file and raster schemas are not cached.
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn("is not in", result.output)
+
+            result = self.run_command([
+                "usgsnlcd", "validate",
+                os.path.join(tmp_dir, "items.ndjson"), "--schema-dir",
+                schema_dir
+            ])
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn("Validated 1 items, 1 invalid", result.output)
+            self.assertIn(item.id, result.output)
+
+    def test_create_change(self):
+        with TemporaryDirectory() as tmp_dir:
+            sources = [
+                create_test_raster(
+                    os.path.join(tmp_dir,
+                                 f"nlcd_{year}_land_cover_l48_20210604.tif"))
+                for year in [2001, 2019]
+            ]
+            result = self.run_command([
+                "usgsnlcd", "create-change", *sources, "-d", tmp_dir,
+                "--change-raster", "-p", "fast-write"
+            ])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+
+            with open(os.path.join(tmp_dir, "transitions.json")) as f:
+                transitions = json.load(f)
+            self.assertEqual(
+                transitions,
+                {"2001-2019": {
+                    "0": {
+                        "0": 350000
+                    },
+                    "41": {
+                        "41": 350000
+                    }
+                }})
+            self.assertTrue(
+                os.path.exists(
+                    os.path.join(tmp_dir, "nlcd_change_2001_2019.tif")))
+
+            result = self.run_command(
+                ["usgsnlcd", "create-change", sources[0], "-d", tmp_dir])
+            self.assertNotEqual(result.exit_code, 0)
+
+    def test_list_tiles(self):
+        result = self.run_command([
+            "usgsnlcd", "list-tiles", "--bbox", "-100.1", "40.0", "-99.9",
+            "40.1"
+        ])
+        self.assertEqual(result.exit_code, 0, msg="\n{}".format(result.output))
+        tiles = result.output.split()
+        self.assertTrue(tiles)
+        self.assertTrue(all(len(tile) == 5 for tile in tiles))
+
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "aoi.geojson")
+            with open(path, "w") as f:
+                json.dump(
+                    {
+                        "type":
+                        "FeatureCollection",
+                        "features": [{
+                            "type": "Feature",
+                            "properties": {},
+                            "geometry": {
+                                "type":
+                                "Polygon",
+                                "coordinates": [[[-100.1, 40.0], [-99.9, 40.0],
+                                                 [-99.9, 40.1], [-100.1, 40.1],
+                                                 [-100.1, 40.0]]]
+                            }
+                        }]
+                    }, f)
+            result = self.run_command(
+                ["usgsnlcd", "list-tiles", "--geojson", path])
+        self.assertEqual(result.output.split(), tiles)
+
+        result = self.run_command(["usgsnlcd", "list-tiles"])
+        self.assertNotEqual(result.exit_code, 0)
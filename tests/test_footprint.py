@@ -0,0 +1,77 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+from pyproj import Transformer
+from shapely.geometry import box, shape
+from shapely.ops import transform
+
+from stactools.usgs_nlcd import stac
+from stactools.usgs_nlcd.cache import MetadataCache
+from stactools.usgs_nlcd.footprint import data_footprint, read_factor
+from tests import create_test_raster
+
+
+def _wgs84_box(west, south, east, north):
+    transformer = Transformer.from_crs(6350, 4326, always_xy=True)
+    return transform(transformer.transform, box(west, south, east, north))
+
+
+class FootprintTest(unittest.TestCase):
+    def test_read_factor(self):
+        self.assertEqual(read_factor(1000, 700, [], 1000000), 1)
+        self.assertEqual(read_factor(1000, 700, [2, 4, 8], 40000), 8)
+        self.assertEqual(read_factor(10000, 10000, [2, 4, 8, 16], 1 << 20), 16)
+        # Without a small enough overview, the raster is decimated.
+        self.assertEqual(read_factor(10000, 10000, [2], 1 << 20), 10)
+
+    def test_data_footprint(self):
+        with TemporaryDirectory() as tmp_dir:
+            # Data in the right half, and in a block of the lower left.
+            data = np.zeros((700, 1000), dtype=np.uint8)
+            data[:, 500:] = 41
+            data[600:, :100] = 82
+            path = create_test_raster(os.path.join(tmp_dir, "source.tif"),
+                                      data=data)
+
+            footprint = shape(data_footprint(path, max_pixels=250 * 175))
+
+        right = _wgs84_box(-2000000 + 500 * 30, 3000000 - 700 * 30,
+                           -2000000 + 1000 * 30, 3000000)
+        lower_left = _wgs84_box(-2000000, 3000000 - 700 * 30,
+                                -2000000 + 100 * 30, 3000000 - 600 * 30)
+        expected = right.union(lower_left)
+        self.assertEqual(footprint.geom_type, "MultiPolygon")
+        self.assertLess(
+            footprint.symmetric_difference(expected).area,
+            0.01 * expected.area)
+
+    def test_no_data(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = create_test_raster(os.path.join(tmp_dir, "source.tif"),
+                                      data=np.zeros((70, 100), dtype=np.uint8))
+            self.assertIsNone(data_footprint(path))
+
+    def test_create_item_with_footprint(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_path = create_test_raster(
+                os.path.join(tmp_dir,
+                             "nlcd_2019_land_cover_l48_20210604_01_01.tif"))
+            with MetadataCache(os.path.join(tmp_dir, "cache.sqlite")) as cache:
+                item = stac.create_item(cog_path, cache=cache, footprint=True)
+                cached_item = stac.create_item(cog_path,
+                                               cache=cache,
+                                               footprint=True)
+                bounds_item = stac.create_item(cog_path, cache=cache)
+
+        self.assertEqual(cached_item.to_dict(), item.to_dict())
+        self.assertEqual(list(shape(item.geometry).bounds), item.bbox)
+        # The left half of the raster has no data.
+        right = _wgs84_box(-2000000 + 500 * 30, 3000000 - 700 * 30,
+                           -2000000 + 1000 * 30, 3000000)
+        self.assertLess(
+            shape(item.geometry).symmetric_difference(right).area,
+            0.01 * right.area)
+        self.assertEqual(bounds_item.bbox[2], item.bbox[2])
+        self.assertLess(bounds_item.bbox[0], item.bbox[0])
@@ -0,0 +1,111 @@
+import json
+import os
+import unittest
+from datetime import datetime
+from tempfile import TemporaryDirectory
+
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from shapely import wkb
+from shapely.geometry import MultiPolygon, box, mapping
+
+from stactools.usgs_nlcd import geoparquet, stac
+from tests import create_test_raster
+
+
+class GeoParquetTest(unittest.TestCase):
+    def test_write_and_read_items(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_path = create_test_raster(
+                os.path.join(tmp_dir,
+                             "nlcd_2019_land_cover_l48_20210604_01_01.tif"))
+            base = stac.create_item(cog_path, class_histogram=True)
+            items = []
+            # Ten items per year, and per row group, moving east.
+            for i, year in enumerate([2001] * 10 + [2011] * 10 + [2019] * 10):
+                item = base.clone()
+                item.id = f"{base.id}-{i}"
+                item.bbox = [-120 + i, 40, -119.5 + i, 40.5]
+                item.geometry = mapping(box(*item.bbox))
+                item.datetime = datetime(year, 1, 1)
+                item.common_metadata.start_datetime = datetime(year, 1, 1)
+                items.append(item)
+            path = os.path.join(tmp_dir, "items.parquet")
+
+            count = geoparquet.write_items(iter(items),
+                                           path,
+                                           row_group_size=10)
+
+            self.assertEqual(count, 30)
+            parquet_file = pq.ParquetFile(path)
+            self.assertEqual(parquet_file.num_row_groups, 3)
+            geo = json.loads(parquet_file.schema_arrow.metadata[b"geo"])
+            self.assertEqual(geo["primary_column"], "geometry")
+
+            table = geoparquet.read_table(path)
+            self.assertEqual(table.schema, geoparquet.ITEM_SCHEMA)
+            row = table.slice(0, 1).to_pylist()[0]
+            self.assertEqual(row["id"], f"{base.id}-0")
+            self.assertEqual(row["year"], 2001)
+            self.assertEqual(row["proj:epsg"], 6350)
+            self.assertEqual(row["proj:shape"], [700, 1000])
+            self.assertEqual(row["landcover_href"], cog_path)
+            self.assertEqual(dict(row["nlcd:class_counts"]), {
+                0: 350000,
+                41: 350000
+            })
+            self.assertEqual(
+                wkb.loads(row["geometry"]).bounds, (-120, 40, -119.5, 40.5))
+            self.assertEqual(row["type"], "Feature")
+            self.assertEqual(row["stac_extensions"], base.stac_extensions)
+
+            # The items are read back whole.
+            self.assertEqual(
+                [item.to_dict() for item in geoparquet.read_items(path)],
+                [json.loads(json.dumps(item.to_dict())) for item in items])
+            self.assertEqual([
+                item.id for item in geoparquet.read_items(
+                    path, years=[2011, 2019], bbox=(-105.2, 39, -100, 41))
+            ], [f"{base.id}-{i}" for i in range(15, 21)])
+
+            table = geoparquet.read_table(path,
+                                          years=[2011, 2019],
+                                          bbox=(-105.2, 39, -100, 41),
+                                          columns=["id"])
+            self.assertEqual(
+                table.column("id").to_pylist(),
+                [f"{base.id}-{i}" for i in range(15, 21)])
+
+            # Only the row groups of matching years and bounds are read.
+            fragment = next(ds.dataset(path).get_fragments())
+            self.assertEqual(
+                len(
+                    fragment.split_by_row_group(
+                        geoparquet.item_filter(years=[2019]))), 1)
+            self.assertEqual(
+                len(
+                    fragment.split_by_row_group(
+                        geoparquet.item_filter(bbox=(-95, 39, -93, 41)))), 1)
+
+    def test_write_multipolygon_footprints(self):
+        with TemporaryDirectory() as tmp_dir:
+            item = stac.create_item(
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        "nlcd_2019_land_cover_l48_20210604_01_01.tif")))
+            footprint = MultiPolygon(
+                [box(-120, 40, -119.5, 40.5),
+                 box(-119, 40, -118.5, 40.5)])
+            item.geometry = mapping(footprint)
+            item.bbox = list(footprint.bounds)
+            path = os.path.join(tmp_dir, "items.parquet")
+
+            geoparquet.write_items([item], path)
+
+            geo = json.loads(
+                pq.ParquetFile(path).schema_arrow.metadata[b"geo"])
+            self.assertIn("MultiPolygon",
+                          geo["columns"]["geometry"]["geometry_types"])
+            row = geoparquet.read_table(path).to_pylist()[0]
+            self.assertTrue(wkb.loads(row["geometry"]).equals(footprint))
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+from affine import Affine
+from rasterio.windows import Window
+from shapely.geometry import box, mapping
+
+from stactools.usgs_nlcd import cog
+from stactools.usgs_nlcd.grid import TileGrid, snap_tile_size
+
+
+class TileGridTest(unittest.TestCase):
+    def test_nlcd_grid(self):
+        grid = TileGrid.nlcd()
+        self.assertEqual((grid.rows, grid.cols), (11, 17))
+        self.assertEqual(grid.tile_name(5, 9), "05_09")
+        self.assertEqual(grid.bounds(1, 1),
+                         (-2493045.0, 3010005.0, -2193045.0, 3310005.0))
+        west, south, east, north = grid.bounds(11, 17)
+        self.assertEqual((east, south),
+                         (-2493045.0 + 161190 * 30, 3310005.0 - 104424 * 30))
+        west, south, east, north = grid.bbox(5, 9)
+        self.assertTrue(-130 < west < east < -60)
+        self.assertTrue(20 < south < north < 50)
+        with self.assertRaises(ValueError):
+            grid.window(12, 1)
+
+    def test_windows_match_tile_windows(self):
+        grid = TileGrid(2500, 1200, (1000, 500))
+        self.assertEqual([(row, col, grid.window(row, col))
+                          for row, col in grid.tiles()],
+                         list(cog.tile_windows(2500, 1200, (1000, 500))))
+
+    def test_tiles_for_bounds(self):
+        grid = TileGrid.nlcd()
+        tiles = list(grid.tiles())
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            x = np.sort(rng.uniform(-2600000, 2500000, 2))
+            y = np.sort(rng.uniform(100000, 3400000, 2))
+            bounds = (x[0], y[0], x[1], y[1])
+            expected = [
+                tile for tile in tiles
+                if box(*grid.bounds(*tile)).intersection(box(*bounds)).area
+            ]
+            self.assertEqual(grid.tiles_for_bounds(bounds), expected)
+
+        # Bounds on tile edges only cover the tiles they are inside of.
+        self.assertEqual(
+            grid.tiles_for_bounds(
+                (-2193045.0, 2710005.0, -1893045.0, 3010005.0)), [(2, 2)])
+        self.assertEqual(grid.tiles_for_bounds((0, -1e7, 1, -9e6)), [])
+
+    def test_tiles_for_geometry(self):
+        grid = TileGrid.nlcd()
+        west, south, east, north = grid.bbox(5, 9)
+        center_x, center_y = (west + east) / 2, (south + north) / 2
+        small = box(center_x - 0.1, center_y - 0.1, center_x + 0.1,
+                    center_y + 0.1)
+        self.assertEqual(grid.tiles_for_geometry(mapping(small)), [(5, 9)])
+        self.assertEqual(grid.tiles_for_bbox(small.bounds), [(5, 9)])
+
+        # A thin diagonal line crosses fewer tiles than its bounds do.
+        line = {"type": "LineString", "coordinates": [[-120, 45], [-75, 30]]}
+        self.assertLess(len(grid.tiles_for_geometry(line)),
+                        len(grid.tiles_for_bbox((-120, 30, -75, 45))))
+
+    def test_snap_tile_size(self):
+        self.assertEqual(snap_tile_size((10000, 10000)), (10240, 10240))
+        self.assertEqual(snap_tile_size((1000, 200)), (1024, 512))
+        self.assertEqual(snap_tile_size((700, 1536), 256), (768, 1536))
+
+    def test_overlap(self):
+        north_up = Affine(1, 0, 0, 0, -1, 0)
+        grid = TileGrid(2500, 1200, (1000, 500), north_up, overlap=50)
+        self.assertEqual((grid.rows, grid.cols), (3, 3))
+        self.assertEqual(grid.window(1, 1), Window(0, 0, 1050, 550))
+        self.assertEqual(grid.window(2, 2), Window(950, 450, 1100, 600))
+        self.assertEqual(grid.window(3, 3), Window(1950, 950, 550, 250))
+        self.assertEqual(grid.tile_name(2, 2), "2_2")
+
+        # A query close to a tile edge also falls in the neighbouring tile.
+        self.assertEqual(grid.tiles_for_bounds((1020, -200, 1100, -100)),
+                         [(1, 1), (1, 2)])
+        self.assertEqual(
+            TileGrid(2500, 1200, (1000, 500), north_up).tiles_for_bounds(
+                (1020, -200, 1100, -100)), [(1, 2)])
+        with self.assertRaises(ValueError):
+            TileGrid(2500, 1200, overlap=-1)
@@ -0,0 +1,51 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+from pystac import Asset
+
+from stactools.usgs_nlcd import histogram
+from tests import create_test_raster
+
+
+class HistogramTest(unittest.TestCase):
+    def test_class_counts(self):
+        data = np.random.default_rng(0).choice(np.array([0, 11, 41, 82],
+                                                        dtype=np.uint8),
+                                               size=(700, 1000))
+        expected = {
+            int(value): int(count)
+            for value, count in zip(*np.unique(data, return_counts=True))
+        }
+        with TemporaryDirectory() as tmp_dir:
+            path = create_test_raster(os.path.join(tmp_dir, "test.tif"),
+                                      data=data)
+            for workers in [1, 3]:
+                with self.subTest(workers=workers):
+                    self.assertEqual(
+                        histogram.class_counts(path,
+                                               workers=workers,
+                                               chunk_size=256), expected)
+
+    def test_class_fractions(self):
+        self.assertEqual(histogram.class_fractions({
+            0: 50,
+            41: 30,
+            82: 10
+        }), {
+            41: 0.75,
+            82: 0.25
+        })
+        self.assertEqual(histogram.class_fractions({0: 50}), {})
+
+    def test_add_class_histogram(self):
+        asset = Asset("test.tif")
+        histogram.add_class_histogram(asset, {"82": 1, "0": 2, "11": 3})
+        self.assertEqual(
+            list(asset.extra_fields[histogram.CLASS_COUNTS_FIELD].items()),
+            [("0", 2), ("11", 3), ("82", 1)])
+        self.assertEqual(asset.extra_fields[histogram.CLASS_FRACTIONS_FIELD], {
+            "11": 0.75,
+            "82": 0.25
+        })
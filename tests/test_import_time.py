@@ -0,0 +1,57 @@
+import json
+import subprocess
+import sys
+import unittest
+
+# Libraries the package and its command line interface must not import until
+# a command runs.
+HEAVY_MODULES = [
+    "fsspec", "numpy", "pyarrow", "pyproj", "pystac", "rasterio", "shapely"
+]
+
+# Seconds allowed to import the package and its commands, in a fresh
+# interpreter. Eager imports of the heavy modules take several times that.
+IMPORT_TIME_BUDGET = 0.3
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import stactools.usgs_nlcd
+import stactools.usgs_nlcd.commands
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+def _import_package() -> dict:
+    output = subprocess.run([sys.executable, "-c", _SCRIPT],
+                            check=True,
+                            capture_output=True,
+                            text=True).stdout
+    return json.loads(output)
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_no_heavy_imports(self):
+        modules = _import_package()["modules"]
+        self.assertEqual([name for name in HEAVY_MODULES if name in modules],
+                         [])
+
+    def test_import_time_budget(self):
+        seconds = min(_import_package()["seconds"] for _ in range(3))
+        self.assertLess(seconds, IMPORT_TIME_BUDGET)
+
+    def test_lazy_attributes(self):
+        from pyproj import CRS
+
+        import stactools.usgs_nlcd
+        from stactools.usgs_nlcd import constants, stac
+
+        self.assertIs(stactools.usgs_nlcd.create_item, stac.create_item)
+        self.assertIs(constants.NLCD_CRS, constants.NLCD_CRS)
+        self.assertEqual(CRS.from_wkt(constants.NLCD_CRS_WKT),
+                         constants.NLCD_CRS)
+        with self.assertRaises(AttributeError):
+            stactools.usgs_nlcd.missing
+        with self.assertRaises(AttributeError):
+            constants.missing
@@ -0,0 +1,55 @@
+import gzip
+import io
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from stactools.usgs_nlcd import ndjson, stac
+from tests import create_test_raster
+
+
+class NdjsonTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.items = list(
+            stac.create_items([
+                create_test_raster(
+                    os.path.join(
+                        self.tmp_dir.name,
+                        f"nlcd_2019_land_cover_l48_20210604_{tile}.tif"))
+                for tile in ["01_01", "01_02"]
+            ]))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_items(self):
+        path = os.path.join(self.tmp_dir.name, "items.ndjson")
+        self.assertEqual(ndjson.write_items(iter(self.items), path), 2)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         [item.to_dict() for item in self.items])
+
+    def test_write_items_gzip(self):
+        path = os.path.join(self.tmp_dir.name, "items.ndjson.gz")
+        ndjson.write_items(self.items, path)
+        with gzip.open(path, "rt") as f:
+            ids = [json.loads(line)["id"] for line in f]
+        self.assertEqual(ids, [item.id for item in self.items])
+
+    def test_lines_are_flushed_as_written(self):
+        path = os.path.join(self.tmp_dir.name, "items.ndjson")
+        with ndjson.NdjsonWriter(path) as writer:
+            writer.write(self.items[0])
+            with open(path) as f:
+                self.assertEqual(json.loads(f.read())["id"], self.items[0].id)
+
+    def test_write_items_to_stdout(self):
+        stdout = io.TextIOWrapper(io.BytesIO())
+        with patch("sys.stdout", stdout):
+            ndjson.write_items(self.items, ndjson.STDOUT)
+        self.assertEqual(stdout.buffer.getvalue().decode().count("\n"),
+                         len(self.items))
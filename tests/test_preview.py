@@ -0,0 +1,90 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+
+from stactools.usgs_nlcd import stac
+from stactools.usgs_nlcd.constants import NLCD_COLORMAP
+from stactools.usgs_nlcd.preview import colorize, create_preview, preview_href
+from tests import create_test_raster
+
+
+class PreviewTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.cog_path = create_test_raster(
+            os.path.join(self.tmp_dir.name,
+                         "nlcd_2019_land_cover_l48_20210604_01_01.tif"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_colorize(self):
+        rgba = colorize(np.array([[0, 11], [82, 250]], dtype=np.uint8))
+        self.assertEqual(rgba.shape, (4, 2, 2))
+        self.assertEqual(list(rgba[:, 0, 1]), [*NLCD_COLORMAP[11], 255])
+        self.assertEqual(list(rgba[:, 1, 0]), [*NLCD_COLORMAP[82], 255])
+        # No data and unknown values are transparent.
+        self.assertEqual(rgba[3, 0, 0], 0)
+        self.assertEqual(rgba[3, 1, 1], 0)
+
+    def test_create_preview_from_smallest_overview(self):
+        with rasterio.open(self.cog_path, "r+") as dataset:
+            dataset.build_overviews([2, 4], Resampling.nearest)
+        path = os.path.join(self.tmp_dir.name, "preview.png")
+
+        self.assertEqual(create_preview(self.cog_path, path), "image/png")
+
+        with rasterio.open(path) as image:
+            self.assertEqual(image.driver, "PNG")
+            self.assertEqual(image.shape, (175, 250))
+            rgba = image.read()
+        self.assertEqual(list(rgba[:, 0, -1]), [*NLCD_COLORMAP[41], 255])
+        self.assertEqual(rgba[3, 0, 0], 0)
+
+    def test_create_preview_webp(self):
+        path = os.path.join(self.tmp_dir.name, "preview.webp")
+        self.assertEqual(
+            create_preview(self.cog_path, path, "webp", max_size=100),
+            "image/webp")
+        with rasterio.open(path) as image:
+            self.assertEqual(image.driver, "WEBP")
+            self.assertEqual(image.shape, (70, 100))
+            # Lossless.
+            self.assertEqual(list(image.read()[:, 0, -1]),
+                             [*NLCD_COLORMAP[41], 255])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            create_preview(self.cog_path,
+                           os.path.join(self.tmp_dir.name, "preview.gif"),
+                           "gif")
+
+    def test_create_item_with_preview(self):
+        preview_dir = os.path.join(self.tmp_dir.name, "previews")
+        os.mkdir(preview_dir)
+        item = stac.create_item(self.cog_path,
+                                preview_format="png",
+                                preview_dir=preview_dir)
+        thumbnail = item.assets["thumbnail"]
+        self.assertEqual(thumbnail.href,
+                         preview_href(self.cog_path, "png", preview_dir))
+        self.assertEqual(thumbnail.media_type, "image/png")
+        self.assertEqual(thumbnail.roles, ["thumbnail"])
+        self.assertTrue(os.path.exists(thumbnail.href))
+
+    def test_create_items_with_preview(self):
+        cog_paths = [
+            self.cog_path,
+            create_test_raster(
+                os.path.join(self.tmp_dir.name,
+                             "nlcd_2019_land_cover_l48_20210604_01_02.tif"))
+        ]
+        items = list(stac.create_items(cog_paths, preview_format="webp"))
+        self.assertEqual([item.assets["thumbnail"].href for item in items], [
+            os.path.splitext(path)[0] + ".preview.webp" for path in cog_paths
+        ])
+        self.assertNotIn("thumbnail", stac.create_item(self.cog_path).assets)
@@ -1,11 +1,20 @@
+import asyncio
 import os
 import unittest
+from datetime import datetime, timezone
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
+import aiohttp
 import pystac
 
-from stactools.usgs_nlcd import stac
-from tests import test_data
+from stactools.usgs_nlcd import histogram, stac, tiff
+from stactools.usgs_nlcd.cache import MetadataCache
+from tests import create_test_raster, serve_directory, test_data
+
+
+async def collect(items):
+    return [item async for item in items]
 
 
 class StacTest(unittest.TestCase):
@@ -116,3 +125,262 @@ class StacTest(unittest.TestCase):
             assert "label:classes" in summaries
 
             collection.validate()
+
+    def test_create_items(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_paths = [
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        f"nlcd_{year}_land_cover_l48_20210604_{tile}.tif"))
+                for year in [2016, 2019] for tile in ["01_02", "01_01"]
+            ]
+
+            items = list(stac.create_items(iter(cog_paths), workers=2))
+
+            self.assertEqual([item.id for item in items], [
+                "usgs-nlcd-2016-01-02",
+                "usgs-nlcd-2016-01-01",
+                "usgs-nlcd-2019-01-02",
+                "usgs-nlcd-2019-01-01",
+            ])
+            for cog_path, item in zip(cog_paths, items):
+                self.assertEqual(item.to_dict(),
+                                 stac.create_item(cog_path).to_dict())
+            asset = items[0].assets["landcover"]
+            self.assertEqual(asset.extra_fields["file:size"],
+                             os.path.getsize(cog_paths[0]))
+            self.assertEqual(asset.extra_fields["proj:shape"], [700, 1000])
+            west, south, east, north = items[0].bbox
+            self.assertLess(west, east)
+            self.assertLess(south, north)
+
+    def test_create_items_cached(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_paths = [
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        f"nlcd_2019_land_cover_l48_20210604_01_{col:02d}.tif"))
+                for col in [1, 2]
+            ]
+            expected = [stac.create_item(p).to_dict() for p in cog_paths]
+
+            with MetadataCache(os.path.join(tmp_dir, "cache.sqlite")) as cache:
+                items = list(stac.create_items(cog_paths, cache=cache))
+                self.assertEqual(len(cache), 2)
+                with patch.object(tiff, "read_header") as read_header:
+                    cached_items = list(
+                        stac.create_items(cog_paths, cache=cache))
+                    read_header.assert_not_called()
+
+                # A changed COG is read again.
+                create_test_raster(cog_paths[0], width=500)
+                item = stac.create_item(cog_paths[0], cache=cache)
+                self.assertEqual(
+                    item.assets["landcover"].extra_fields["proj:shape"],
+                    [700, 500])
+
+        self.assertEqual([item.to_dict() for item in items], expected)
+        self.assertEqual([item.to_dict() for item in cached_items], expected)
+
+    def test_create_item_class_histogram(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_path = create_test_raster(
+                os.path.join(tmp_dir,
+                             "nlcd_2019_land_cover_l48_20210604_01_01.tif"))
+            with MetadataCache(os.path.join(tmp_dir, "cache.sqlite")) as cache:
+                self.assertNotIn(
+                    "nlcd:class_counts",
+                    stac.create_item(
+                        cog_path, cache=cache).assets["landcover"].to_dict())
+                item = stac.create_item(cog_path,
+                                        cache=cache,
+                                        class_histogram=True)
+                with patch.object(histogram, "class_counts") as class_counts:
+                    cached_item = stac.create_item(cog_path,
+                                                   cache=cache,
+                                                   class_histogram=True)
+                    class_counts.assert_not_called()
+
+        asset = item.assets["landcover"].to_dict()
+        self.assertEqual(asset["nlcd:class_counts"], {
+            "0": 350000,
+            "41": 350000
+        })
+        self.assertEqual(asset["nlcd:class_fractions"], {"41": 1.0})
+        self.assertEqual(cached_item.to_dict(), item.to_dict())
+
+    def test_collection_summary(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_paths = [
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        f"nlcd_{year}_land_cover_l48_20210604_01_01.tif"))
+                for year in [2016, 2001, 2019]
+            ]
+            collection = stac.create_collection()
+            collection.normalize_hrefs(os.path.join(tmp_dir, "catalog"))
+            summary = stac.CollectionSummary()
+            for item in summary.summarize(stac.create_items(cog_paths)):
+                stac.save_item_in_collection(item, collection)
+            summary.update_collection(collection)
+            collection.save()
+
+            collection = pystac.read_file(
+                os.path.join(tmp_dir, "catalog", "collection.json"))
+            items = list(collection.get_all_items())
+
+        self.assertEqual(summary.count, 3)
+        self.assertEqual(sorted(item.id for item in items), [
+            "usgs-nlcd-2001-01-01", "usgs-nlcd-2016-01-01",
+            "usgs-nlcd-2019-01-01"
+        ])
+        self.assertEqual(collection.extent.spatial.bboxes, [items[0].bbox])
+        self.assertEqual(collection.extent.temporal.intervals, [[
+            datetime(2001, 1, 1, tzinfo=timezone.utc),
+            datetime(2021, 12, 31, tzinfo=timezone.utc)
+        ]])
+        self.assertEqual(collection.summaries.get_list("datetime"), [
+            "2001-01-01T00:00:00Z", "2016-01-01T00:00:00Z",
+            "2019-01-01T00:00:00Z"
+        ])
+        self.assertEqual(collection.summaries.get_list("proj:epsg"), [6350])
+
+    def test_save_item_in_collection_does_not_keep_items(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_path = create_test_raster(
+                os.path.join(tmp_dir,
+                             "nlcd_2019_land_cover_l48_20210604_01_01.tif"))
+            collection = stac.create_collection()
+            collection.normalize_hrefs(os.path.join(tmp_dir, "catalog"))
+            resolved = collection._resolved_objects
+            cached = (len(resolved.hrefs_to_objects),
+                      len(resolved.id_keys_to_objects))
+            for index in range(20):
+                item = stac.create_item(cog_path)
+                item.id = f"{item.id}-{index}"
+                stac.save_item_in_collection(item, collection)
+            self.assertEqual((len(
+                resolved.hrefs_to_objects), len(resolved.id_keys_to_objects)),
+                             cached)
+            self.assertEqual(len(collection.get_item_links()), 20)
+            collection.save()
+
+            item = pystac.read_file(
+                os.path.join(tmp_dir, "catalog", item.id, f"{item.id}.json"))
+            hrefs = {
+                link.rel: link.href
+                for link in item.links
+                if link.rel in ["root", "parent", "collection"]
+            }
+            self.assertEqual(item.collection_id, collection.id)
+        self.assertEqual(
+            hrefs, {
+                "root": "../collection.json",
+                "parent": "../collection.json",
+                "collection": "../collection.json"
+            })
+
+    def test_create_items_async(self):
+        with TemporaryDirectory() as tmp_dir, serve_directory(
+                tmp_dir) as base_url:
+            cog_paths = [
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        f"nlcd_2019_land_cover_l48_20210604_01_{col:02d}.tif"))
+                for col in range(1, 6)
+            ]
+            missing_path = os.path.join(
+                tmp_dir, "nlcd_2019_land_cover_l48_20210604_02_01.tif")
+            failures = []
+
+            items = asyncio.run(
+                collect(
+                    stac.create_items_async(
+                        cog_paths + [missing_path],
+                        lambda href: base_url + os.path.basename(href),
+                        concurrency=2,
+                        on_error=lambda href, e: failures.append(href))))
+
+            self.assertEqual(
+                [item.to_dict() for item in items],
+                [stac.create_item(p).to_dict() for p in cog_paths])
+            self.assertEqual(failures, [missing_path])
+            with self.assertRaises(aiohttp.ClientResponseError):
+                asyncio.run(
+                    collect(
+                        stac.create_items_async(
+                            [missing_path], lambda href: base_url + "x.tif")))
+
+            item = asyncio.run(stac.create_item_async(cog_paths[0]))
+            self.assertEqual(item.to_dict(), items[0].to_dict())
+
+    def test_create_items_async_is_bounded(self):
+        with TemporaryDirectory() as tmp_dir, serve_directory(
+                tmp_dir) as base_url:
+            cog_path = create_test_raster(
+                os.path.join(tmp_dir,
+                             "nlcd_2019_land_cover_l48_20210604_01_01.tif"))
+            taken = []
+
+            def hrefs():
+                for _ in range(10):
+                    taken.append(cog_path)
+                    yield cog_path
+
+            async def first():
+                items = stac.create_items_async(
+                    hrefs(),
+                    lambda href: base_url + os.path.basename(href),
+                    concurrency=3)
+                item = await items.__anext__()
+                await items.aclose()
+                return item
+
+            item = asyncio.run(first())
+            self.assertEqual(item.to_dict(),
+                             stac.create_item(cog_path).to_dict())
+        self.assertEqual(len(taken), 3)
+
+    def test_create_items_async_with_options(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_paths = [
+                create_test_raster(
+                    os.path.join(
+                        tmp_dir,
+                        f"nlcd_2019_land_cover_l48_20210604_01_{col:02d}.tif"))
+                for col in range(1, 3)
+            ]
+            options = {
+                "class_histogram": True,
+                "footprint": True,
+                "preview_format": "png",
+            }
+            expected = [
+                item.to_dict()
+                for item in stac.create_items(cog_paths, **options)
+            ]
+            with MetadataCache(os.path.join(tmp_dir, "cache.db")) as cache:
+                for _ in range(2):
+                    items = asyncio.run(
+                        collect(
+                            stac.create_items_async(cog_paths,
+                                                    cache=cache,
+                                                    **options)))
+                    self.assertEqual([item.to_dict() for item in items],
+                                     expected)
+                self.assertEqual(len(cache), 2)
+
+    def test_read_cog_facts_falls_back_to_gdal(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_path = create_test_raster(
+                os.path.join(tmp_dir,
+                             "nlcd_2019_land_cover_l48_20210604_01_01.tif"))
+            facts = stac.read_cog_facts(cog_path)
+            with patch.object(tiff, "parse_geotiff_header", return_value=None):
+                gdal_facts = stac.read_cog_facts(cog_path)
+        self.assertEqual(facts, gdal_facts)
+        self.assertEqual(facts["size"], gdal_facts["size"])
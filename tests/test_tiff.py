@@ -0,0 +1,119 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import fsspec
+import numpy as np
+import rasterio
+import requests
+from rasterio.transform import from_origin
+
+from stactools.usgs_nlcd import tiff
+from tests import create_test_raster, serve_directory
+
+
+class TiffTest(unittest.TestCase):
+    def assert_header_matches_gdal(self, path: str) -> None:
+        data, size = tiff.read_header(path)
+        self.assertEqual(size, os.path.getsize(path))
+        facts = tiff.parse_geotiff_header(data)
+        self.assertIsNotNone(facts)
+        with rasterio.open(path) as dataset:
+            self.assertEqual(facts["shape"], [dataset.height, dataset.width])
+            self.assertEqual(facts["transform"], list(dataset.transform))
+            self.assertEqual(facts["proj_bbox"], list(dataset.bounds))
+
+    def test_parse_geotiff_header(self):
+        with TemporaryDirectory() as tmp_dir:
+            self.assert_header_matches_gdal(
+                create_test_raster(os.path.join(tmp_dir, "tiled.tif")))
+
+    def test_parse_geotiff_header_variants(self):
+        data = np.full((300, 200), 41, dtype=np.uint8)
+        profiles = {
+            "cog.tif": {
+                "driver": "COG",
+                "compress": "deflate"
+            },
+            "bigtiff.tif": {
+                "driver": "GTiff",
+                "bigtiff": "YES"
+            },
+            "big-endian.tif": {
+                "driver": "GTiff",
+                "endianness": "BIG"
+            },
+        }
+        with TemporaryDirectory() as tmp_dir:
+            for name, profile in profiles.items():
+                path = os.path.join(tmp_dir, name)
+                with rasterio.open(path,
+                                   "w",
+                                   width=200,
+                                   height=300,
+                                   count=1,
+                                   dtype=np.uint8,
+                                   crs="EPSG:6350",
+                                   transform=from_origin(
+                                       1234567.0, 2345678.0, 30, 30),
+                                   nodata=0,
+                                   **profile) as dataset:
+                    dataset.write(data, 1)
+                with self.subTest(name):
+                    self.assert_header_matches_gdal(path)
+
+    def test_parse_geotiff_header_truncated(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = create_test_raster(os.path.join(tmp_dir, "tiled.tif"))
+            data, _ = tiff.read_header(path, 64)
+        self.assertIsNone(tiff.parse_geotiff_header(data))
+        self.assertIsNone(tiff.parse_geotiff_header(b"not a tiff"))
+
+    def test_read_header_over_http(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = create_test_raster(os.path.join(tmp_dir, "tiled.tif"))
+            with open(path, "rb") as f:
+                expected = f.read(64)
+            for ranges in [True, False]:
+                with self.subTest(ranges=ranges), serve_directory(
+                        tmp_dir, ranges) as url, patch.object(
+                            requests, "get", wraps=requests.get) as get:
+                    data, size = tiff.read_header(f"{url}tiled.tif", 64)
+                    self.assertEqual(data, expected)
+                    self.assertEqual(size, os.path.getsize(path))
+                    self.assertTrue(get.call_args.kwargs["stream"])
+                    self.assertEqual(get.call_args.kwargs["timeout"],
+                                     tiff.HTTP_TIMEOUT)
+
+    def test_read_header_through_fsspec(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = create_test_raster(os.path.join(tmp_dir, "tiled.tif"))
+            with open(path, "rb") as f:
+                expected = f.read(64)
+            self.assertEqual(tiff.read_header(path, 64),
+                             (expected, os.path.getsize(path)))
+
+            fs = fsspec.filesystem("memory")
+            fs.pipe("/read-header/tiled.tif", expected * 2)
+            try:
+                # One ranged read, without asking for the size.
+                with patch.object(fs, "info", side_effect=AssertionError):
+                    with patch.object(fs, "cat_file",
+                                      wraps=fs.cat_file) as cat_file:
+                        self.assertEqual(
+                            tiff.read_header("memory://read-header/tiled.tif",
+                                             64), (expected, None))
+                cat_file.assert_called_once_with("/read-header/tiled.tif",
+                                                 start=0,
+                                                 end=64)
+            finally:
+                fs.rm("/read-header", recursive=True)
+
+    def test_content_size(self):
+        self.assertEqual(
+            tiff.content_size(206, {"Content-Range": "bytes 0-16383/123456"}),
+            123456)
+        self.assertEqual(tiff.content_size(200, {"Content-Length": "4242"}),
+                         4242)
+        self.assertIsNone(tiff.content_size(200, {}))
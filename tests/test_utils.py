@@ -0,0 +1,55 @@
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+
+from stactools.usgs_nlcd.utils import bounded_map, expand_hrefs
+
+
+def _invert(value: int) -> float:
+    return 1 / value
+
+
+class UtilsTest(unittest.TestCase):
+    def test_bounded_map_keeps_order_and_errors_per_item(self):
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = []
+            for value, future in bounded_map(executor, _invert, [4, 0, 2, 1],
+                                             2):
+                if future.exception() is None:
+                    results.append((value, future.result()))
+                else:
+                    results.append((value, None))
+        self.assertEqual(results, [(4, 0.25), (0, None), (2, 0.5), (1, 1.0)])
+
+    def test_bounded_map_consumes_lazily(self):
+        consumed = []
+
+        def items():
+            for value in range(1, 100):
+                consumed.append(value)
+                yield value
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            results = bounded_map(executor, _invert, items(), 4)
+            next(results)
+            self.assertEqual(len(consumed), 4)
+            results.close()
+
+    def test_expand_hrefs(self):
+        with TemporaryDirectory() as tmp_dir:
+            paths = [
+                os.path.join(tmp_dir, name)
+                for name in ["b.tif", "a.tif", "c.xml"]
+            ]
+            for path in paths:
+                open(path, "w").close()
+            list_file = os.path.join(tmp_dir, "list.txt")
+            with open(list_file, "w") as f:
+                f.write("https://example.com/b.tif\n\n/data/a.tif\n")
+
+            self.assertEqual(expand_hrefs(tmp_dir), sorted(paths[:2]))
+            self.assertEqual(expand_hrefs(os.path.join(tmp_dir, "*.xml")),
+                             paths[2:])
+            self.assertEqual(expand_hrefs(list_file),
+                             ["https://example.com/b.tif", "/data/a.tif"])
@@ -0,0 +1,194 @@
+import json
+import os
+import socket
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from pystac.validation import JsonSchemaSTACValidator, set_validator
+
+from stactools.usgs_nlcd import stac
+from stactools.usgs_nlcd.validation import (
+    SCHEMA_URIS,
+    CachedSchemaValidator,
+    SchemaCache,
+    SchemaNotCachedError,
+    fetch_schemas,
+    schema_path,
+    use_cached_validator,
+    validate_items,
+)
+from tests import create_test_raster, serve_directory
+
+ITEM_SCHEMA_URI = SCHEMA_URIS[0]
+PROJECTION_SCHEMA_URI = (
+    "https://stac-extensions.github.io/projection/v1.0.0/schema.json")
+
+# Small stand-ins for the STAC schemas, as the real ones need network access
+# to fetch.
+TEST_SCHEMAS = {
+    ITEM_SCHEMA_URI: {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "allOf": [{
+            "$ref": "basics.json"
+        }],
+        "required": ["id", "type"],
+        "properties": {
+            "id": {
+                "type": "string"
+            }
+        }
+    },
+    "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/basics.json": {
+        "properties": {
+            "type": {
+                "const": "Feature"
+            }
+        }
+    },
+    PROJECTION_SCHEMA_URI: {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "properties": {
+            "properties": {
+                "properties": {
+                    "proj:epsg": {
+                        "type": "integer"
+                    }
+                }
+            }
+        }
+    },
+}
+
+
+def write_schemas(directory, schemas):
+    for uri, schema in schemas.items():
+        path = schema_path(uri, directory)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(schema, f)
+
+
+class ValidationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.schema_dir = os.path.join(self.tmp_dir.name, "schemas")
+        schemas = dict(TEST_SCHEMAS)
+        for uri in SCHEMA_URIS:
+            schemas.setdefault(uri, {})
+        write_schemas(self.schema_dir, schemas)
+        self.items = list(
+            stac.create_items([
+                create_test_raster(
+                    os.path.join(
+                        self.tmp_dir.name,
+                        f"nlcd_2019_land_cover_l48_20210604_{tile}.tif"))
+                for tile in ["01_01", "01_02"]
+            ]))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_schema_path(self):
+        self.assertEqual(
+            schema_path(PROJECTION_SCHEMA_URI, "schemas"),
+            os.path.join("schemas", "stac-extensions.github.io", "projection",
+                         "v1.0.0", "schema.json"))
+
+    def test_validate_items(self):
+        validator = CachedSchemaValidator(SchemaCache(self.schema_dir))
+        self.assertEqual(list(validate_items(self.items, validator)), [])
+
+        invalid = [item.to_dict() for item in self.items]
+        invalid[0]["type"] = "Collection"
+        invalid[1]["properties"]["proj:epsg"] = "6350"
+        failures = list(validate_items(invalid, validator))
+        self.assertEqual([id for id, _ in failures],
+                         [item.id for item in self.items])
+        self.assertIn(PROJECTION_SCHEMA_URI, str(failures[1][1]))
+
+    def test_validators_compiled_once(self):
+        validator = CachedSchemaValidator(SchemaCache(self.schema_dir))
+        self.assertIs(validator.validator(ITEM_SCHEMA_URI),
+                      validator.validator(ITEM_SCHEMA_URI))
+
+    def test_schema_not_cached(self):
+        cache = SchemaCache(os.path.join(self.tmp_dir.name, "empty"))
+        with self.assertRaises(SchemaNotCachedError):
+            cache.get(ITEM_SCHEMA_URI)
+
+    def test_use_cached_validator(self):
+        use_cached_validator(self.schema_dir, download=False)
+        try:
+            self.items[0].validate()
+        finally:
+            set_validator(JsonSchemaSTACValidator())
+
+    def test_validate_with_schema_ids(self):
+        # Like the STAC schemas, each schema has an `$id` and refers to its
+        # own definitions after referring to another schema.
+        basics_uri = (
+            "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/"
+            "basics.json")
+        schemas = {uri: {} for uri in SCHEMA_URIS}
+        schemas.update({
+            ITEM_SCHEMA_URI: {
+                "$schema":
+                "http://json-schema.org/draft-07/schema#",
+                "$id":
+                ITEM_SCHEMA_URI,
+                "allOf": [{
+                    "$ref": "basics.json"
+                }, {
+                    "$ref": "#/definitions/feature"
+                }],
+                "definitions": {
+                    "feature": {
+                        "required": ["id", "type"]
+                    }
+                }
+            },
+            basics_uri: {
+                "$id": basics_uri,
+                "properties": {
+                    "type": {
+                        "$ref": "#/definitions/type"
+                    }
+                },
+                "definitions": {
+                    "type": {
+                        "const": "Feature"
+                    }
+                }
+            },
+        })
+        schema_dir = os.path.join(self.tmp_dir.name, "ids")
+        write_schemas(schema_dir, schemas)
+        validator = CachedSchemaValidator(SchemaCache(schema_dir))
+        item = self.items[0].to_dict()
+        with patch.object(socket.socket,
+                          "connect",
+                          side_effect=OSError("No network")):
+            self.assertEqual(list(validate_items([item], validator)), [])
+            del item["id"]
+            failures = list(validate_items([item], validator))
+        self.assertEqual(len(failures), 1)
+
+    def test_fetch_schemas(self):
+        served = os.path.join(self.tmp_dir.name, "served")
+        os.makedirs(os.path.join(served, "definitions"))
+        with open(os.path.join(served, "schema.json"), "w") as f:
+            json.dump({"$ref": "definitions/common.json#/definitions/id"}, f)
+        with open(os.path.join(served, "definitions", "common.json"),
+                  "w") as f:
+            json.dump({"definitions": {"id": {"type": "string"}}}, f)
+        directory = os.path.join(self.tmp_dir.name, "fetched")
+
+        with serve_directory(served) as url:
+            uris = fetch_schemas(directory, [f"{url}schema.json"])
+            self.assertEqual(
+                uris, [f"{url}schema.json", f"{url}definitions/common.json"])
+            for uri in uris:
+                self.assertTrue(os.path.exists(schema_path(uri, directory)))
+            validator = CachedSchemaValidator(SchemaCache(directory))
+            validator.validator(uris[0]).validate("an id")